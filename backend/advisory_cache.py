@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import Dict, Any, Callable, List, Optional, Sequence
+
+from cache import LRUCache
+
+# Memo of /daily-advisory predictions over quantized sensor readings.
+#
+# Readings are snapped to a per-field grid (by default the precision the
+# sensors actually report: whole percent, 0.1 °C, ...) *before* inference, so
+# every cached prediction is exactly what the models return for its key, and
+# neighbouring plots sending the same readings share one entry. Only the
+# predictions are stored: the recommendation text quotes the readings and
+# applies thresholds to them, so callers render it from the rows as sent (see
+# render_advisory_json). Entries are language-independent; keys carry the
+# advisory model version, and a version change clears the memo.
+#
+# Opt-in: set ADVISORY_CACHE_MAX_MB > 0. Override the grid with e.g.
+#   ADVISORY_CACHE_QUANTA="soil_moisture=2,temperature=0.5"
+
+DEFAULT_QUANTA = {
+    "soil_moisture": 1.0,
+    "temperature": 0.1,
+    "humidity": 1.0,
+    "rainfall_last_3_days": 0.1,
+    "days_since_last_irrigation": 1.0,
+}
+
+
+def parse_quanta(spec: Optional[str]) -> Dict[str, float]:
+    quanta = dict(DEFAULT_QUANTA)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        field, _, value = item.partition("=")
+        field = field.strip()
+        if field not in DEFAULT_QUANTA:
+            raise ValueError(f"Unknown advisory cache field '{field}'. Known: {list(DEFAULT_QUANTA)}")
+        step = float(value)
+        if step <= 0:
+            raise ValueError(f"Quantum for '{field}' must be positive, got {value!r}.")
+        quanta[field] = step
+    return quanta
+
+
+class AdvisoryMemo:
+    def __init__(self, cache: LRUCache, quanta: Dict[str, float]):
+        self.cache = cache
+        self.quanta = quanta
+        self.model_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _bind(self, model_version: str) -> None:
+        with self._lock:
+            if model_version != self.model_version:
+                self.cache.clear()
+                self.model_version = model_version
+
+    def snap(self, row: Dict[str, Any]) -> tuple:
+        # (grid steps per field, row with values snapped to the grid)
+        steps = []
+        snapped = dict(row)
+        for field, step in self.quanta.items():
+            n = round(row[field] / step)
+            steps.append(n)
+            value = round(n * step, 6)
+            snapped[field] = int(value) if isinstance(row[field], int) else value
+        return steps, snapped
+
+    def prepare(self, rows: Sequence[Dict[str, Any]], model_version: str) -> tuple:
+        # -> (keys, cached results with None for misses, {key: snapped row} to compute)
+        self._bind(model_version)
+        keys = []
+        results: List[Optional[Dict[str, Any]]] = []
+        missed: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            steps, snapped = self.snap(row)
+            key = f"{model_version}|{row['crop_stage']}|" + ",".join(map(str, steps))
+            keys.append(key)
+            value = self.cache.get(key)
+            results.append(value)
+            if value is None and key not in missed:
+                missed[key] = snapped
+        return keys, results, missed
+
+    def complete(self, keys: list, results: list, missed: Dict[str, Any], computed: list) -> list:
+        # Stores `computed` (one per missed row, in order) and fills the gaps.
+        fresh = dict(zip(missed, computed))
+        for key, value in fresh.items():
+            self.cache.put(key, value)
+        return [value if value is not None else fresh[key] for key, value in zip(keys, results)]
+
+    def lookup(
+        self,
+        rows: Sequence[Dict[str, Any]],
+        model_version: str,
+        compute: Callable[[List[Dict[str, Any]]], list],
+    ) -> list:
+        # Serves what it can from the memo and runs `compute` once, as a batch,
+        # over the snapped rows that missed.
+        keys, results, missed = self.prepare(rows, model_version)
+        if not missed:
+            return results
+        return self.complete(keys, results, missed, compute(list(missed.values())))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "model_version": self.model_version, "quanta": self.quanta}
+
+
+def build_advisory_memo() -> Optional[AdvisoryMemo]:
+    max_mb = float(os.getenv("ADVISORY_CACHE_MAX_MB", "0"))
+    if max_mb <= 0:
+        return None
+    ttl = float(os.getenv("ADVISORY_CACHE_TTL_SECONDS", "3600"))
+    return AdvisoryMemo(
+        LRUCache(max_bytes=int(max_mb * 1024 * 1024), ttl_seconds=ttl if ttl > 0 else None),
+        parse_quanta(os.getenv("ADVISORY_CACHE_QUANTA")),
+    )
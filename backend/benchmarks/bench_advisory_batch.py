@@ -0,0 +1,50 @@
+# Per-row latency of get_daily_advisory (one call per field) vs
+# get_daily_advisory_batch (one call for all fields).
+#
+#   cd backend && python -m benchmarks.bench_advisory_batch
+
+import time
+
+import numpy as np
+
+from models.advisory_model import CROP_STAGES, get_daily_advisory, get_daily_advisory_batch
+from models.model_store import load_or_train
+
+
+def random_rows(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "soil_moisture": round(float(rng.uniform(10, 80)), 1),
+            "temperature": round(float(rng.uniform(15, 45)), 1),
+            "humidity": round(float(rng.uniform(30, 95)), 1),
+            "rainfall_last_3_days": round(float(rng.uniform(0, 50)), 1),
+            "crop_stage": CROP_STAGES[int(rng.integers(len(CROP_STAGES)))],
+            "days_since_last_irrigation": int(rng.integers(0, 15)),
+        }
+        for _ in range(n)
+    ]
+
+
+def main() -> None:
+    bundle = load_or_train()
+    irr_model, fert_model = bundle["irr_model"], bundle["fert_model"]
+
+    single_rows = random_rows(200)
+    get_daily_advisory(irr_model, fert_model, **single_rows[0])
+    start = time.perf_counter()
+    for row in single_rows:
+        get_daily_advisory(irr_model, fert_model, **row)
+    single_us = (time.perf_counter() - start) / len(single_rows) * 1e6
+    print(f"{'single-row':<14}{len(single_rows):>8} rows {single_us:>10.1f} µs/row")
+
+    for n in (100, 1_000, 10_000):
+        rows = random_rows(n, seed=n)
+        start = time.perf_counter()
+        get_daily_advisory_batch(irr_model, fert_model, rows)
+        batch_us = (time.perf_counter() - start) / n * 1e6
+        print(f"{'batch':<14}{n:>8} rows {batch_us:>10.1f} µs/row  ({single_us / batch_us:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Single-row advisory latency with and without the quantized prediction memo,
+# on traffic where many plots report the same readings.
+#
+#   cd backend && python -m benchmarks.bench_advisory_cache [--requests N] [--distinct N]
+
+import argparse
+import time
+
+import numpy as np
+
+from advisory_cache import AdvisoryMemo, DEFAULT_QUANTA
+from benchmarks.bench_advisory_batch import random_rows
+from cache import LRUCache
+from models.advisory_model import get_daily_advisory_json, infer_advisories, render_advisory_json
+from models.model_store import load_or_train
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=200)
+    args = parser.parse_args()
+
+    bundle = load_or_train()
+    irr_model, fert_model = bundle["irr_model"], bundle["fert_model"]
+
+    def compute(rows):
+        return get_daily_advisory_json(irr_model, fert_model, rows)
+
+    distinct = random_rows(args.distinct)
+    rng = np.random.default_rng(1)
+    traffic = [distinct[i] for i in rng.integers(len(distinct), size=args.requests)]
+
+    compute(traffic[:1])
+    start = time.perf_counter()
+    for row in traffic:
+        compute([row])
+    plain_us = (time.perf_counter() - start) / len(traffic) * 1e6
+    print(f"{'no memo':<12}{plain_us:>10.1f} µs/request")
+
+    memo = AdvisoryMemo(LRUCache(max_bytes=4 * 1024 * 1024, ttl_seconds=3600), dict(DEFAULT_QUANTA))
+    start = time.perf_counter()
+    for row in traffic:
+        predictions = memo.lookup([row], bundle["version"], lambda rows: infer_advisories(irr_model, fert_model, rows))
+        render_advisory_json([row], predictions)
+    memo_us = (time.perf_counter() - start) / len(traffic) * 1e6
+    stats = memo.stats()
+    print(
+        f"{'memo':<12}{memo_us:>10.1f} µs/request  ({plain_us / memo_us:.0f}x, "
+        f"hit ratio {stats['hit_ratio']:.2f}, {stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
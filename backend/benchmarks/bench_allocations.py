@@ -0,0 +1,79 @@
+# Allocation and time per response on the advisory and growth-plan routes'
+# hot path: the generic route (result dict, then FastAPI's jsonable_encoder +
+# JSONResponse) against the pre-encoded JSON path the routes use now.
+# tracemalloc reports the peak of short-lived allocations per call and what
+# is still held afterwards; timings are taken with tracing off.
+#
+#   cd backend && python -m benchmarks.bench_allocations [--calls 2000]
+
+import argparse
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.bench_advisory_batch import random_rows
+from benchmarks.bench_growth_batch import random_plots
+from models.advisory_model import get_daily_advisory_batch, get_daily_advisory_json
+from models.growth_model import get_growth_plan, get_growth_plan_json
+from models.model_store import load_or_train
+
+
+def per_call_bytes(fn, calls: int) -> tuple:
+    # -> (mean peak transient bytes, mean retained bytes) per call
+    fn(0)
+    tracemalloc.start()
+    peaks = 0
+    before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for i in range(calls):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        kept.append(fn(i))
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return peaks / calls, retained / calls
+
+
+def per_call_seconds(fn, calls: int) -> float:
+    fn(0)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    bundle = load_or_train()
+    irr, fert = bundle["irr_model"], bundle["fert_model"]
+    rows = [[row] for row in random_rows(256)]
+    plots = random_plots(256)
+
+    cases = [
+        ("advisory  dict+JSONResponse",
+         lambda i: JSONResponse(jsonable_encoder(get_daily_advisory_batch(irr, fert, rows[i % 256])[0])).body),
+        ("advisory  pre-encoded",
+         lambda i: get_daily_advisory_json(irr, fert, rows[i % 256])[0].encode()),
+        ("growth    dict+JSONResponse",
+         lambda i: JSONResponse(jsonable_encoder(get_growth_plan(**plots[i % 256]))).body),
+        ("growth    pre-encoded",
+         lambda i: get_growth_plan_json(**plots[i % 256]).encode()),
+    ]
+    print(f"{'':<30}{'peak/call':>12}{'kept/call':>12}{'time/call':>12}")
+    for name, fn in cases:
+        peak, retained = per_call_bytes(fn, args.calls)
+        seconds = per_call_seconds(fn, args.calls)
+        print(f"{name:<30}{peak:>10.0f} B{retained:>10.0f} B{seconds * 1e6:>9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
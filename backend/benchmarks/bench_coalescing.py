@@ -0,0 +1,127 @@
+# Burst load with and without request coalescing (singleflight.py).
+#
+# Models a village opening the app at 6 AM: each wave fires --burst concurrent
+# requests at /growth-plan and /daily-advisory, drawn from a handful of
+# identical bodies (--villages). Starts uvicorn once per profile and reports
+# p50/p99 latency per route, then reads /stats for how many computations
+# actually ran and the coalescing rate.
+#
+#   cd backend && python -m benchmarks.bench_coalescing [--waves 10] [--burst 200] [--villages 5]
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_advisory_batch import random_rows
+from benchmarks.bench_upload_rss import BACKEND_DIR, free_port
+
+PROFILES = {
+    "off": {"COALESCE_REQUESTS": "0"},
+    "on": {"COALESCE_REQUESTS": "1"},
+}
+ROUTES = {"/growth-plan": "growth_plan", "/daily-advisory": "advisory"}
+
+
+def village_bodies(n: int) -> dict:
+    rng = np.random.default_rng(0)
+    sowing = (date.today() - timedelta(days=60)).isoformat()
+    plans = [
+        {
+            "crop_type": "wheat", "sowing_date": sowing, "city": "Pune", "tmax": 31, "tmin": 18,
+            "lat": round(float(rng.uniform(10, 28)), 3), "lon": round(float(rng.uniform(72, 86)), 3),
+        }
+        for _ in range(n)
+    ]
+    return {"/growth-plan": plans, "/daily-advisory": random_rows(n)}
+
+
+async def wave(client: httpx.AsyncClient, bodies: dict, burst: int, rng, out: dict) -> None:
+    async def one(route: str, body: dict) -> None:
+        start = time.perf_counter()
+        res = await client.post(route, json=body)
+        key = route if res.status_code == 200 else f"{route} {res.status_code}"
+        out.setdefault(key, []).append(time.perf_counter() - start)
+
+    calls = []
+    for _ in range(burst):
+        route = list(ROUTES)[int(rng.integers(len(ROUTES)))]
+        calls.append(one(route, bodies[route][int(rng.integers(len(bodies[route])))]))
+    await asyncio.gather(*calls)
+
+
+async def drive(url: str, args) -> tuple:
+    bodies = village_bodies(args.villages)
+    rng = np.random.default_rng(1)
+    out: dict = {}
+    limits = httpx.Limits(max_connections=args.burst)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        for _ in range(args.waves):
+            await wave(client, bodies, args.burst, rng, out)
+        elapsed = time.perf_counter() - start
+        stats = (await client.get("/stats")).json()["coalescing"]
+    return out, elapsed, stats
+
+
+def run_profile(name: str, args) -> None:
+    port = free_port()
+    env = {
+        **os.environ,
+        "WEATHER_SOURCE": os.environ.get("WEATHER_SOURCE", "fake"),
+        "WEATHER_CACHE_DIR": tempfile.mkdtemp(prefix="bench-weather-"),
+        "ROUTE_CONCURRENCY": "/daily-advisory=100000,/growth-plan=100000",
+        "ADVISORY_MAX_PENDING": "100000",
+        "LIGHT_MAX_PENDING": "100000",
+        **PROFILES[name],
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(600):
+            try:
+                httpx.get(url, timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        results, elapsed, stats = asyncio.run(drive(url, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    for route, latencies in sorted(results.items()):
+        ms = np.array(latencies) * 1000
+        print(
+            f"{name:<5}{route:<22}{len(ms):>7} req{np.percentile(ms, 50):>10.1f} ms p50"
+            f"{np.percentile(ms, 99):>10.1f} ms p99"
+        )
+    for route, group in ROUTES.items():
+        s = stats[group]
+        print(f"{name:<5}{route:<22}{s['executions']:>7} computations for {s['calls']} calls"
+              f"  (coalescing rate {s['coalescing_rate']:.1%})")
+    print(f"{name:<5}{'total':<22}{elapsed:>7.1f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--waves", type=int, default=10)
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--villages", type=int, default=5)
+    parser.add_argument("--profile", choices=list(PROFILES), action="append")
+    args = parser.parse_args()
+    for name in args.profile or list(PROFILES):
+        run_profile(name, args)
+
+
+if __name__ == "__main__":
+    main()
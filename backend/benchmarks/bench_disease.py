@@ -0,0 +1,80 @@
+# Disease classifier throughput: images/second in-process (one core) and
+# through the bounded process pool, plus how many requests a burst larger than
+# the queue limit gets rejected.
+#
+#   cd backend && python -m benchmarks.bench_disease [--workers N] [--images N]
+
+import argparse
+import asyncio
+import io
+import os
+import time
+
+import numpy as np
+
+from executors import BoundedProcessPool, PoolSaturated
+from models.disease_classifier import LABELS, init_worker, load_or_train_classifier, synthetic_leaf
+from models.disease_model import detect_disease
+
+
+def make_jpegs(n: int, size: int, seed: int = 0) -> list:
+    # Phone-photo sized JPEGs: synthetic leaves upscaled to `size` pixels.
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(n):
+        img = synthetic_leaf(LABELS[i % len(LABELS)], rng).resize((size, size * 3 // 4))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        images.append(buf.getvalue())
+    return images
+
+
+async def run_pool(pool: BoundedProcessPool, images: list) -> tuple:
+    async def one(data):
+        try:
+            await pool.run(detect_disease, data, "en")
+            return True
+        except PoolSaturated:
+            return False
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(data) for data in images))
+    return time.perf_counter() - start, results.count(False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--images", type=int, default=120)
+    parser.add_argument("--size", type=int, default=2048)
+    args = parser.parse_args()
+
+    load_or_train_classifier()
+    init_worker()
+    images = make_jpegs(args.images, args.size)
+    print(f"{len(images)} JPEGs, {args.size}px wide, avg {np.mean([len(i) for i in images]) / 1024:.0f} KiB")
+
+    detect_disease(images[0])
+    start = time.perf_counter()
+    for data in images:
+        detect_disease(data)
+    single = len(images) / (time.perf_counter() - start)
+    print(f"{'in-process':<24}{single:>8.1f} img/s  ({single:.1f} img/s/core)")
+
+    pool = BoundedProcessPool("bench", args.workers, max_pending=len(images), initializer=init_worker)
+    pool.warm_up()
+    elapsed, _ = asyncio.run(run_pool(pool, images))
+    rate = len(images) / elapsed
+    print(f"{f'pool ({args.workers} workers)':<24}{rate:>8.1f} img/s  ({rate / args.workers:.1f} img/s/core)")
+    pool.shutdown()
+
+    limit = args.workers * 4
+    pool = BoundedProcessPool("bench", args.workers, max_pending=limit, initializer=init_worker)
+    pool.warm_up()
+    _, rejected = asyncio.run(run_pool(pool, images))
+    print(f"burst of {len(images)} with max_pending={limit}: {rejected} rejected (503)")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# sklearn predict_proba vs FlatForest.predict_proba: latency per call and an
+# exact-equality check over a synthetic corpus.
+#
+#   cd backend && python -m benchmarks.bench_flat_forest
+
+import time
+
+from models.advisory_model import FEATURES
+from models.advisory_training import generate_synthetic_data
+from models.flat_forest import check_equivalence
+from models.model_store import MODEL_NAMES, load_or_train
+
+
+def per_call_us(fn, X, repeats: int) -> float:
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main() -> None:
+    sk = load_or_train(backend="sklearn")
+    flat = load_or_train(backend="flat")
+    corpus = generate_synthetic_data(50_000, seed=1234)[FEATURES].values
+
+    print(f"{'model':<12}{'rows':>8}{'sklearn µs':>14}{'flat µs':>12}{'max |diff|':>12}")
+    for name in MODEL_NAMES:
+        drift = check_equivalence(sk[name], flat[name], corpus)
+        for n, repeats in ((1, 200), (100, 50), (10_000, 3)):
+            X = corpus[:n]
+            sk_us = per_call_us(sk[name].predict_proba, X, repeats)
+            flat_us = per_call_us(flat[name].predict_proba, X, repeats)
+            print(f"{name:<12}{n:>8}{sk_us:>14.0f}{flat_us:>12.0f}{drift:>12.1g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Per-plot latency of get_growth_plan (one call per plot) vs
+# get_growth_plan_batch (grouped by crop, array operations).
+#
+#   cd backend && python -m benchmarks.bench_growth_batch
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from models.growth_model import CROP_STAGES, get_growth_plan, get_growth_plan_batch
+
+
+def random_plots(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    crops = list(CROP_STAGES)
+    today = date.today()
+    plots = []
+    for i in range(n):
+        tmin = round(float(rng.uniform(0, 28)), 1)
+        plots.append({
+            "crop_type": crops[int(rng.integers(len(crops)))],
+            "sowing_date": (today - timedelta(days=int(rng.integers(0, 150)))).isoformat(),
+            "city": f"plot-{i}",
+            "tmax": round(tmin + float(rng.uniform(2, 15)), 1),
+            "tmin": tmin,
+            "accumulated_gdd": None if i % 2 else round(float(rng.uniform(0, 1500)), 1),
+        })
+    return plots
+
+
+def main() -> None:
+    single_plots = random_plots(1_000)
+    start = time.perf_counter()
+    for plot in single_plots:
+        get_growth_plan(**plot)
+    single_us = (time.perf_counter() - start) / len(single_plots) * 1e6
+    print(f"{'single-plot':<14}{len(single_plots):>8} plots {single_us:>8.1f} µs/plot")
+
+    for n in (100, 1_000, 10_000):
+        plots = random_plots(n, seed=n)
+        start = time.perf_counter()
+        get_growth_plan_batch(plots)
+        batch_us = (time.perf_counter() - start) / n * 1e6
+        print(f"{'batch':<14}{n:>8} plots {batch_us:>8.1f} µs/plot  ({single_us / batch_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Cold-import cost of the serving app, from `python -X importtime`.
+#
+# "eager" imports pandas and sklearn up front, as main.py used to through
+# advisory_model; "lean" imports only main. Each run is a fresh interpreter.
+# Prints wall time, the cumulative import time of the biggest top-level
+# packages and the RSS after import, and checks that serving never pulls in
+# the training stack.
+#
+#   cd backend && python -m benchmarks.bench_importtime [--repeats 3] [--top 8]
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_upload_rss import BACKEND_DIR
+
+TRAINING_ONLY = ["pandas", "sklearn", "joblib", "scipy"]
+SNIPPETS = {
+    "eager": "import pandas, sklearn.ensemble, main",
+    "lean": "import main",
+}
+REPORT = """
+import sys
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+print(rss, ",".join(m for m in {training} if m in sys.modules))
+""".format(training=TRAINING_ONLY)
+
+
+def run(snippet: str) -> dict:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", snippet + "\n" + REPORT],
+        cwd=BACKEND_DIR, env=dict(os.environ), capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    packages = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Top-level packages are the entries indented by a single space.
+        if name.startswith(" ") and not name.startswith("  "):
+            top = name.strip().split(".")[0]
+            packages[top] = packages.get(top, 0) + int(cumulative)
+    rss_kib, loaded = out.stdout.strip().splitlines()[-1].partition(" ")[::2]
+    return {"wall": wall, "packages": packages, "rss_mib": int(rss_kib) / 1024, "loaded": loaded}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    for name, snippet in SNIPPETS.items():
+        runs = [run(snippet) for _ in range(args.repeats)]
+        best = min(runs, key=lambda r: r["wall"])
+        print(f"{name:<6} wall {best['wall']:.2f}s  RSS {best['rss_mib']:.0f} MiB  "
+              f"training modules loaded: {best['loaded'] or 'none'}")
+        for pkg, us in sorted(best["packages"].items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"       {pkg:<24}{us / 1000:>8.1f} ms")
+
+    lean = run(SNIPPETS["lean"])
+    if lean["loaded"]:
+        sys.exit(f"serving import pulled in training-only modules: {lean['loaded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Probability lattice vs the flat forests: build time and size of the table,
+# its disagreement with the forest on random inputs, and predict_proba latency
+# per call for both lookup modes.
+#
+#   cd backend && python -m benchmarks.bench_lattice [--steps "soil_moisture=1"]
+
+import argparse
+import shutil
+import time
+
+import numpy as np
+
+from models.flat_forest import FlatForest
+from models.model_store import MODEL_DIR, MODEL_NAMES, ensure_artifact
+from models.prob_lattice import (
+    LATTICE_MODES, LATTICE_STEPS, ProbabilityLattice, build_lattice, lattice_dir, parse_steps, random_inputs,
+)
+
+
+def per_call_us(fn, X, repeats: int) -> float:
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", default=LATTICE_STEPS)
+    args = parser.parse_args()
+
+    manifest = ensure_artifact(allow_train=True, backend="flat")
+    steps = parse_steps(args.steps)
+    out = lattice_dir(manifest, MODEL_DIR, steps)
+    shutil.rmtree(out, ignore_errors=True)
+    meta = build_lattice(manifest, MODEL_DIR, steps)
+    size_mb = sum(p.stat().st_size for p in out.iterdir()) / 2**20
+    print(f"lattice: {meta['cells']:,} cells per model, {size_mb:.0f} MiB, built in {meta['build_seconds']}s")
+
+    X = random_inputs(10_000, seed=7)
+    flat_dir = MODEL_DIR / manifest["flat_dir"]
+    header = "".join(f"{mode + ' µs':>14}" for mode in LATTICE_MODES)
+    print(f"{'model':<12}{'rows':>8}{'flat µs':>12}{header}  label disagreement")
+    for name in MODEL_NAMES:
+        forest = FlatForest.load(flat_dir, name)
+        lattices = {
+            mode: ProbabilityLattice(np.load(out / f"{name}.npy", mmap_mode="r"), meta["axes"], forest.classes_, mode)
+            for mode in LATTICE_MODES
+        }
+        report = meta["models"][name]["report"]
+        for n, repeats in ((1, 500), (100, 100), (10_000, 3)):
+            row = f"{name:<12}{n:>8}{per_call_us(forest.predict_proba, X[:n], repeats):>12.1f}"
+            row += "".join(f"{per_call_us(lattices[m].predict_proba, X[:n], repeats):>14.1f}" for m in LATTICE_MODES)
+            if n == 1:
+                row += "  " + ", ".join(f"{m} {report[m]['label_disagreement']:.2%}" for m in LATTICE_MODES)
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Cost of the instrumentation on the hottest path: a single-row advisory
+# (flat forests, four spans and two counters per call) and a growth plan, with
+# METRICS_ENABLED=1 vs 0. The switch is read at import, so each setting runs
+# in a fresh interpreter.
+#
+#   cd backend && python -m benchmarks.bench_metrics_overhead [--calls 20000]
+
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_upload_rss import BACKEND_DIR
+
+SNIPPET = """
+import time
+from benchmarks.bench_advisory_batch import random_rows
+from models.advisory_model import get_daily_advisory_batch
+from models.growth_model import get_growth_plan
+from models.model_store import load_or_train
+
+bundle = load_or_train()
+rows = [[row] for row in random_rows(256)]
+calls = {calls}
+
+def per_call(fn):
+    fn(0)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        best = min(best, (time.perf_counter() - start) / calls * 1e6)
+    return best
+
+advisory = per_call(lambda i: get_daily_advisory_batch(bundle["irr_model"], bundle["fert_model"], rows[i % 256]))
+growth = per_call(lambda i: get_growth_plan("wheat", "2026-01-01", "Pune", 30, 15))
+print(advisory, growth)
+"""
+
+
+def run(enabled: bool, calls: int) -> tuple:
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(calls=calls)],
+        cwd=BACKEND_DIR, env={**os.environ, "METRICS_ENABLED": "1" if enabled else "0"},
+        capture_output=True, text=True, check=True,
+    )
+    advisory, growth = map(float, out.stdout.split()[-2:])
+    return advisory, growth
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    off = run(False, args.calls)
+    on = run(True, args.calls)
+    print(f"{'':<22}{'disabled':>12}{'enabled':>12}{'overhead':>12}")
+    for name, a, b in [("advisory (1 row)", off[0], on[0]), ("growth plan", off[1], on[1])]:
+        print(f"{name:<22}{a:>9.2f} µs{b:>9.2f} µs{b - a:>9.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
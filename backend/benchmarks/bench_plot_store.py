@@ -0,0 +1,92 @@
+# Nightly precompute throughput and morning read cost for the plot registry:
+# registers --plots random plots with readings in a throwaway database, times
+# models.precompute over all of them, then compares a precomputed read (one
+# indexed SQLite lookup) with computing the same plot's plan and advisory live.
+# Half the plots have a location, so the job also pulls (fake) weather history
+# once per grid cell.
+#
+#   cd backend && python -m benchmarks.bench_plot_store [--plots 20000]
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+os.environ.setdefault("WEATHER_SOURCE", "fake")
+os.environ.setdefault("WEATHER_CACHE_DIR", tempfile.mkdtemp(prefix="bench-weather-"))
+
+import numpy as np
+
+from benchmarks.bench_advisory_batch import random_rows
+from benchmarks.bench_growth_batch import random_plots
+from models.advisory_model import get_daily_advisory_json
+from models.model_store import load_or_train
+from models.precompute import advisory_row, plan_plots, run_nightly
+from plot_store import PlotStore
+
+
+def fill(store: PlotStore, n: int, cells: int = 200) -> list:
+    # Located plots cluster around `cells` villages, as registered farms do.
+    rng = np.random.default_rng(0)
+    centers = np.column_stack([rng.uniform(8, 30, cells), rng.uniform(70, 88, cells)])
+    ids = []
+    for i, (plot, row) in enumerate(zip(random_plots(n), random_rows(n))):
+        plot_id = f"plot-{i}"
+        lat, lon = centers[int(rng.integers(cells))] + rng.normal(0, 0.02, 2)
+        located = i % 2 == 0
+        store.upsert_plot(plot_id, {
+            **plot,
+            "lat": round(float(lat), 3) if located else None,
+            "lon": round(float(lon), 3) if located else None,
+            "stage_basis": "days",
+            "lang": "hi" if i % 3 == 0 else "en",
+        })
+        store.record_readings(
+            plot_id, {**row, "tmax": plot["tmax"], "tmin": plot["tmin"]}, row["days_since_last_irrigation"]
+        )
+        ids.append(plot_id)
+    return ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plots", type=int, default=20000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    store = PlotStore(Path(tempfile.mkdtemp(prefix="bench-plots-")) / "plots.sqlite3")
+    bundle = load_or_train()
+    today = date.today()
+
+    start = time.perf_counter()
+    ids = fill(store, args.plots)
+    print(f"register + readings   {args.plots:>8} plots {time.perf_counter() - start:>8.2f} s")
+
+    report = run_nightly(store, today)
+    print(f"nightly precompute    {report['plots']:>8} plots {report['seconds']:>8.2f} s"
+          f"  ({report['plots_per_second']} plots/s)")
+
+    sample = [ids[i] for i in np.random.default_rng(1).integers(len(ids), size=args.reads)]
+    start = time.perf_counter()
+    for plot_id in sample:
+        row = store.lookup(plot_id)
+        row["growth_plan"], row["advisory"]
+    lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+    start = time.perf_counter()
+    for plot_id in sample:
+        plot = store.lookup(plot_id)
+        plan = plan_plots([plot], plot["lang"], today)[0]
+        get_daily_advisory_json(
+            bundle["irr_model"], bundle["fert_model"], [advisory_row(plot, plan["current_stage"], today)], plot["lang"]
+        )
+    live_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+    print(f"read precomputed      {lookup_us:>10.1f} µs/plot")
+    print(f"compute live          {live_us:>10.1f} µs/plot  ({live_us / lookup_us:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
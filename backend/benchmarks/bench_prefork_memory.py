@@ -0,0 +1,128 @@
+# Memory of a multi-worker deployment: plain gunicorn workers each importing
+# the app, loading their own models and spawning their own inference pools
+# ("per-worker"), vs the pre-fork mode in gunicorn.conf.py (models loaded once
+# in the master, shared copy-on-write, inference inline).
+#
+# For each worker count, starts gunicorn, sends advisory and disease requests
+# so every worker has touched its models, then reads /proc/<pid>/smaps_rollup
+# for the master, each worker and any pool processes under it. USS (private
+# memory) is what a worker really costs; PSS sums to the total footprint.
+#
+#   cd backend && python -m benchmarks.bench_prefork_memory [--workers 1 4 8]
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_disease import make_jpegs
+from benchmarks.bench_upload_rss import BACKEND_DIR, child_pids, free_port
+
+ADVISORY_ROW = {
+    "soil_moisture": 25, "temperature": 31, "humidity": 60,
+    "rainfall_last_3_days": 2, "crop_stage": "Tillering", "days_since_last_irrigation": 4,
+}
+# gunicorn picks up ./gunicorn.conf.py by default, so the baseline points -c
+# at an empty config instead.
+EMPTY_CONFIG = Path(tempfile.gettempdir()) / "gunicorn_empty.conf.py"
+PROFILES = {
+    "per-worker": (["-c", str(EMPTY_CONFIG), "-k", "uvicorn_worker.UvicornWorker"], {}),
+    "prefork": (["-c", "gunicorn.conf.py"], {}),
+}
+
+
+def smaps_kib(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def descendants(pid: int) -> list:
+    # By parent pid from /proc, since pool processes may be started from any
+    # thread (the children file only lists the main thread's).
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (FileNotFoundError, ProcessLookupError):
+                pass
+    found, frontier = [], [pid]
+    while frontier:
+        frontier = [p for p, ppid in parents.items() if ppid in frontier]
+        found += frontier
+    return found
+
+
+def run(profile: str, workers: int, image: bytes) -> dict:
+    args, extra_env = PROFILES[profile]
+    port = free_port()
+    env = {**os.environ, **extra_env, "WEB_CONCURRENCY": str(workers)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", *args, "-w", str(workers), "-b", f"127.0.0.1:{port}",
+         "--log-level", "warning", "main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(1200):
+            if len(child_pids(server.pid)) >= workers:
+                try:
+                    httpx.get(url, timeout=1)
+                    break
+                except httpx.HTTPError:
+                    pass
+            time.sleep(0.1)
+        # New connections get spread over the workers; enough rounds that each one
+        # serves both routes at least once.
+        for _ in range(workers * 6):
+            with httpx.Client(base_url=url, timeout=60) as client:
+                client.post("/daily-advisory", json=ADVISORY_ROW).raise_for_status()
+                client.post("/detect-disease", files={"image": ("leaf.jpg", io.BytesIO(image), "image/jpeg")})
+        # Per worker: the web worker plus any pool processes it spawned.
+        worker_mem = [[smaps_kib(p) for p in [pid] + descendants(pid)] for pid in child_pids(server.pid)]
+        master = smaps_kib(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "worker_rss": sum(sum(m["rss"] for m in w) for w in worker_mem) / len(worker_mem),
+        "worker_uss": sum(sum(m["uss"] for m in w) for w in worker_mem) / len(worker_mem),
+        "total_pss": master["pss"] + sum(sum(m["pss"] for m in w) for w in worker_mem),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    EMPTY_CONFIG.write_text("")
+    image = make_jpegs(1, 1024)[0]
+    print(f"{'profile':<12}{'workers':>8}{'RSS/worker':>13}{'USS/worker':>13}{'total PSS':>12}")
+    for profile in PROFILES:
+        for n in args.workers:
+            r = run(profile, n, image)
+            print(
+                f"{profile:<12}{n:>8}{r['worker_rss'] / 1024:>10.0f} MiB{r['worker_uss'] / 1024:>10.0f} MiB"
+                f"{r['total_pss'] / 1024:>9.0f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Season simulation cost: the engine alone (simulate_stage_days + quantiles)
+# for 100/1k/10k plots, with every plot on its own temperature series and with
+# plots sharing 50 weather cells; then project_seasons end to end (scenario
+# building from the warm weather cache, engine, formatting) for 1k plots.
+#
+#   cd backend && python -m benchmarks.bench_season_sim
+
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("WEATHER_SOURCE", "fake")
+os.environ.setdefault("WEATHER_CACHE_DIR", tempfile.mkdtemp(prefix="bench-weather-"))
+
+import numpy as np
+
+from models.growth_model import CALENDARS
+from models.season_sim import CLIMATE_YEARS, project_seasons, simulate_stage_days, stage_day_quantiles
+
+DAYS = 400
+CELLS = 50
+
+
+def best_ms(fn, repeats: int = 5) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def engine_inputs(n_plots: int, n_series: int, rng) -> tuple:
+    calendars = [CALENDARS[c] for c in rng.choice(list(CALENDARS), n_plots)]
+    tmean = rng.normal(24, 6, (CLIMATE_YEARS, n_series, DAYS)).astype(np.float32)
+    series = np.arange(n_plots) if n_series == n_plots else rng.integers(n_series, size=n_plots)
+    base = np.array([c.base_temp for c in calendars], dtype=np.float64)
+    thresholds = np.array([c.stage_thresholds for c in calendars])
+    sowing = rng.integers(0, 150, n_plots)
+    return tmean, series, base, thresholds, sowing
+
+
+def random_located_plots(n: int, rng) -> list:
+    today = date.today()
+    centers = np.column_stack([rng.uniform(10, 28, CELLS), rng.uniform(72, 86, CELLS)])
+    crops = list(CALENDARS)
+    plots = []
+    for i in range(n):
+        lat, lon = centers[int(rng.integers(CELLS))]
+        plots.append({
+            "crop_type": crops[i % len(crops)],
+            "sowing_date": (today - timedelta(days=int(rng.integers(0, 150)))).isoformat(),
+            "lat": float(lat),
+            "lon": float(lon),
+        })
+    return plots
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"engine, {CLIMATE_YEARS} scenarios x {DAYS} days")
+    print(f"{'plots':>8}{'own series':>14}{f'{CELLS} cells':>14}")
+    for n in (100, 1_000, 10_000):
+        row = []
+        for n_series in (n, CELLS):
+            args = engine_inputs(n, n_series, rng)
+            row.append(best_ms(lambda: stage_day_quantiles(simulate_stage_days(*args), DAYS)))
+        print(f"{n:>8}{row[0]:>11.1f} ms{row[1]:>11.1f} ms")
+
+    plots = random_located_plots(1_000, rng)
+    for mode in ("analog", "percentiles"):
+        ms = best_ms(lambda: project_seasons(plots, mode=mode))
+        print(f"project_seasons[{mode}] 1000 plots / {CELLS} cells: {ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Startup-time benchmark for the advisory model artifact store.
+#
+# "before" reproduces the old behaviour (importing main.py trained both forests):
+# the app is started against an empty MODEL_DIR so it has to train.
+# "after" starts it again against the artifact the first run wrote.
+#
+#   cd backend && python -m benchmarks.bench_startup
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+STARTUP_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import main
+from models.model_store import load_or_train
+t1 = time.perf_counter()
+load_or_train()
+t2 = time.perf_counter()
+print(f"{t1 - t0:.4f} {t2 - t1:.4f}")
+"""
+
+
+def run_startup(model_dir: str) -> tuple:
+    env = {**os.environ, "MODEL_DIR": model_dir}
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total = time.perf_counter() - start
+    import_s, models_s = (float(v) for v in out.stdout.strip().splitlines()[-1].split())
+    return total, import_s, models_s
+
+
+def main(repeats: int = 3) -> None:
+    print(f"{'run':<28}{'process':>10}{'import':>10}{'models':>10}")
+    with tempfile.TemporaryDirectory() as empty_root:
+        for i in range(repeats):
+            # A fresh directory each time so every "before" run really trains.
+            cold_dir = os.path.join(empty_root, f"cold{i}")
+            total, import_s, models_s = run_startup(cold_dir)
+            print(f"{'before (train on start)':<28}{total:>9.2f}s{import_s:>9.2f}s{models_s:>9.2f}s")
+
+        warm_dir = os.path.join(empty_root, "cold0")
+        for _ in range(repeats):
+            total, import_s, models_s = run_startup(warm_dir)
+            print(f"{'after (load artifact)':<28}{total:>9.2f}s{import_s:>9.2f}s{models_s:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Rows/second of the vectorized synthetic data generator, with the old
+# per-row Python loop as a reference at small sizes.
+#
+#   cd backend && python -m benchmarks.bench_synthetic_data
+
+import time
+
+import numpy as np
+
+from models.advisory_model import CROP_STAGES
+from models.advisory_training import generate_synthetic_data, iter_synthetic_chunks
+
+
+def legacy_generate(n_samples: int) -> list:
+    # The pre-vectorization implementation, minus the DataFrame construction.
+    np.random.seed(42)
+    rows = []
+    for _ in range(n_samples):
+        soil_moisture = np.random.uniform(10, 80)
+        temperature = np.random.uniform(15, 45)
+        np.random.uniform(30, 95)
+        rainfall = np.random.uniform(0, 50)
+        stage_idx = np.random.randint(0, len(CROP_STAGES))
+        days = np.random.randint(0, 15)
+        rows.append((
+            int(soil_moisture < 30 or (temperature > 35 and soil_moisture < 45) or (days > 7 and rainfall < 5)),
+            int(CROP_STAGES[stage_idx] in ["Tillering", "Vegetative", "Jointing"] and days % 3 == 0 and rainfall < 10),
+        ))
+    return rows
+
+
+def rate(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn(n)
+    return n / (time.perf_counter() - start)
+
+
+def stream(n: int) -> None:
+    for _ in iter_synthetic_chunks(n):
+        pass
+
+
+def main() -> None:
+    print(f"{'generator':<26}{'rows':>12}{'rows/s':>16}")
+    for n in (2_000, 20_000):
+        print(f"{'legacy loop':<26}{n:>12,}{rate(legacy_generate, n):>16,.0f}")
+    for n in (2_000, 100_000, 1_000_000, 5_000_000):
+        print(f"{'generate_synthetic_data':<26}{n:>12,}{rate(generate_synthetic_data, n):>16,.0f}")
+    for n in (1_000_000, 10_000_000):
+        print(f"{'iter_synthetic_chunks':<26}{n:>12,}{rate(stream, n):>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Peak server memory under concurrent large uploads to /detect-disease.
+#
+# Starts uvicorn in a subprocess, fires N concurrent multipart uploads of a
+# large JPEG at it and reports the peak RSS (VmHWM) of the server process and
+# of its inference workers. With streaming ingest the server's peak should stay
+# close to its idle footprint instead of growing by N x upload size.
+#
+#   cd backend && python -m benchmarks.bench_upload_rss [--concurrency 50] [--mb 15]
+
+import argparse
+import asyncio
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def vm_hwm_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child_pids(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def make_large_jpeg(path: Path, target_mb: float) -> int:
+    # Noise compresses badly, so a noisy photo-sized image gets us a big file.
+    rng = np.random.default_rng(0)
+    side = 1024
+    while True:
+        pixels = rng.integers(0, 256, (side * 3 // 4, side, 3), dtype=np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(pixels).save(buf, "JPEG", quality=95)
+        if buf.tell() >= target_mb * 1024 * 1024 or side >= 8192:
+            path.write_bytes(buf.getvalue())
+            return buf.tell()
+        side = int(side * 1.4)
+
+
+async def burst(url: str, path: Path, concurrency: int) -> dict:
+    async with httpx.AsyncClient(timeout=300) as client:
+        async def one():
+            with open(path, "rb") as f:
+                res = await client.post(url, files={"image": ("leaf.jpg", f, "image/jpeg")})
+            return res.status_code
+
+        codes = await asyncio.gather(*(one() for _ in range(concurrency)))
+    counts = {}
+    for code in codes:
+        counts[code] = counts.get(code, 0) + 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mb", type=float, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "large.jpg"
+        size = make_large_jpeg(path, args.mb)
+        run(path, size, args.concurrency)
+
+
+def run(path: Path, size: int, concurrency: int) -> None:
+    port = free_port()
+    env = {
+        **os.environ,
+        "MAX_UPLOAD_MB": str(size * 1.2 / 2**20),
+        "DISEASE_MAX_PENDING": str(concurrency),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(600):
+            try:
+                httpx.get(url, timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+
+        idle = vm_hwm_kib(server.pid)
+        start = time.perf_counter()
+        counts = asyncio.run(burst(f"{url}/detect-disease", path, concurrency))
+        elapsed = time.perf_counter() - start
+
+        peak = vm_hwm_kib(server.pid)
+        children = [vm_hwm_kib(pid) for pid in child_pids(server.pid)]
+        print(f"{concurrency} concurrent uploads of {size / 2**20:.1f} MiB in {elapsed:.1f}s -> {counts}")
+        print(f"server peak RSS: idle {idle / 1024:.0f} MiB, after burst {peak / 1024:.0f} MiB "
+              f"(+{(peak - idle) / 1024:.0f} MiB; buffering every upload would need ~{concurrency * size / 2**20:.0f} MiB)")
+        if children:
+            print(f"child process peak RSS (inference workers): max {max(children) / 1024:.0f} MiB")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
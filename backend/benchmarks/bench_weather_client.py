@@ -0,0 +1,130 @@
+# Outbound weather fetching against the local stand-in (weather_standin.py):
+# --requests plot lookups spread over --cells grid cells, each needing today's
+# forecast and the archive since sowing.
+#
+# "direct" makes both calls one after the other per lookup with urllib (a new
+# connection each, no sharing), --concurrency lookups at a time on threads, as
+# the browser does. "pooled" is the server's path, at the same concurrency:
+# WeatherClient for the forecast and a fresh WeatherCache (archive pulls through
+# PooledArchiveSource) on --concurrency threads, side by side, with one
+# keep-alive pool and one pull per cell and range. Reports wall time,
+# per-lookup p50/p99 and how many upstream requests the stand-in served.
+#
+#   cd backend && python -m benchmarks.bench_weather_client [--requests 400] [--cells 20] [--latency-ms 80]
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_upload_rss import BACKEND_DIR, free_port
+from weather_client import PooledArchiveSource, WeatherClient
+from weather_store import OpenMeteoArchiveSource, WeatherCache, open_meteo_query
+
+
+def lookups(n: int, cells: int) -> list:
+    rng = np.random.default_rng(0)
+    centers = np.column_stack([rng.uniform(10, 28, cells), rng.uniform(72, 86, cells)])
+    today = date.today()
+    out = []
+    for _ in range(n):
+        lat, lon = centers[int(rng.integers(cells))] + rng.uniform(-0.04, 0.04, 2)
+        out.append((float(lat), float(lon), today - timedelta(days=int(rng.integers(30, 150))), today))
+    return out
+
+
+def direct(url: str, plots: list, concurrency: int) -> list:
+    def one(plot) -> float:
+        lat, lon, sowing, today = plot
+        start = time.perf_counter()
+        for path, first, last in (("forecast", today, today), ("archive", sowing, today - timedelta(days=2))):
+            query = urllib.parse.urlencode(open_meteo_query(lat, lon, first, last))
+            with urllib.request.urlopen(f"{url}/v1/{path}?{query}", timeout=30) as res:
+                json.load(res)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, plots))
+
+
+async def pooled(url: str, plots: list, concurrency: int) -> list:
+    client = WeatherClient(f"{url}/v1/forecast", f"{url}/v1/archive")
+    archive = OpenMeteoArchiveSource(f"{url}/v1/archive")
+    cache = WeatherCache(PooledArchiveSource(client, asyncio.get_running_loop(), archive), tempfile.mkdtemp())
+    threads = ThreadPoolExecutor(concurrency)
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(plot) -> float:
+        lat, lon, sowing, today = plot
+        async with slots:
+            start = time.perf_counter()
+            await asyncio.gather(
+                client.forecast_day(lat, lon, today),
+                loop.run_in_executor(threads, cache.get_index, lat, lon, sowing, today - timedelta(days=2)),
+            )
+            return time.perf_counter() - start
+
+    try:
+        return await asyncio.gather(*(one(p) for p in plots))
+    finally:
+        threads.shutdown()
+        await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--cells", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--concurrency", type=int, default=16, help="Lookups in flight at once.")
+    args = parser.parse_args()
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "weather_standin", "--port", str(port), "--latency-ms", str(args.latency_ms)],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        for _ in range(600):
+            try:
+                httpx.get(f"{url}/stats", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+
+        plots = lookups(args.requests, args.cells)
+        runs = {
+            "direct": lambda: direct(url, plots, args.concurrency),
+            "pooled": lambda: asyncio.run(pooled(url, plots, args.concurrency)),
+        }
+        for name, run in runs.items():
+            before = httpx.get(f"{url}/stats").json()
+            start = time.perf_counter()
+            latencies = np.array(run()) * 1000
+            elapsed = time.perf_counter() - start
+            after = httpx.get(f"{url}/stats").json()
+            upstream = sum(after[k] - before[k] for k in ("forecast", "archive"))
+            print(
+                f"{name:<8}{args.requests} lookups in {elapsed:>6.2f} s"
+                f"{np.percentile(latencies, 50):>9.1f} ms p50{np.percentile(latencies, 99):>9.1f} ms p99"
+                f"{upstream:>7} upstream requests"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
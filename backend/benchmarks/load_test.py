@@ -0,0 +1,98 @@
+# Mixed-traffic load test: p50/p99 latency per route with the old execution
+# model vs the execution layer.
+#
+# Starts uvicorn in a subprocess per profile and runs closed-loop clients for a
+# fixed duration: some hammer /daily-advisory (forest inference) while others
+# call the light /growth-plan route. "before" runs everything in Starlette's
+# shared threadpool (as the plain `def` routes did); "after" uses the default
+# process pool for inference and the dedicated light thread pool.
+#
+#   cd backend && python -m benchmarks.load_test [--seconds 10] [--advisory-clients 16] [--light-clients 16]
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_advisory_batch import random_rows
+from benchmarks.bench_upload_rss import BACKEND_DIR, free_port
+
+PROFILES = {
+    "before": {"ADVISORY_EXECUTOR": "inline", "LIGHT_EXECUTOR": "inline", "ADVISORY_MAX_PENDING": "100000"},
+    "after": {},
+}
+GROWTH_PLAN = {"crop_type": "wheat", "sowing_date": "2026-01-01", "city": "Pune", "tmax": 30, "tmin": 15}
+
+
+async def client_loop(client: httpx.AsyncClient, route: str, bodies: list, deadline: float, out: dict) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        res = await client.post(route, json=bodies[i % len(bodies)])
+        elapsed = time.perf_counter() - start
+        if res.status_code == 200:
+            out.setdefault(route, []).append(elapsed)
+        else:
+            out.setdefault(f"{route} {res.status_code}", []).append(elapsed)
+        i += 1
+
+
+async def drive(url: str, seconds: float, advisory_clients: int, light_clients: int) -> dict:
+    rows = random_rows(500)
+    out: dict = {}
+    limits = httpx.Limits(max_connections=advisory_clients + light_clients)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(client_loop(client, "/daily-advisory", rows, deadline, out) for _ in range(advisory_clients)),
+            *(client_loop(client, "/growth-plan", [GROWTH_PLAN], deadline, out) for _ in range(light_clients)),
+        )
+    return out
+
+
+def run_profile(name: str, args) -> None:
+    port = free_port()
+    env = {**os.environ, "ROUTE_CONCURRENCY": "/daily-advisory=100000,/growth-plan=100000", **PROFILES[name]}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(600):
+            try:
+                httpx.get(url, timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        results = asyncio.run(drive(url, args.seconds, args.advisory_clients, args.light_clients))
+    finally:
+        server.terminate()
+        server.wait()
+
+    for route, latencies in sorted(results.items()):
+        ms = np.array(latencies) * 1000
+        print(
+            f"{name:<8}{route:<22}{len(ms) / args.seconds:>8.1f} req/s"
+            f"{np.percentile(ms, 50):>10.1f} ms p50{np.percentile(ms, 99):>10.1f} ms p99"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--advisory-clients", type=int, default=16)
+    parser.add_argument("--light-clients", type=int, default=16)
+    parser.add_argument("--profile", choices=list(PROFILES), action="append")
+    args = parser.parse_args()
+    for name in args.profile or list(PROFILES):
+        run_profile(name, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# Benchmark suite over the backend hot paths, with a JSON baseline and a
+# regression check. Runs offline: synthetic data, synthetic leaf images, the
+# fake weather source, and routes driven in-process through Starlette's ASGI
+# test client with inline executors (no sockets, no worker processes).
+#
+# Each case is warmed up, calibrated to run for at least --min-time seconds per
+# repeat, and reported as the median (and min) time per call over --repeats;
+# batched cases also report time per row.
+#
+#   cd backend && python -m benchmarks.suite                      # run and print
+#   cd backend && python -m benchmarks.suite --save benchmarks/baseline.json
+#   cd backend && python -m benchmarks.suite --compare benchmarks/baseline.json [--threshold 0.25]
+#   cd backend && python -m benchmarks.suite --only advisory --only route.
+#
+# --compare exits with status 1 if any case's best repeat is more than
+# --threshold slower than the baseline's. Baselines are only comparable on the same machine;
+# the "machine" block in the JSON records what produced them.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+# Pinned before anything reads them, so every run exercises the same code paths.
+os.environ.update({
+    "ADVISORY_EXECUTOR": "inline",
+    "DISEASE_EXECUTOR": "inline",
+    "LIGHT_EXECUTOR": "inline",
+    "ADVISORY_CACHE_MAX_MB": "0",
+    "DISEASE_CACHE_MAX_MB": "0",
+    "WEATHER_SOURCE": "fake",
+    "WEATHER_CACHE_DIR": tempfile.mkdtemp(prefix="bench-weather-"),
+})
+
+import numpy as np
+
+from benchmarks.bench_advisory_batch import random_rows
+from benchmarks.bench_disease import make_jpegs
+from benchmarks.bench_growth_batch import random_plots
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_THRESHOLD = 0.25
+
+
+class Case:
+    def __init__(self, name: str, setup: Callable[[], Callable[[int], Any]], rows: int, repeats: Optional[int]):
+        self.name = name
+        self.setup = setup
+        self.rows = rows
+        self.repeats = repeats
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, rows: int = 1, repeats: Optional[int] = None):
+    # Registers a setup function returning the callable to time; it gets the
+    # call index so cases can rotate through their inputs.
+    def register(setup):
+        CASES.append(Case(name, setup, rows, repeats))
+        return setup
+    return register
+
+
+def measure(fn: Callable[[int], Any], repeats: int, min_time: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    fn(0)
+    single = time.perf_counter() - start
+    calls = max(1, min(100_000, int(min_time / max(single, 1e-7))))
+    per_call = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        per_call.append((time.perf_counter() - start) / calls)
+    return {"median_s": statistics.median(per_call), "min_s": min(per_call), "calls": calls, "repeats": repeats}
+
+
+# ─── Fixtures ──────────────────────────────────────────────────────────────────
+
+_stack = ExitStack()
+
+
+@lru_cache(maxsize=None)
+def advisory_bundle(backend: str) -> Dict[str, Any]:
+    from models.model_store import load_or_train
+
+    return load_or_train(backend=backend)
+
+
+@lru_cache(maxsize=None)
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    return _stack.enter_context(TestClient(main.app))
+
+
+@lru_cache(maxsize=None)
+def leaf_images() -> list:
+    return make_jpegs(8, 1024)
+
+
+# ─── Cases ─────────────────────────────────────────────────────────────────────
+
+for _n in (2_000, 100_000, 1_000_000):
+    def _synthetic(n=_n):
+        from models.advisory_training import generate_synthetic_data
+
+        return lambda i: generate_synthetic_data(n, seed=i)
+    case(f"synthetic_data[{_n}]", rows=_n, repeats=3)(_synthetic)
+
+
+@case("train_advisory_models", repeats=3)
+def _train():
+    from models.advisory_training import train_advisory_models
+
+    return lambda i: train_advisory_models()
+
+
+for _backend in ("flat", "sklearn"):
+    def _advisory_single(backend=_backend):
+        from models.advisory_model import get_daily_advisory
+
+        bundle, rows = advisory_bundle(backend), random_rows(256)
+        return lambda i: get_daily_advisory(bundle["irr_model"], bundle["fert_model"], **rows[i % 256])
+    case(f"advisory.single[{_backend}]")(_advisory_single)
+
+    def _advisory_batch(backend=_backend):
+        from models.advisory_model import get_daily_advisory_batch
+
+        bundle, rows = advisory_bundle(backend), random_rows(500)
+        return lambda i: get_daily_advisory_batch(bundle["irr_model"], bundle["fert_model"], rows)
+    case(f"advisory.batch500[{_backend}]", rows=500)(_advisory_batch)
+
+
+@case("growth_plan.single")
+def _growth_single():
+    from models.growth_model import get_growth_plan
+
+    plots = random_plots(256)
+    return lambda i: get_growth_plan(**plots[i % 256])
+
+
+@case("growth_plan.batch500", rows=500)
+def _growth_batch():
+    from models.growth_model import get_growth_plan_batch
+
+    plots = random_plots(500)
+    return lambda i: get_growth_plan_batch(plots)
+
+
+@case("season.project[1000 plots]", rows=1000)
+def _season_project():
+    from benchmarks.bench_season_sim import random_located_plots
+    from models.season_sim import project_seasons
+
+    plots = random_located_plots(1000, np.random.default_rng(0))
+    return lambda i: project_seasons(plots)
+
+
+@case("detect_disease[1024px jpeg]")
+def _detect_disease():
+    from models.disease_model import detect_disease
+
+    images = leaf_images()
+    return lambda i: detect_disease(images[i % len(images)])
+
+
+@case("route.daily_advisory")
+def _route_advisory():
+    c, rows = client(), random_rows(256)
+    return lambda i: c.post("/daily-advisory", json=rows[i % 256]).raise_for_status()
+
+
+@case("route.daily_advisory_batch100", rows=100)
+def _route_advisory_batch():
+    c, rows = client(), random_rows(100)
+    return lambda i: c.post("/daily-advisory/batch", json={"rows": rows}).raise_for_status()
+
+
+@case("route.growth_plan")
+def _route_growth():
+    c = client()
+    plots = [{k: v for k, v in p.items() if v is not None} for p in random_plots(256)]
+    return lambda i: c.post("/growth-plan", json=plots[i % 256]).raise_for_status()
+
+
+@case("route.growth_plan_batch100", rows=100)
+def _route_growth_batch():
+    c, plots = client(), random_plots(100)
+    return lambda i: c.post("/growth-plan/batch", json={"plots": plots}).raise_for_status()
+
+
+@case("route.historical_gdd[warm cache]")
+def _route_gdd():
+    c = client()
+    params = {"crop_type": "wheat", "sowing_date": "2026-01-01", "lat": 18.52, "lon": 73.85}
+    return lambda i: c.get("/historical-gdd", params=params).raise_for_status()
+
+
+@case("route.detect_disease")
+def _route_disease():
+    c, images = client(), leaf_images()
+    return lambda i: c.post(
+        "/detect-disease", files={"image": ("leaf.jpg", images[i % len(images)], "image/jpeg")}
+    ).raise_for_status()
+
+
+# ─── Runner ────────────────────────────────────────────────────────────────────
+
+def machine() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scikit-learn": package_version("scikit-learn"),
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def run(selected: List[Case], repeats: int, min_time: float) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for c in selected:
+        result = measure(c.setup(), c.repeats or repeats, min_time)
+        if c.rows > 1:
+            result["rows"] = c.rows
+            result["median_per_row_s"] = result["median_s"] / c.rows
+        results[c.name] = result
+        per_row = f"  ({result['median_per_row_s'] * 1e6:.2f} µs/row)" if c.rows > 1 else ""
+        print(f"{c.name:<36}{format_seconds(result['median_s']):>12}{per_row}", flush=True)
+    return results
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    # -> names of the cases that regressed beyond `threshold`. Compares the best
+    # repeat of each run, which is far less sensitive to scheduler noise than
+    # the median.
+    regressions = []
+    print(f"\n{'case (best of repeats)':<36}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<36}{'-':>12}{format_seconds(result['min_s']):>12}{'new':>9}")
+            continue
+        change = result["min_s"] / before["min_s"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(
+            f"{name:<36}{format_seconds(before['min_s']):>12}{format_seconds(result['min_s']):>12}"
+            f"{change:>+8.0%}{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the backend benchmark suite.")
+    parser.add_argument("--only", action="append", help="Run cases whose name contains this (repeatable).")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat, at least.")
+    parser.add_argument("--save", type=Path, help="Write results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to check against.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, e.g. 0.25 = 25%%.")
+    args = parser.parse_args()
+
+    selected = [c for c in CASES if not args.only or any(s in c.name for s in args.only)]
+    if not selected:
+        sys.exit(f"No cases match {args.only}. Cases: {[c.name for c in CASES]}")
+    try:
+        results = run(selected, args.repeats, args.min_time)
+    finally:
+        _stack.close()
+
+    if args.save:
+        args.save.write_text(json.dumps({"machine": machine(), "results": results}, indent=2) + "\n")
+        print(f"\n✅ Wrote {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        if baseline.get("machine", {}).get("platform") != platform.platform():
+            print(f"⚠️ Baseline was recorded on {baseline.get('machine', {}).get('platform')}; timings may not be comparable.")
+        if regressions:
+            sys.exit(f"\n❌ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: {regressions}")
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# Small result caches shared by the routes.
+#
+# LRUCache is an in-memory LRU bounded by the total (JSON-encoded) size of its
+# values, so a burst of unusually large entries cannot blow past the budget.
+# An optional TTL expires entries lazily on lookup.
+# DiskCache is an optional second tier of one JSON file per key that survives
+# restarts, bounded by total file size. TieredCache checks memory, then disk (promoting hits), and writes
+# through to both. Values must be JSON-serialisable.
+
+
+def _entry_size(key: str, value: Any) -> int:
+    return len(key) + len(json.dumps(value, separators=(",", ":")))
+
+
+class LRUCache:
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._expires: Dict[str, float] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        del self._data[key]
+        self._bytes -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and self._expires[key] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: str, value: Any) -> None:
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes[key]
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            if self.ttl_seconds is not None:
+                self._expires[key] = time.monotonic() + self.ttl_seconds
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "ttl_seconds": self.ttl_seconds,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class DiskCache:
+    # Bounded by `max_bytes` across every process sharing `root`: once this
+    # process's running total passes the cap, the directory is re-measured and
+    # the least recently used files (hits refresh mtime) are removed down to
+    # `trim_to` of the cap.
+    def __init__(self, root: Path, max_bytes: int, trim_to: float = 0.8):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.trim_to = trim_to
+        self._bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        # Fan out on the key prefix so no single directory gets huge.
+        return self.root / key[:2] / f"{key}.json"
+
+    def _files(self) -> list:
+        # -> [(mtime, size, path)] for every cached entry.
+        files = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _trim(self) -> None:
+        # Caller holds the lock.
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        if total > self.max_bytes:
+            for _, size, path in files:
+                if total <= self.max_bytes * self.trim_to:
+                    break
+                try:
+                    path.unlink()
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+        self._bytes = total
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        data = json.dumps(value)
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._bytes is None:
+                self._trim()
+            else:
+                self._bytes += len(data)
+                if self._bytes > self.max_bytes:
+                    self._trim()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class TieredCache:
+    def __init__(self, memory: LRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
@@ -0,0 +1,175 @@
+from itertools import product
+from string import Formatter
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from json_fragments import json_escape
+from translations import (
+    ADVISORY_MESSAGES,
+    DISEASE_DB_TRANS,
+    FERTILIZER_WINDOWS,
+    RISK_ALERTS,
+)
+
+# Translations compiled once at import into per-language bundles.
+#
+# Request handlers do a single dict lookup for the language and then read
+# ready-made sentences: anything without a placeholder (or whose placeholder
+# only ranges over a fixed set, like stage names) is rendered here, and the
+# rest are bound `str.format` methods. Every language is validated against
+# "en" up front, so a missing key or placeholder fails at startup instead of
+# rendering an empty string for some farmer. Adding a language is just another
+# entry in translations.py.
+#
+# For the JSON fast path, every constant sentence also exists pre-escaped as a
+# JSON string fragment, so a response is assembled by concatenation without
+# re-escaping the same text on every request.
+
+DEFAULT_LANG = "en"
+
+# Advisory fertilizer sentence per crop stage; other stages use fert_default.
+FERT_STAGE_KEYS = {
+    "Tillering": "fert_tillering",
+    "Vegetative": "fert_vegetative",
+    "Jointing": "fert_jointing",
+    "Flowering": "fert_flowering",
+}
+
+SOURCES = {
+    "advisory": ADVISORY_MESSAGES,
+    "fertilizer_windows": FERTILIZER_WINDOWS,
+    "risk_alerts": RISK_ALERTS,
+    "disease": DISEASE_DB_TRANS,
+}
+
+
+class CatalogError(ValueError):
+    pass
+
+
+def _split_template(template: str, field: str) -> Tuple[str, str]:
+    # "Moisture ({soil_moisture}%)." -> ("Moisture (", "%).")
+    parts = list(Formatter().parse(template))
+    fields = [(name, spec, conversion) for _, name, spec, conversion in parts if name is not None]
+    if fields != [(field, "", None)]:
+        raise CatalogError(f"Expected exactly one plain {{{field}}} in {template!r}.")
+    prefix = parts[0][0]
+    suffix = "".join(literal for literal, *_ in parts[1:])
+    return prefix, suffix
+
+
+def _flatten(value: Any, prefix: Tuple[str, ...] = ()) -> Dict[Tuple[str, ...], str]:
+    if isinstance(value, dict):
+        flat = {}
+        for key, sub in value.items():
+            flat.update(_flatten(sub, prefix + (key,)))
+        return flat
+    return {prefix: value}
+
+
+def _placeholders(template: str) -> Set[str]:
+    return {field for _, field, _, _ in Formatter().parse(template) if field}
+
+
+def validate_catalog() -> List[str]:
+    languages = list(ADVISORY_MESSAGES)
+    problems = []
+    for source_name, source in SOURCES.items():
+        reference = _flatten(source[DEFAULT_LANG])
+        for lang in source:
+            if lang not in languages:
+                problems.append(f"{source_name}: language '{lang}' has no advisory messages")
+        for lang in languages:
+            if lang not in source:
+                problems.append(f"{source_name}: language '{lang}' is missing entirely")
+                continue
+            entries = _flatten(source[lang])
+            for path, text in reference.items():
+                key = ".".join((source_name, lang) + path)
+                if path not in entries:
+                    problems.append(f"{key}: missing")
+                elif _placeholders(entries[path]) != _placeholders(text):
+                    problems.append(
+                        f"{key}: placeholders {sorted(_placeholders(entries[path]))} "
+                        f"!= {sorted(_placeholders(text))} in '{DEFAULT_LANG}'"
+                    )
+    return problems
+
+
+class LanguageBundle:
+    def __init__(self, lang: str):
+        self.lang = lang
+        adv = ADVISORY_MESSAGES[lang]
+        fert = FERTILIZER_WINDOWS[lang]
+        risk = RISK_ALERTS[lang]
+
+        # Daily advisory
+        self.fert_default_sentence = adv["fert_required_prefix"] + adv["fert_default"]
+        self.fert_sentences = {
+            stage: adv["fert_required_prefix"] + adv[key] for stage, key in FERT_STAGE_KEYS.items()
+        }
+        self.fert_not_needed = adv["fert_not_needed"]
+        self.heat_alert = adv["heat_alert"]
+        self.humidity_alert = adv["humidity_alert"]
+        # The irrigation sentence split around {soil_moisture}, plain and
+        # JSON-escaped, keyed by message name.
+        self.irrigation_parts = {
+            key: _split_template(adv[key], "soil_moisture")
+            for key in ("urgent_irrigation", "irrigation_needed", "irrigation_ok")
+        }
+        self.irrigation_parts_json = {
+            key: (json_escape(prefix), json_escape(suffix)) for key, (prefix, suffix) in self.irrigation_parts.items()
+        }
+        # Everything after the irrigation sentence, for each (stage with its own
+        # fertilizer sentence or None, fertilizer, heat alert, humidity alert).
+        self.advisory_tails: Dict[Tuple[Optional[str], bool, bool, bool], str] = {}
+        flags = (False, True)
+        for stage, fert_needed, heat, humid in product(list(FERT_STAGE_KEYS) + [None], flags, flags, flags):
+            parts = [self.fert_sentences.get(stage, self.fert_default_sentence) if fert_needed else self.fert_not_needed]
+            if heat:
+                parts.append(self.heat_alert)
+            if humid:
+                parts.append(self.humidity_alert)
+            self.advisory_tails[(stage, fert_needed, heat, humid)] = " " + " ".join(parts)
+        self.advisory_tails_json = {key: json_escape(text) for key, text in self.advisory_tails.items()}
+
+        # Growth plan
+        self.fert_window_default = fert["default"]
+        self.fert_windows = {stage: text for stage, text in fert.items() if stage != "default"}
+        self.heat_stress = risk["heat_stress"]
+        self.warmer_season = risk["warmer_season"]
+        self.normal = risk["normal"]
+        self._temp_threshold = risk["temp_threshold"].format
+        self.temp_threshold = {stage: self._temp_threshold(stage=stage) for stage in self.fert_windows}
+
+        # Disease detection
+        self.disease = DISEASE_DB_TRANS[lang]
+
+    def fert_sentence(self, crop_stage: str) -> str:
+        return self.fert_sentences.get(crop_stage, self.fert_default_sentence)
+
+    def advisory_tail_key(self, crop_stage: str, fert: bool, heat: bool, humid: bool) -> tuple:
+        return (crop_stage if crop_stage in self.fert_sentences else None, fert, heat, humid)
+
+    def fert_window(self, stage: str) -> str:
+        return self.fert_windows.get(stage, self.fert_window_default)
+
+    def temp_threshold_alert(self, stage: str) -> str:
+        sentence = self.temp_threshold.get(stage)
+        return sentence if sentence is not None else self._temp_threshold(stage=stage)
+
+
+def compile_catalog() -> Dict[str, LanguageBundle]:
+    problems = validate_catalog()
+    if problems:
+        raise CatalogError("Translation catalog is incomplete:\n  " + "\n  ".join(problems))
+    return {lang: LanguageBundle(lang) for lang in ADVISORY_MESSAGES}
+
+
+CATALOG = compile_catalog()
+SUPPORTED_LANGS = list(CATALOG)
+
+
+def get_bundle(lang: str) -> LanguageBundle:
+    # Unknown languages fall back to English, as the per-model checks used to.
+    bundle = CATALOG.get(lang)
+    return bundle if bundle is not None else CATALOG[DEFAULT_LANG]
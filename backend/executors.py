@@ -0,0 +1,298 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+
+# Execution layer: one bounded executor per workload class.
+#
+# CPU-heavy work (image decoding, model inference) runs in worker processes so
+# it never blocks the event loop or fights the request threads for the GIL;
+# light routes get their own small thread pool instead of sharing Starlette's.
+# Each pool admits at most `max_pending` jobs (running + queued); beyond that,
+# callers get PoolSaturated straight away and the route answers 503 instead of
+# letting the backlog and latency grow without bound. On top of that,
+# ConcurrencyLimitMiddleware caps in-flight requests per route.
+
+EXECUTOR_KINDS = ["process", "thread", "inline"]
+# Recent latencies kept per pool/route for percentiles.
+LATENCY_WINDOW = 2048
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class LatencyWindow:
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._values: deque = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._values.append(seconds)
+
+    def percentiles(self) -> Dict[str, float]:
+        values = sorted(self._values)
+        if not values:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "p50_ms": round(values[len(values) // 2] * 1000, 2),
+            "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+
+
+def _timed_call(fn: Callable, *args) -> tuple:
+    # Runs in the worker; wall-clock stamps let the caller split queue wait from run time.
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time(), None
+
+
+def _timed_call_remote(fn: Callable, *args) -> tuple:
+    # Worker processes keep their own metrics registry: ship back what this job
+    # recorded so the parent's /metrics includes it.
+    result, started, finished, _ = _timed_call(fn, *args)
+    return result, started, finished, metrics.REGISTRY.drain()
+
+
+class BoundedPool:
+    kind = "inline"
+    _call = staticmethod(_timed_call)
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_pending: int,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait = LatencyWindow()
+        self.run_time = LatencyWindow()
+
+    def _make_executor(self) -> Optional[Executor]:
+        return None
+
+    def _get_executor(self) -> Optional[Executor]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._make_executor()
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated ({self._pending} jobs pending).")
+            self._pending += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def is_saturated(self) -> bool:
+        # Cheap pre-check so routes can refuse work before doing any I/O for it;
+        # run() still enforces the limit.
+        with self._lock:
+            return self._pending >= self.max_pending
+
+    async def _submit(self, fn: Callable, *args) -> Any:
+        executor = self._get_executor()
+        if executor is None:
+            # Inline: Starlette's shared threadpool, as plain `def` routes use.
+            return await run_in_threadpool(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, fn, *args)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        self._acquire()
+        try:
+            submitted = time.time()
+            result, started, finished, recorded = await self._submit(self._call, fn, *args)
+            waited = max(started - submitted, 0.0)
+            self.queue_wait.add(waited)
+            self.run_time.add(finished - started)
+            if metrics.ENABLED:
+                metrics.REGISTRY.merge(recorded)
+                metrics.observe("executor_queue_wait_seconds", waited, pool=self.name)
+                metrics.observe("executor_run_seconds", finished - started, pool=self.name)
+            return result
+        finally:
+            self._release()
+
+    def warm_up(self) -> None:
+        # Inline pools run the initializer once, in this process.
+        if self.initializer is not None:
+            self.initializer()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "peak_pending": self.peak_pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait": self.queue_wait.percentiles(),
+                "run_time": self.run_time.percentiles(),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class BoundedProcessPool(BoundedPool):
+    kind = "process"
+    _call = staticmethod(_timed_call_remote)
+
+    def _make_executor(self) -> Executor:
+        # spawn, not fork: the parent runs threads (uvicorn, the threadpool)
+        # and forking those is unsafe.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+        )
+
+    def warm_up(self) -> None:
+        # Starts the workers (and runs their initializer) ahead of the first request.
+        executor = self._get_executor()
+        for future in [executor.submit(os.getpid) for _ in range(self.max_workers)]:
+            future.result()
+
+
+class BoundedThreadPool(BoundedPool):
+    kind = "thread"
+
+    def _make_executor(self) -> Executor:
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=self.name,
+            initializer=self.initializer,
+        )
+
+    def warm_up(self) -> None:
+        # Threads start lazily; run the initializer here so the first request
+        # does not pay for it (initializers must be idempotent).
+        self._get_executor()
+        if self.initializer is not None:
+            self.initializer()
+
+
+def build_pool(
+    kind: str,
+    name: str,
+    max_workers: int,
+    max_pending: int,
+    initializer: Optional[Callable[[], None]] = None,
+) -> BoundedPool:
+    pools = {"process": BoundedProcessPool, "thread": BoundedThreadPool, "inline": BoundedPool}
+    if kind not in pools:
+        raise ValueError(f"Unknown executor kind '{kind}' for {name}. Use one of {EXECUTOR_KINDS}.")
+    return pools[kind](name, max_workers=max_workers, max_pending=max_pending, initializer=initializer)
+
+
+def parse_limits(spec: Optional[str]) -> Dict[str, int]:
+    # "/daily-advisory=64,/growth-plan=32" -> {"/daily-advisory": 64, "/growth-plan": 32}
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        path, _, value = item.partition("=")
+        limits[path.strip()] = int(value)
+    return limits
+
+
+class RouteLimit:
+    def __init__(self, path: str, limit: int):
+        self.path = path
+        self.limit = limit
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency = LatencyWindow()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency": self.latency.percentiles(),
+        }
+
+
+class ConcurrencyLimitMiddleware:
+    # Plain ASGI middleware: requests to a limited path beyond its limit get 503
+    # before the route (or body parsing) runs. Streaming responses hold their
+    # slot until the last chunk is sent. Runs on the event loop, so the
+    # counters need no lock.
+    def __init__(self, app, limits: Dict[str, RouteLimit]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        route = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+        if route.in_flight >= route.limit:
+            route.rejected += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server busy. Please retry shortly."}'})
+            return
+        route.in_flight += 1
+        route.peak_in_flight = max(route.peak_in_flight, route.in_flight)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route.in_flight -= 1
+            route.completed += 1
+            route.latency.add(time.perf_counter() - started)
+
+
+def pool_from_env(
+    workload: str,
+    default_kind: str,
+    default_workers: int,
+    pending_per_worker: int,
+    initializer: Optional[Callable[[], None]] = None,
+) -> BoundedPool:
+    # <WORKLOAD>_EXECUTOR (process/thread/inline), <WORKLOAD>_WORKERS, <WORKLOAD>_MAX_PENDING
+    prefix = workload.upper()
+    workers = int(os.getenv(f"{prefix}_WORKERS", str(default_workers)))
+    return build_pool(
+        os.getenv(f"{prefix}_EXECUTOR", default_kind),
+        workload,
+        max_workers=workers,
+        max_pending=int(os.getenv(f"{prefix}_MAX_PENDING", str(workers * pending_per_worker))),
+        initializer=initializer,
+    )
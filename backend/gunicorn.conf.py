@@ -0,0 +1,30 @@
+import gc
+import os
+
+# Pre-fork multi-worker serving:
+#
+#   cd backend && gunicorn -c gunicorn.conf.py main:app
+#
+# The master imports the app with PRELOAD_MODELS=1, so the advisory forests and
+# the disease classifier are loaded (and trained, if the artifact is missing)
+# exactly once, before forking. Workers inherit those arrays copy-on-write and
+# never write to them, and the flat advisory backend maps its arrays from the
+# page cache, so per-worker memory stays flat as WEB_CONCURRENCY grows.
+# Inference runs inline in each worker: the web workers themselves are the
+# process pool, so they do not spawn pools of their own.
+
+os.environ.setdefault("PRELOAD_MODELS", "1")
+os.environ.setdefault("ADVISORY_EXECUTOR", "inline")
+os.environ.setdefault("DISEASE_EXECUTOR", "inline")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the GC's reach; otherwise the first
+    # collection in each worker touches every object header and un-shares the pages.
+    gc.freeze()
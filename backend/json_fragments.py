@@ -0,0 +1,28 @@
+from functools import lru_cache
+from json.encoder import encode_basestring
+
+# Helpers for building JSON responses by concatenation, for the routes that
+# skip FastAPI's generic encoder. Output matches what the generic path writes
+# (json.dumps with ensure_ascii=False, allow_nan=False, compact separators), so
+# clients cannot tell the two apart.
+
+# Quoted JSON string for arbitrary (e.g. request) text.
+encode_string = encode_basestring
+
+
+def json_escape(text: str) -> str:
+    # The body of a JSON string, without the quotes.
+    return encode_basestring(text)[1:-1]
+
+
+@lru_cache(maxsize=4096)
+def json_constant(text: str) -> str:
+    # Quoted JSON string for text from the catalog or the crop tables, encoded
+    # once. Only call it with such constants, never with request data.
+    return encode_basestring(text)
+
+
+def json_number(value: float) -> str:
+    if value - value != 0:
+        raise ValueError("Out of range float values are not JSON compliant")
+    return repr(value)
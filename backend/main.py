@@ -1,23 +1,206 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Tuple
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
 import uvicorn
+import asyncio
+import hmac
+import json
+import math
+import numpy as np
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from models.growth_model import get_growth_plan
-from models.advisory_model import train_advisory_models, get_daily_advisory
-from models.disease_model import detect_disease
+from models.growth_model import BASE_TEMPS, STAGE_BASES, get_growth_plan_batch, get_growth_plan_json, parse_date
+from models.advisory_model import render_advisory_json
+from models.advisory_worker import (
+    init_worker as init_advisory_worker, predict_advisory_json, predict_advisory_parts, use_version,
+)
+from models.disease_model import render_disease_result
+from models.disease_classifier import (
+    InvalidImageError,
+    classify_image,
+    init_worker as init_disease_worker,
+    load_or_train_classifier,
+    model_fingerprint as disease_model_fingerprint,
+)
+from models.model_store import ActiveModel, ensure_artifact, rollback
+from models.retraining import RetrainBusy, RetrainJob
+from models.precompute import advisory_row, encode_plan, plan_plots
+from models.season_sim import (
+    CLIMATE_YEARS,
+    FORECAST_DAYS,
+    HORIZON_DAYS,
+    MAX_SEASON_DAYS,
+    SCENARIO_MODES,
+    forecast_mean,
+    project_seasons,
+)
+from weather_client import PooledArchiveSource, WeatherClient
+from weather_store import WeatherSourceError, cell_key, get_weather_cache, grid_cell, historical_gdd, historical_gdd_many
+from executors import (
+    ConcurrencyLimitMiddleware,
+    PoolSaturated,
+    RouteLimit,
+    parse_limits,
+    pool_from_env,
+)
+from uploads import MAX_UPLOAD_BYTES, UploadError, discard_upload, stream_image_upload
+from cache import DiskCache, LRUCache, TieredCache
+from advisory_cache import build_advisory_memo
+from catalog import SUPPORTED_LANGS, get_bundle
+from json_fragments import encode_string
+from metrics import ENABLED as METRICS_ENABLED, REGISTRY, MetricsMiddleware, span
+from plot_store import PlotStore
+from singleflight import FlightTimeout, SingleFlight
+
+# ─── Execution Layer ───────────────────────────────────────────────────────────
+# One bounded pool per workload class (see executors.py). Each is configured by
+# <WORKLOAD>_EXECUTOR (process/thread/inline), <WORKLOAD>_WORKERS and
+# <WORKLOAD>_MAX_PENDING.
+CPU_COUNT = os.cpu_count() or 1
+disease_pool = pool_from_env("disease", "process", CPU_COUNT, 4, initializer=init_disease_worker)
+advisory_pool = pool_from_env("advisory", "process", CPU_COUNT, 8, initializer=init_advisory_worker)
+light_pool = pool_from_env("light", "thread", 8, 32)
+POOLS = [disease_pool, advisory_pool, light_pool]
+
+# Pre-fork mode (gunicorn.conf.py): load every model at import, in the master,
+# so forked web workers share the arrays copy-on-write instead of each loading
+# (or training) its own copy. Pair with inline executors.
+if os.getenv("PRELOAD_MODELS") == "1":
+    ensure_artifact()
+    init_advisory_worker()
+    init_disease_worker()
+
+# In-flight requests allowed per route; override with e.g.
+# ROUTE_CONCURRENCY="/daily-advisory=128,/growth-plan/batch=2"
+ROUTE_CONCURRENCY = {
+    "/growth-plan": 64,
+    "/growth-plan/batch": 4,
+    "/growth-plan/projection": 4,
+    "/historical-gdd": 32,
+    "/daily-advisory": 64,
+    "/daily-advisory/batch": 8,
+    "/detect-disease": 32,
+    **parse_limits(os.getenv("ROUTE_CONCURRENCY")),
+}
+route_limits = {path: RouteLimit(path, limit) for path, limit in ROUTE_CONCURRENCY.items()}
+
+# Predictions keyed by image sha256 + classifier fingerprint. Stored without
+# translations, so one entry serves every language. The disk tier does file
+# I/O, so lookups and writes go through the light pool when it is enabled.
+DISEASE_CACHE_DIR = os.getenv("DISEASE_CACHE_DIR")
+disease_cache = TieredCache(
+    LRUCache(max_bytes=int(float(os.getenv("DISEASE_CACHE_MAX_MB", "4")) * 1024 * 1024)),
+    DiskCache(
+        DISEASE_CACHE_DIR, max_bytes=int(float(os.getenv("DISEASE_CACHE_DISK_MAX_MB", "256")) * 1024 * 1024)
+    ) if DISEASE_CACHE_DIR else None,
+)
+disease_model_version = None
+
+# Identical requests in flight at the same moment (a village opening the app at
+# 6 AM) share one computation; see singleflight.py.
+flights = {name: SingleFlight(name) for name in ("growth_plan", "historical_gdd", "advisory")}
+
+# Outbound weather calls share one pooled async client (see weather_client.py);
+# created in the lifespan, and only when weather comes from Open-Meteo (or the
+# local stand-in).
+WEATHER_SOURCE = os.getenv("WEATHER_SOURCE", "open-meteo")
+weather_client: Optional[WeatherClient] = None
+
+# Optional memo of advisory responses over quantized inputs (see advisory_cache.py).
+advisory_memo = build_advisory_memo()
+
+# The advisory version being served, following the manifest pointer that
+# retraining promotes and rollback re-points (see models/model_store.py). A
+# new version is loaded here first, so one that cannot be served is never
+# switched to; pool workers then load it on their first job for it. The
+# pointer is polled and loaded off the event loop (watch_advisory_model);
+# requests only read active_advisory.version.
+active_advisory = ActiveModel(activate=use_version)
+retrain_job = RetrainJob()
+retrain_watchers = set()
+
+# Registered plots and their nightly precomputed results (see plot_store.py).
+# With PRECOMPUTE_AT="HH:MM" (server local time) the server starts the nightly
+# job itself; otherwise run `python -m models.precompute` from cron.
+plot_store = PlotStore()
+PRECOMPUTE_AT = os.getenv("PRECOMPUTE_AT")
+
+
+async def watch_advisory_model() -> None:
+    while True:
+        await asyncio.sleep(active_advisory.poll_seconds)
+        await asyncio.to_thread(active_advisory.refresh)
+
+
+async def run_advisory(rows: List[dict], lang: str) -> tuple:
+    # -> (model version, one encoded JSON object per row). The version is
+    # fixed when the request is dispatched, so a swap mid-request cannot mix
+    # versions.
+    version = active_advisory.version
+    if advisory_memo is None:
+        return version, await advisory_pool.run(predict_advisory_json, rows, lang, version)
+    # The memo holds predictions made on snapped readings; the text is always
+    # rendered from the readings as sent.
+    keys, predictions, missed = advisory_memo.prepare(rows, version)
+    if missed:
+        computed = await advisory_pool.run(predict_advisory_parts, list(missed.values()), version)
+        predictions = advisory_memo.complete(keys, predictions, missed, computed)
+    return version, render_advisory_json(rows, predictions, lang)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("🌱 Loading models...")
+    # Build missing or stale artifacts here, so workers only ever load them.
+    global disease_model_version, weather_client
+    ensure_artifact()
+    active_advisory.refresh()
+    load_or_train_classifier()
+    disease_model_version = disease_model_fingerprint()
+    for pool in POOLS:
+        pool.warm_up()
+    weather_cache = get_weather_cache()
+    direct_source = weather_cache.source
+    if WEATHER_SOURCE == "open-meteo":
+        weather_client = WeatherClient()
+        weather_cache.source = PooledArchiveSource(weather_client, asyncio.get_running_loop(), direct_source)
+    scheduler = asyncio.create_task(schedule_precompute(PRECOMPUTE_AT)) if PRECOMPUTE_AT else None
+    watcher = asyncio.create_task(watch_advisory_model())
+    print("✅ Models ready.")
+    yield
+    watcher.cancel()
+    if scheduler is not None:
+        scheduler.cancel()
+    for pool in POOLS:
+        pool.shutdown()
+    if weather_client is not None:
+        weather_cache.source = direct_source
+        await weather_client.aclose()
+        weather_client = None
+
 
 app = FastAPI(
     title="KrishiAI - Crop Monitoring & Advisory Platform",
     description="AI-powered crop monitoring, growth planning, and disease detection for Indian farmers.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Added first so it sits inside CORS and its 503s still carry CORS headers.
+app.add_middleware(ConcurrencyLimitMiddleware, limits=route_limits)
+# Outside the limiter, so shed requests show up in the latency histograms too.
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, paths=route_limits)
+
 origins = os.getenv("CORS_ORIGINS", "*").split(",")
 
 app.add_middleware(
@@ -28,11 +211,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Train models at startup
-print("🌱 Training advisory models on synthetic agronomic data...")
-irr_model, fert_model = train_advisory_models()
-print("✅ Advisory models ready.")
 
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy. Please retry shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(FlightTimeout)
+async def flight_timeout_handler(request: Request, exc: FlightTimeout):
+    return JSONResponse(status_code=504, content={"detail": "Timed out waiting for the result. Please retry."})
 
 # ─── Request Schemas ───────────────────────────────────────────────────────────
 
@@ -40,11 +230,21 @@ class GrowthPlanRequest(BaseModel):
     crop_type: str
     sowing_date: str  # YYYY-MM-DD
     city: str
-    tmax: float
-    tmin: float
+    tmax: Optional[float] = None  # left out: today's forecast for lat/lon
+    tmin: Optional[float] = None
     accumulated_gdd: Optional[float] = None  # if provided by frontend, skip estimation
     lat: Optional[float] = None
     lon: Optional[float] = None
+    stage_basis: str = "days"  # "days" since sowing, or "gdd" (accumulated thermal time)
+
+
+class GrowthPlanBatchRequest(BaseModel):
+    plots: List[GrowthPlanRequest]
+
+
+GROWTH_PLAN_BATCH_MAX = int(os.getenv("GROWTH_PLAN_BATCH_MAX", "5000"))
+# Plots computed (and flushed to the client) per NDJSON chunk.
+GROWTH_PLAN_STREAM_CHUNK = 500
 
 
 class DailyAdvisoryRequest(BaseModel):
@@ -56,6 +256,81 @@ class DailyAdvisoryRequest(BaseModel):
     days_since_last_irrigation: int
 
 
+class DailyAdvisoryBatchRequest(BaseModel):
+    rows: List[DailyAdvisoryRequest]
+
+
+ADVISORY_BATCH_MAX = int(os.getenv("ADVISORY_BATCH_MAX", "5000"))
+
+
+class SeasonPlot(BaseModel):
+    crop_type: str
+    sowing_date: str  # YYYY-MM-DD
+    lat: float
+    lon: float
+
+
+class SeasonProjectionRequest(BaseModel):
+    plots: List[SeasonPlot]
+    scenarios: str = "analog"  # each past year as a member, or "percentiles" of them
+    percentiles: List[float] = [10, 50, 90]
+    horizon_days: int = HORIZON_DAYS
+
+
+SEASON_PROJECTION_MAX = int(os.getenv("SEASON_PROJECTION_MAX", "5000"))
+
+
+# ─── Response Schemas ──────────────────────────────────────────────────────────
+# The advisory and growth-plan routes answer with JSON assembled from
+# pre-encoded fragments (see json_fragments.py); these models document the
+# shape in OpenAPI but are not used to validate or re-serialize it.
+
+class AdvisoryResult(BaseModel):
+    irrigation_required: bool
+    fertilizer_required: bool
+    irrigation_confidence: float
+    fertilizer_confidence: float
+    recommendation_text: str
+
+
+class DailyAdvisoryResponse(AdvisoryResult):
+    model_version: str
+
+
+class DailyAdvisoryBatchResponse(BaseModel):
+    count: int
+    model_version: str
+    results: List[AdvisoryResult]
+
+
+class StageWindow(BaseModel):
+    name: str
+    start_day: int
+    end_day: int
+
+
+class GrowthPlanResponse(BaseModel):
+    crop_type: str
+    city: str
+    current_stage: str
+    days_since_sowing: int
+    accumulated_gdd: float
+    daily_gdd: float
+    next_irrigation_in_days: int
+    fertilizer_recommendation: str
+    risk_alert: str
+    all_stages: List[StageWindow]
+
+
+def json_body(content: str) -> Response:
+    return Response(content=content, media_type="application/json")
+
+
+def with_model_version(advisory: str, version: str) -> str:
+    # Adds "model_version" to an encoded advisory object.
+    return advisory[:-1] + ',"model_version":' + encode_string(version) + "}"
+
+
 # ─── Routes ────────────────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -63,74 +338,659 @@ def root():
     return {
         "status": "running",
         "platform": "KrishiAI Crop Monitoring Platform",
-        "endpoints": ["/growth-plan", "/daily-advisory", "/detect-disease"],
+        "endpoints": [
+            "/growth-plan", "/growth-plan/batch", "/growth-plan/projection", "/historical-gdd", "/daily-advisory", "/daily-advisory/batch",
+            "/detect-disease", "/plots/{plot_id}",
+        ],
     }
 
 
-@app.post("/growth-plan")
-def growth_plan(req: GrowthPlanRequest, lang: str = "en"):
-    supported_crops = ["wheat", "rice", "jowar", "maize"]
-    if req.crop_type.lower() not in supported_crops:
+SUPPORTED_CROPS = ["wheat", "rice", "jowar", "maize"]
+
+
+def validate_crop(crop_type: str) -> None:
+    if crop_type.lower() not in SUPPORTED_CROPS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported crop. Supported: {supported_crops}",
+            detail=f"Unsupported crop. Supported: {SUPPORTED_CROPS}",
         )
-    if req.tmax <= req.tmin:
-        raise HTTPException(status_code=400, detail="tmax must be greater than tmin.")
 
+
+def parse_sowing_date(sowing_date: str):
     try:
-        result = get_growth_plan(
-            crop_type=req.crop_type,
-            sowing_date=req.sowing_date,
-            city=req.city,
-            tmax=req.tmax,
-            tmin=req.tmin,
-            accumulated_gdd=req.accumulated_gdd,
-            lang=lang,
-        )
+        return parse_date(sowing_date)
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid date format or value. Please use YYYY-MM-DD. Error: {str(e)}",
         )
-    return result
 
 
-@app.post("/daily-advisory")
-def daily_advisory(req: DailyAdvisoryRequest, lang: str = "en"):
+@app.get("/historical-gdd")
+async def historical_gdd_endpoint(crop_type: str, sowing_date: str, lat: float, lon: float):
+    validate_crop(crop_type)
+    sow_dt = parse_sowing_date(sowing_date)
+    base_temp = BASE_TEMPS[crop_type.lower()]
+    # The result depends on the weather grid cell, not the exact coordinates.
+    key = (grid_cell(lat, lon), sow_dt, base_temp)
+    try:
+        return await flights["historical_gdd"].run(
+            key, lambda: light_pool.run(historical_gdd, lat, lon, sow_dt, base_temp)
+        )
+    except WeatherSourceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+def growth_plan_errors(req: GrowthPlanRequest) -> List[str]:
+    errors = []
+    if req.crop_type.lower() not in SUPPORTED_CROPS:
+        errors.append(f"Unsupported crop. Supported: {SUPPORTED_CROPS}")
+    if req.tmax is None or req.tmin is None:
+        if req.lat is None or req.lon is None:
+            errors.append("Give tmax and tmin, or lat and lon to use today's forecast.")
+    elif req.tmax <= req.tmin:
+        errors.append("tmax must be greater than tmin.")
+    if req.stage_basis not in STAGE_BASES:
+        errors.append(f"stage_basis must be one of {STAGE_BASES}.")
+    try:
+        parse_date(req.sowing_date)
+    except ValueError as e:
+        errors.append(f"Invalid date format or value. Please use YYYY-MM-DD. Error: {str(e)}")
+    return errors
+
+
+def resolve_accumulated_gdd(req: GrowthPlanRequest) -> Optional[float]:
+    accumulated_gdd = req.accumulated_gdd
+    if accumulated_gdd is None and req.lat is not None and req.lon is not None:
+        sow_dt = parse_date(req.sowing_date)
+        try:
+            hist = historical_gdd(req.lat, req.lon, sow_dt, BASE_TEMPS[req.crop_type.lower()])
+            accumulated_gdd = hist["accumulated_gdd"]
+        except WeatherSourceError as e:
+            # Fall back to the tmax/tmin estimate rather than failing the plan.
+            print(f"⚠️ Historical GDD unavailable, estimating instead: {e}")
+    return accumulated_gdd
+
+
+def render_growth_plan(req: GrowthPlanRequest, lang: str, accumulated_gdd: Optional[float]) -> str:
+    return get_growth_plan_json(
+        crop_type=req.crop_type,
+        sowing_date=req.sowing_date,
+        city=req.city,
+        tmax=req.tmax,
+        tmin=req.tmin,
+        accumulated_gdd=accumulated_gdd,
+        lang=lang,
+        stage_basis=req.stage_basis,
+    )
+
+
+def build_growth_plan(req: GrowthPlanRequest, lang: str) -> str:
+    return render_growth_plan(req, lang, resolve_accumulated_gdd(req))
+
+
+async def todays_temperatures(lat: float, lon: float) -> Tuple[float, float]:
+    # Forecast tmax, tmin for today: from the pooled client when weather comes
+    # from Open-Meteo, else straight from the configured source.
+    if weather_client is not None:
+        return await weather_client.forecast_day(lat, lon, date.today())
+    tmax, tmin = await light_pool.run(get_weather_cache().source.fetch_daily, lat, lon, date.today(), date.today())
+    if math.isnan(tmax[0]) or math.isnan(tmin[0]):
+        raise WeatherSourceError("No forecast available for this location.")
+    return round(float(tmax[0]), 1), round(float(tmin[0]), 1)
+
+
+async def season_forecast(lat: float, lon: float, today: date) -> Optional[np.ndarray]:
+    # Daily mean forecast from today for project_seasons, or None (climatology
+    # only) when the forecast is unavailable.
+    end = today + timedelta(days=FORECAST_DAYS - 1)
+    try:
+        if weather_client is not None:
+            tmax, tmin = await weather_client.forecast_range(lat, lon, today, end)
+        else:
+            tmax, tmin = await light_pool.run(get_weather_cache().source.fetch_daily, lat, lon, today, end)
+    except WeatherSourceError as e:
+        print(f"⚠️ Forecast unavailable, projecting on climatology only: {e}")
+        return None
+    return forecast_mean(tmax, tmin)
+
+
+async def plan_with_weather(req: GrowthPlanRequest, lang: str) -> str:
+    # May fetch weather, so the work runs on the light pool, not the loop.
+    if req.tmax is not None and req.tmin is not None:
+        return await light_pool.run(build_growth_plan, req, lang)
+    # Today's forecast and the archive GDD come from separate upstream calls;
+    # make them side by side.
+    (tmax, tmin), accumulated_gdd = await asyncio.gather(
+        todays_temperatures(req.lat, req.lon), light_pool.run(resolve_accumulated_gdd, req)
+    )
+    return await light_pool.run(
+        render_growth_plan, req.model_copy(update={"tmax": tmax, "tmin": tmin}), lang, accumulated_gdd
+    )
+
+
+@app.post("/growth-plan", response_model=GrowthPlanResponse)
+async def growth_plan(req: GrowthPlanRequest, lang: str = "en"):
+    errors = growth_plan_errors(req)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
+    fields = req.model_dump(exclude={"lat", "lon"})
+    cell = grid_cell(req.lat, req.lon) if req.lat is not None and req.lon is not None else None
+    key = (get_bundle(lang).lang, cell, *fields.values())
+    try:
+        return json_body(await flights["growth_plan"].run(key, lambda: plan_with_weather(req, lang)))
+    except WeatherSourceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+def plan_batch_chunk(chunk: List[GrowthPlanRequest], start: int, lang: str, today: date) -> str:
+    # -> NDJSON lines ({"index": start + i, ...plan}) for one chunk of a batch.
+    plots = [plot.model_dump(exclude={"lat", "lon"}) for plot in chunk]
+    # Observed GDD for plots that did not send it: one history lookup per grid
+    # cell, not per plot.
+    lookup = [i for i, plot in enumerate(chunk) if plot.accumulated_gdd is None]
+    observed, errors = historical_gdd_many(
+        [
+            (chunk[i].lat, chunk[i].lon, parse_date(chunk[i].sowing_date), BASE_TEMPS[chunk[i].crop_type.lower()])
+            for i in lookup
+        ],
+        today,
+    )
+    for i, gdd in zip(lookup, observed):
+        plots[i]["accumulated_gdd"] = gdd
+    if errors:
+        # Fall back to the tmax/tmin estimate rather than failing the plans.
+        print(f"⚠️ Historical GDD unavailable for {len(errors)} weather cell(s), estimating instead: {errors[0]}")
+    plans = get_growth_plan_batch(plots, lang=lang, today=today)
+    return "".join(
+        json.dumps({"index": start + offset, **plan}, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for offset, plan in enumerate(plans)
+    )
+
+
+@app.post("/growth-plan/batch")
+async def growth_plan_batch(req: GrowthPlanBatchRequest, lang: str = "en"):
+    # Streams one JSON plan per line ({"index": i, ...plan}) in input order, so
+    # the client can render plots as they arrive. Every plot is validated
+    # before anything is streamed.
+    if len(req.plots) > GROWTH_PLAN_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(req.plots)} plots (max {GROWTH_PLAN_BATCH_MAX}).",
+        )
+    errors = [f"plots[{i}]: {e}" for i, plot in enumerate(req.plots) for e in growth_plan_errors(plot)]
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+
+    # Plots without tmax/tmin get today's forecast, fetched once per grid cell
+    # and all cells concurrently.
+    cells = {
+        grid_cell(plot.lat, plot.lon): (plot.lat, plot.lon)
+        for plot in req.plots if plot.tmax is None or plot.tmin is None
+    }
+    try:
+        forecasts = dict(zip(cells, await asyncio.gather(*(todays_temperatures(*at) for at in cells.values()))))
+    except WeatherSourceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    for i, plot in enumerate(req.plots):
+        if plot.tmax is None or plot.tmin is None:
+            tmax, tmin = forecasts[grid_cell(plot.lat, plot.lon)]
+            req.plots[i] = plot.model_copy(update={"tmax": tmax, "tmin": tmin})
+
+    today = date.today()
+    chunks = range(0, len(req.plots), GROWTH_PLAN_STREAM_CHUNK)
+    # Each chunk runs on the light pool like any other plan. The first one is
+    # computed before responding, so a saturated pool is still a clean 503;
+    # past that, a failure can only end the stream early.
+    first = await light_pool.run(plan_batch_chunk, req.plots[:GROWTH_PLAN_STREAM_CHUNK], 0, lang, today)
+
+    async def stream():
+        yield first
+        for start in chunks[1:]:
+            chunk = req.plots[start:start + GROWTH_PLAN_STREAM_CHUNK]
+            yield await light_pool.run(plan_batch_chunk, chunk, start, lang, today)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/growth-plan/projection")
+async def growth_plan_projection(req: SeasonProjectionRequest):
+    # Projected completion dates for every stage of each plot, as p10/p50/p90
+    # over forecast-then-climatology scenarios for the plot's weather cell
+    # (see models/season_sim.py).
+    if len(req.plots) > SEASON_PROJECTION_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(req.plots)} plots (max {SEASON_PROJECTION_MAX}).",
+        )
+    today = date.today()
+    earliest = today - timedelta(days=MAX_SEASON_DAYS)
+    latest = today + timedelta(days=req.horizon_days)
+    errors = []
+    if req.scenarios not in SCENARIO_MODES:
+        errors.append(f"scenarios must be one of {SCENARIO_MODES}.")
+    if not req.percentiles or not all(0 <= p <= 100 for p in req.percentiles):
+        errors.append("percentiles must be between 0 and 100.")
+    if not (1 <= req.horizon_days <= 366):
+        errors.append("horizon_days must be 1–366.")
+    for i, plot in enumerate(req.plots):
+        if plot.crop_type.lower() not in SUPPORTED_CROPS:
+            errors.append(f"plots[{i}]: Unsupported crop. Supported: {SUPPORTED_CROPS}")
+        try:
+            sow_dt = parse_date(plot.sowing_date)
+        except ValueError as e:
+            errors.append(f"plots[{i}]: Invalid date format or value. Please use YYYY-MM-DD. Error: {str(e)}")
+            continue
+        if not (earliest <= sow_dt <= latest):
+            errors.append(f"plots[{i}]: sowing_date must be between {earliest} and {latest}.")
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    if not req.plots:
+        return {"count": 0, "results": []}
+    # The forecast replaces the first days of every scenario; one fetch per
+    # grid cell, all cells concurrently.
+    cells = {grid_cell(plot.lat, plot.lon): (plot.lat, plot.lon) for plot in req.plots}
+    means = await asyncio.gather(*(season_forecast(*at, today) for at in cells.values()))
+    forecasts = {cell_key(cell): mean for cell, mean in zip(cells, means) if mean is not None}
+    try:
+        results = await light_pool.run(
+            project_seasons,
+            [plot.model_dump() for plot in req.plots],
+            today,
+            req.scenarios,
+            req.percentiles,
+            req.horizon_days,
+            CLIMATE_YEARS,
+            forecasts,
+        )
+    except WeatherSourceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {"count": len(results), "results": results}
+
+
+def validate_advisory_request(req: DailyAdvisoryRequest, prefix: str = "") -> None:
+    if not (0 <= req.soil_moisture <= 100):
+        raise HTTPException(status_code=400, detail=f"{prefix}soil_moisture must be 0–100.")
+    if not (0 <= req.humidity <= 100):
+        raise HTTPException(status_code=400, detail=f"{prefix}humidity must be 0–100.")
+
+
+@app.post("/daily-advisory", response_model=DailyAdvisoryResponse)
+async def daily_advisory(req: DailyAdvisoryRequest, lang: str = "en"):
+    validate_advisory_request(req)
+    row = req.model_dump()
+    key = (get_bundle(lang).lang, *row.values())
+    version, results = await flights["advisory"].run(key, lambda: run_advisory([row], lang))
+    return json_body(with_model_version(results[0], version))
+
+
+@app.post("/daily-advisory/batch", response_model=DailyAdvisoryBatchResponse)
+async def daily_advisory_batch(req: DailyAdvisoryBatchRequest, lang: str = "en"):
+    if len(req.rows) > ADVISORY_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(req.rows)} rows (max {ADVISORY_BATCH_MAX}).",
+        )
+    for i, row in enumerate(req.rows):
+        validate_advisory_request(row, prefix=f"rows[{i}]: ")
+
+    version, results = await run_advisory([row.model_dump() for row in req.rows], lang)
+    return json_body(
+        f'{{"count":{len(results)},"model_version":{encode_string(version)},"results":[' + ",".join(results) + "]}"
+    )
+
+
+DISEASE_UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["image"],
+                    "properties": {"image": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+def pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Disease detection is busy. Please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def disease_cache_call(fn, *args):
+    if disease_cache.disk is None:
+        return fn(*args)
+    return await light_pool.run(fn, *args)
+
+
+@app.post("/detect-disease", openapi_extra=DISEASE_UPLOAD_SCHEMA)
+async def detect_disease_endpoint(request: Request, lang: str = "en"):
+    # The upload is streamed to a temp file (size-capped, format sniffed from
+    # magic bytes) rather than parsed into memory; see uploads.py.
+    if disease_pool.is_saturated():
+        raise pool_busy()
+    try:
+        with span("disease.upload"):
+            upload = await stream_image_upload(request, field="image", max_bytes=MAX_UPLOAD_BYTES)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    cache_key = f"{upload['sha256']}-{disease_model_version}"
+    try:
+        prediction = await disease_cache_call(disease_cache.get, cache_key)
+        if prediction is None:
+            prediction = await disease_pool.run(classify_image, upload["path"])
+            await disease_cache_call(disease_cache.put, cache_key, prediction)
+    except PoolSaturated:
+        raise pool_busy()
+    except InvalidImageError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    finally:
+        discard_upload(upload)
+    return render_disease_result(prediction, lang)
+
+
+# ─── Plot Registry ─────────────────────────────────────────────────────────────
+# Plots registered once, then read by id. Reads serve the nightly precomputed
+# result when it is current (today, the plot's latest revision, the requested
+# language and, for advisories, the serving model version) and compute live
+# otherwise, through the same helpers the job uses.
+
+class PlotRequest(BaseModel):
+    crop_type: str
+    sowing_date: str  # YYYY-MM-DD
+    city: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    stage_basis: str = "days"
+    lang: str = "en"
+
+
+class PlotReadingsRequest(BaseModel):
+    soil_moisture: float
+    temperature: float
+    humidity: float
+    rainfall_last_3_days: float
+    days_since_last_irrigation: int
+    tmax: float
+    tmin: float
+
+
+def plot_errors(req: PlotRequest) -> List[str]:
+    errors = []
+    if req.crop_type.lower() not in SUPPORTED_CROPS:
+        errors.append(f"Unsupported crop. Supported: {SUPPORTED_CROPS}")
+    if req.stage_basis not in STAGE_BASES:
+        errors.append(f"stage_basis must be one of {STAGE_BASES}.")
+    if req.lang not in SUPPORTED_LANGS:
+        errors.append(f"lang must be one of {SUPPORTED_LANGS}.")
+    if (req.lat is None) != (req.lon is None):
+        errors.append("Give both lat and lon, or neither.")
+    try:
+        parse_date(req.sowing_date)
+    except ValueError as e:
+        errors.append(f"Invalid date format or value. Please use YYYY-MM-DD. Error: {str(e)}")
+    return errors
+
+
+async def find_plot(plot_id: str) -> dict:
+    # The plot joined with its precomputed result; only plots with readings
+    # can be planned or advised.
+    plot = await light_pool.run(plot_store.lookup, plot_id)
+    if plot is None:
+        raise HTTPException(status_code=404, detail=f"Unknown plot '{plot_id}'.")
+    if plot["readings_on"] is None:
+        raise HTTPException(status_code=409, detail=f"Plot '{plot_id}' has no readings yet.")
+    return plot
+
+
+def precomputed_today(plot: dict, today: date) -> bool:
+    return plot["run_date"] == today.isoformat() and plot["result_revision"] == plot["revision"]
+
+
+async def plot_stage(plot: dict, lang: str, today: date) -> str:
+    if precomputed_today(plot, today):
+        return plot["current_stage"]
+    plans = await light_pool.run(plan_plots, [plot], lang, today)
+    return plans[0]["current_stage"]
+
+
+@app.put("/plots/{plot_id}")
+async def register_plot(plot_id: str, req: PlotRequest):
+    errors = plot_errors(req)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
+    return await light_pool.run(plot_store.upsert_plot, plot_id, {**req.model_dump(), "crop_type": req.crop_type.lower()})
+
+
+@app.post("/plots/{plot_id}/readings")
+async def record_plot_readings(plot_id: str, req: PlotReadingsRequest):
     if not (0 <= req.soil_moisture <= 100):
         raise HTTPException(status_code=400, detail="soil_moisture must be 0–100.")
     if not (0 <= req.humidity <= 100):
         raise HTTPException(status_code=400, detail="humidity must be 0–100.")
-
-    result = get_daily_advisory(
-        irr_model=irr_model,
-        fert_model=fert_model,
-        soil_moisture=req.soil_moisture,
-        temperature=req.temperature,
-        humidity=req.humidity,
-        rainfall_last_3_days=req.rainfall_last_3_days,
-        crop_stage=req.crop_stage,
-        days_since_last_irrigation=req.days_since_last_irrigation,
-        lang=lang,
+    if req.tmax <= req.tmin:
+        raise HTTPException(status_code=400, detail="tmax must be greater than tmin.")
+    if req.days_since_last_irrigation < 0:
+        raise HTTPException(status_code=400, detail="days_since_last_irrigation must be 0 or more.")
+    plot = await light_pool.run(
+        plot_store.record_readings,
+        plot_id,
+        req.model_dump(exclude={"days_since_last_irrigation"}),
+        req.days_since_last_irrigation,
     )
-    return result
+    if plot is None:
+        raise HTTPException(status_code=404, detail=f"Unknown plot '{plot_id}'.")
+    return plot
 
 
-@app.post("/detect-disease")
-async def detect_disease_endpoint(image: UploadFile = File(...), lang: str = "en"):
-    allowed_types = ["image/jpeg", "image/png", "image/webp", "image/jpg"]
-    if image.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type: {image.content_type}. Upload JPEG or PNG.",
+@app.get("/plots/{plot_id}")
+async def get_plot(plot_id: str):
+    plot = await light_pool.run(plot_store.get_plot, plot_id)
+    if plot is None:
+        raise HTTPException(status_code=404, detail=f"Unknown plot '{plot_id}'.")
+    return plot
+
+
+@app.delete("/plots/{plot_id}", status_code=204)
+async def delete_plot(plot_id: str):
+    if not await light_pool.run(plot_store.delete_plot, plot_id):
+        raise HTTPException(status_code=404, detail=f"Unknown plot '{plot_id}'.")
+
+
+@app.get("/plots/{plot_id}/growth-plan", response_model=GrowthPlanResponse)
+async def plot_growth_plan(plot_id: str, lang: Optional[str] = None):
+    plot = await find_plot(plot_id)
+    lang = get_bundle(lang or plot["lang"]).lang
+    today = date.today()
+    hit = precomputed_today(plot, today) and plot["result_lang"] == lang
+    plot_store.record_lookup(hit)
+    if hit:
+        return json_body(plot["growth_plan"])
+    plans = await light_pool.run(plan_plots, [plot], lang, today)
+    return json_body(encode_plan(plans[0]))
+
+
+@app.get("/plots/{plot_id}/daily-advisory", response_model=DailyAdvisoryResponse)
+async def plot_daily_advisory(plot_id: str, lang: Optional[str] = None):
+    plot = await find_plot(plot_id)
+    lang = get_bundle(lang or plot["lang"]).lang
+    today = date.today()
+    version = active_advisory.version
+    hit = precomputed_today(plot, today) and plot["result_lang"] == lang and plot["model_version"] == version
+    plot_store.record_lookup(hit)
+    if hit:
+        return json_body(with_model_version(plot["advisory"], version))
+    row = advisory_row(plot, await plot_stage(plot, lang, today), today)
+    version, results = await run_advisory([row], lang)
+    return json_body(with_model_version(results[0], version))
+
+
+async def schedule_precompute(at: str) -> None:
+    # Starts models.precompute in its own process every day at `at` (HH:MM).
+    # Every gunicorn worker runs this loop; the job's per-date claim in the
+    # database lets only the first one through.
+    hour, minute = (int(part) for part in at.split(":"))
+    while True:
+        now = datetime.now()
+        run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        await asyncio.sleep((run_at - now).total_seconds())
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "models.precompute", "--db", str(plot_store.path),
+            cwd=Path(__file__).resolve().parent,
         )
+        if await process.wait() != 0:
+            print(f"⚠️ Nightly precompute exited with status {process.returncode}")
+
+
+# ─── Model Admin ───────────────────────────────────────────────────────────────
+# Retraining, rollback and model status. Disabled unless ADMIN_TOKEN is set;
+# callers send it as X-Admin-Token.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled. Set ADMIN_TOKEN to enable them.")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+async def swap_after_retrain() -> None:
+    # Picks up a promotion as soon as the job exits, rather than at the next poll.
+    await asyncio.to_thread(retrain_job.wait)
+    await asyncio.to_thread(active_advisory.refresh)
+
+
+@app.post("/admin/retrain", status_code=202, dependencies=[Depends(require_admin)])
+async def start_retraining(seed: Optional[int] = None):
+    # Trains on RETRAIN_DATA (or fresh synthetic data) in a background process;
+    # the result lands in GET /admin/models once it finishes.
+    try:
+        retrain_job.start(seed=seed)
+    except RetrainBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    task = asyncio.create_task(swap_after_retrain())
+    retrain_watchers.add(task)
+    task.add_done_callback(retrain_watchers.discard)
+    return retrain_job.status()
+
+
+@app.post("/admin/rollback", dependencies=[Depends(require_admin)])
+async def rollback_advisory_model():
+    try:
+        manifest = await asyncio.to_thread(rollback)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    serving = await asyncio.to_thread(active_advisory.refresh)
+    return {"requested": manifest["version"], "serving": serving, "history": manifest["history"]}
+
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def model_status():
+    return {"advisory": active_advisory.stats(), "disease": disease_model_version, "retrain": retrain_job.status()}
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "models": {"advisory": active_advisory.stats(), "disease": disease_model_version},
+        "executors": {pool.name: pool.stats() for pool in POOLS},
+        "routes": {path: limit.stats() for path, limit in route_limits.items()},
+        "caches": {
+            "disease": disease_cache.stats(),
+            "advisory": advisory_memo.stats() if advisory_memo is not None else None,
+        },
+        "plots": plot_store.stats(),
+        "coalescing": {name: flight.stats() for name, flight in flights.items()},
+        "weather": weather_client.stats() if weather_client is not None else {"source": WEATHER_SOURCE},
+    }
+
+
+def stats_samples() -> list:
+    # /stats counters as Prometheus samples; read at scrape time, so they cost
+    # nothing per request.
+    samples = [
+        ("advisory_model_swaps_total", "counter", "Advisory model hot swaps since start.", {}, active_advisory.swaps),
+        ("advisory_model_load_failures_total", "counter", "Advisory model versions that failed to load.", {},
+         active_advisory.load_failures),
+    ]
+    for pool in POOLS:
+        s, labels = pool.stats(), {"pool": pool.name}
+        samples += [
+            ("executor_pending", "gauge", "Jobs running or queued on the pool.", labels, s["pending"]),
+            ("executor_completed_total", "counter", "Jobs completed by the pool.", labels, s["completed"]),
+            ("executor_rejected_total", "counter", "Jobs refused because the pool was saturated.", labels, s["rejected"]),
+        ]
+    for name, flight in flights.items():
+        f, labels = flight.stats(), {"group": name}
+        samples += [
+            ("coalesce_calls_total", "counter", "Calls through a single-flight group.", labels, f["calls"]),
+            ("coalesce_executions_total", "counter", "Computations actually run.", labels, f["executions"]),
+            ("coalesce_shared_total", "counter", "Calls that joined a computation already in flight.", labels, f["coalesced"]),
+            ("coalesce_errors_total", "counter", "Shared computations that raised.", labels, f["errors"]),
+            ("coalesce_timeouts_total", "counter", "Computations that missed their deadline.", labels, f["timeouts"]),
+        ]
+    if weather_client is not None:
+        w = weather_client.stats()
+        for kind in ("forecast", "archive"):
+            labels = {"upstream": kind}
+            samples += [
+                ("weather_requests_total", "counter", "Upstream weather HTTP requests, retries included.", labels, w[kind]["requests"]),
+                ("weather_retries_total", "counter", "Upstream weather requests that were retries.", labels, w[kind]["retries"]),
+                ("weather_failures_total", "counter", "Weather calls that failed after retrying.", labels, w[kind]["failures"]),
+                ("weather_breaker_open", "gauge", "1 while the upstream's circuit breaker is open.", labels,
+                 int(w[kind]["breaker"]["state"] == "open")),
+                ("weather_breaker_rejected_total", "counter", "Calls failed fast by an open breaker.", labels,
+                 w[kind]["breaker"]["rejected"]),
+            ]
+    for path, limit in route_limits.items():
+        labels = {"route": path}
+        samples += [
+            ("route_in_flight", "gauge", "Requests in flight on a limited route.", labels, limit.in_flight),
+            ("route_rejected_total", "counter", "Requests shed by the route concurrency limit.", labels, limit.rejected),
+        ]
+    disease_stats = disease_cache.stats()
+    caches = {"disease_memory": disease_stats["memory"], "disease_disk": disease_stats.get("disk")}
+    if advisory_memo is not None:
+        caches["advisory"] = advisory_memo.stats()
+    plots = plot_store.stats()
+    caches["plots_precomputed"] = plots
+    samples += [
+        ("plots_registered", "gauge", "Plots in the registry.", {}, plots["plots"]),
+        ("plots_precomputed", "gauge", "Plots with a stored nightly result.", {}, plots["precomputed"]),
+    ]
+    for name, s in caches.items():
+        if s is None:
+            continue
+        labels, lookups = {"cache": name}, s["hits"] + s["misses"]
+        samples += [
+            ("cache_hits_total", "counter", "Cache lookups that hit.", labels, s["hits"]),
+            ("cache_misses_total", "counter", "Cache lookups that missed.", labels, s["misses"]),
+            ("cache_hit_ratio", "gauge", "Hits over lookups since start.", labels, s["hits"] / lookups if lookups else 0.0),
+        ]
+        if "entries" in s:
+            samples.append(("cache_entries", "gauge", "Entries held in memory.", labels, s["entries"]))
+    return samples
+
+
+REGISTRY.add_collector(stats_samples)
 
-    contents = await image.read()
-    file_size = len(contents)
 
-    result = detect_disease(filename=image.filename or "", file_size=file_size, lang=lang)
-    return result
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Prometheus text exposition; span and request histograms are empty when
+    # METRICS_ENABLED=0.
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
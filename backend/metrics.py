@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# In-process instrumentation, exported in the Prometheus text format on /metrics.
+#
+# Two kinds of series, keyed by name + label values: histograms with fixed
+# latency buckets and monotonic counters. span() and timed() time the hot-path
+# functions in models/ into one histogram, labelled by span name. With
+# METRICS_ENABLED=0, timed() hands back the function unwrapped and span() a
+# shared no-op, so the disabled cost is a global lookup; /metrics then still
+# serves the gauges that collectors read from /stats-style counters.
+#
+# Process-pool workers record into their own copy of this registry; the pool
+# ships each job's delta back with its result (drain/merge in executors.py).
+# Under gunicorn every web worker has its own registry, so scrape each one.
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Seconds: from microsecond forest lookups up to slow uploads and batches.
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+SPAN_METRIC = "model_span_seconds"
+
+Labels = Tuple[Tuple[str, str], ...]
+# (name, kind, help, labels, value), as produced by collectors.
+Sample = Tuple[str, str, str, Dict[str, Any], float]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        # (name, labels) -> [per-bucket counts (last one is +Inf), sum, count]
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._meta[name] = (kind, help_text)
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        slot = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            entry = self._histograms.get((name, labels))
+            if entry is None:
+                entry = self._histograms[(name, labels)] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            entry[0][slot] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def inc(self, name: str, amount: float = 1.0, labels: Labels = ()) -> None:
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0.0) + amount
+
+    def add_collector(self, collector: Callable[[], List[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def drain(self) -> Optional[tuple]:
+        # Hands over (and resets) everything recorded since the last drain.
+        with self._lock:
+            if not self._histograms and not self._counters:
+                return None
+            delta = (self._histograms, self._counters)
+            self._histograms, self._counters = {}, {}
+        return delta
+
+    def merge(self, delta: Optional[tuple]) -> None:
+        if delta is None:
+            return
+        histograms, counters = delta
+        with self._lock:
+            for key, (buckets, total, count) in histograms.items():
+                entry = self._histograms.get(key)
+                if entry is None:
+                    self._histograms[key] = [list(buckets), total, count]
+                else:
+                    entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+                    entry[1] += total
+                    entry[2] += count
+            for key, amount in counters.items():
+                self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        families: Dict[str, List[str]] = {}
+        with self._lock:
+            histograms = {key: (list(b), s, c) for key, (b, s, c) in self._histograms.items()}
+            counters = dict(self._counters)
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += n
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            families.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                self._meta.setdefault(name, (kind, help_text))
+                families.setdefault(name, []).append(
+                    f"{name}{_format_labels(label_key(labels))} {_format_value(value)}"
+                )
+
+        out = []
+        for name, lines in families.items():
+            kind, help_text = self._meta.get(name, ("untyped", ""))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+def label_key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = Registry()
+REGISTRY.describe(SPAN_METRIC, "histogram", "Time spent in instrumented model functions, by span.")
+REGISTRY.describe("http_request_duration_seconds", "histogram", "Request latency by route, method and status.")
+REGISTRY.describe("executor_queue_wait_seconds", "histogram", "Time jobs wait for a pool worker.")
+REGISTRY.describe("executor_run_seconds", "histogram", "Time jobs run on a pool worker.")
+REGISTRY.describe("model_inferences_total", "counter", "Rows or images scored, by model.")
+
+
+# ─── Hot-path helpers ──────────────────────────────────────────────────────────
+
+class _Span:
+    __slots__ = ("labels", "started")
+
+    def __init__(self, labels: Labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.observe(SPAN_METRIC, time.perf_counter() - self.started, self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str):
+    # `with span("advisory.render"): ...`
+    return _Span((("span", name),)) if ENABLED else _NOOP
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    # Decorator form of span(); a no-op at import time when disabled.
+    def decorate(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+        labels = (("span", name),)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.observe(SPAN_METRIC, time.perf_counter() - started, labels)
+        return wrapper
+    return decorate
+
+
+def count_inference(model: str, n: int = 1) -> None:
+    if ENABLED:
+        REGISTRY.inc("model_inferences_total", n, (("model", model),))
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    if ENABLED:
+        REGISTRY.observe(name, seconds, label_key(labels))
+
+
+# ─── Request middleware ────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    # Plain ASGI: one histogram sample per HTTP request, labelled by route
+    # template (not raw path, to keep cardinality bounded), method and status.
+    # Streaming responses are timed to their last chunk. Requests answered
+    # before routing (e.g. 503s from ConcurrencyLimitMiddleware) are labelled
+    # with their path if it is one of `paths`.
+    def __init__(self, app, paths=()):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route is None:
+                route = scope["path"] if scope["path"] in self.paths else "unmatched"
+            REGISTRY.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - started,
+                (("method", scope["method"]), ("route", route), ("status", str(status[0]))),
+            )
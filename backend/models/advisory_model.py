@@ -1,76 +1,194 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Sequence, Tuple
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from translations import ADVISORY_MESSAGES  # Import translations
+from catalog import LanguageBundle, get_bundle
+from json_fragments import json_number
+from metrics import count_inference, span, timed
+
+# Serving side of the advisory models: feature encoding, inference and the
+# localized recommendation text. Imports numpy only; data generation and
+# training (pandas, sklearn) live in models/advisory_training.py.
 
 CROP_STAGES = [
     "Germination", "Vegetative", "Tillering",
     "Jointing", "Tasseling", "Silking", "Flowering", "Maturity"
 ]
 
-stage_encoder = LabelEncoder()
-stage_encoder.fit(CROP_STAGES)
-
-
-def generate_synthetic_data(n_samples: int = 2000) -> pd.DataFrame:
-    np.random.seed(42)
-    rows = []
-    for _ in range(n_samples):
-        soil_moisture = np.random.uniform(10, 80)
-        temperature = np.random.uniform(15, 45)
-        humidity = np.random.uniform(30, 95)
-        rainfall = np.random.uniform(0, 50)
-        stage_idx = np.random.randint(0, len(CROP_STAGES))
-        crop_stage_encoded = stage_idx
-        days_since_irrigation = np.random.randint(0, 15)
-
-        # Rule-based labeling
-        irrigation_required = int(
-            soil_moisture < 30
-            or (temperature > 35 and soil_moisture < 45)
-            or (days_since_irrigation > 7 and rainfall < 5)
-        )
-        fertilizer_required = int(
-            (CROP_STAGES[stage_idx] in ["Tillering", "Vegetative", "Jointing"])
-            and (days_since_irrigation % 3 == 0)
-            and (rainfall < 10)
-        )
-
-        rows.append([
-            soil_moisture, temperature, humidity, rainfall,
-            crop_stage_encoded, days_since_irrigation,
-            irrigation_required, fertilizer_required
-        ])
-
-    return pd.DataFrame(rows, columns=[
-        "soil_moisture", "temperature", "humidity", "rainfall_last_3_days",
-        "crop_stage_encoded", "days_since_last_irrigation",
-        "irrigation_required", "fertilizer_required"
-    ])
-
-
-def train_advisory_models() -> Tuple[RandomForestClassifier, RandomForestClassifier]:
-    df = generate_synthetic_data()
-    features = [
-        "soil_moisture", "temperature", "humidity",
-        "rainfall_last_3_days", "crop_stage_encoded", "days_since_last_irrigation"
-    ]
-    X = df[features].values
+FEATURES = [
+    "soil_moisture", "temperature", "humidity",
+    "rainfall_last_3_days", "crop_stage_encoded", "days_since_last_irrigation"
+]
+
+# Inclusive bounds of every feature in the synthetic training data
+# (advisory_training._synthetic_chunk); stage and days are integers.
+FEATURE_RANGES = {
+    "soil_moisture": (10, 80),
+    "temperature": (15, 45),
+    "humidity": (30, 95),
+    "rainfall_last_3_days": (0, 50),
+    "crop_stage_encoded": (0, len(CROP_STAGES) - 1),
+    "days_since_last_irrigation": (0, 14),
+}
+
+# Anything that changes what train_advisory_models() produces belongs here:
+# the artifact store fingerprints this dict to decide when a saved bundle is stale.
+# Bump "labeling_rules" whenever the rules in advisory_training._synthetic_chunk change.
+TRAINING_CONFIG = {
+    "n_samples": 2000,
+    "seed": 42,
+    "chunk_size": 100_000,
+    "n_estimators": 100,
+    "random_state": 42,
+    "features": FEATURES,
+    "crop_stages": CROP_STAGES,
+    "labeling_rules": 1,
+    "generator": "numpy-pcg64-chunked",
+}
+
+# Stages are encoded by their position in CROP_STAGES, exactly as
+# advisory_training.generate_synthetic_data encodes them for training.
+# Unknown stages map to 0.
+STAGE_INDEX = {stage: idx for idx, stage in enumerate(CROP_STAGES)}
+
+
+@timed("advisory.encode_features")
+def encode_features(rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+    X = np.empty((len(rows), len(FEATURES)), dtype=np.float64)
+    for col, name in enumerate(FEATURES):
+        if name == "crop_stage_encoded":
+            X[:, col] = [STAGE_INDEX.get(row["crop_stage"], 0) for row in rows]
+        else:
+            X[:, col] = [row[name] for row in rows]
+    return X
 
-    irr_model = RandomForestClassifier(n_estimators=100, random_state=42)
-    irr_model.fit(X, df["irrigation_required"].values)
 
-    fert_model = RandomForestClassifier(n_estimators=100, random_state=42)
-    fert_model.fit(X, df["fertilizer_required"].values)
+def predict_with_confidence(model: Any, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # `model` is a RandomForestClassifier or a FlatForest. One predict_proba
+    # pass gives both outputs: RandomForestClassifier.predict is itself argmax
+    # over predict_proba, so the labels come out identical.
+    proba = model.predict_proba(X)
+    labels = model.classes_[np.argmax(proba, axis=1)].astype(bool)
+    positive = np.flatnonzero(model.classes_ == 1)
+    confidence = proba[:, positive[0]] if positive.size else np.zeros(len(X))
+    return labels, confidence
 
-    return irr_model, fert_model
+
+def _irrigation_key(irr_pred: bool, soil_moisture: float) -> str:
+    if not irr_pred:
+        return "irrigation_ok"
+    return "urgent_irrigation" if soil_moisture < 20 else "irrigation_needed"
+
+
+def _render_recommendation(
+    trans: LanguageBundle,
+    soil_moisture: float,
+    temperature: float,
+    humidity: float,
+    crop_stage: str,
+    irr_pred: bool,
+    fert_pred: bool,
+) -> str:
+    # Irrigation sentence, then the pre-joined fertilizer/alert sentences.
+    prefix, suffix = trans.irrigation_parts[_irrigation_key(irr_pred, soil_moisture)]
+    tail = trans.advisory_tails[
+        trans.advisory_tail_key(crop_stage, fert_pred, temperature > 38, humidity > 85 and temperature > 28)
+    ]
+    return prefix + format(soil_moisture) + suffix + tail
+
+
+def _infer(irr_model: Any, fert_model: Any, rows: Sequence[Dict[str, Any]]) -> tuple:
+    X = encode_features(rows)
+    with span("advisory.predict_irrigation"):
+        irr_pred, irr_prob = predict_with_confidence(irr_model, X)
+    with span("advisory.predict_fertilizer"):
+        fert_pred, fert_prob = predict_with_confidence(fert_model, X)
+    count_inference("irrigation", len(rows))
+    count_inference("fertilizer", len(rows))
+    return (
+        irr_pred.tolist(),
+        fert_pred.tolist(),
+        np.round(irr_prob, 2).tolist(),
+        np.round(fert_prob, 2).tolist(),
+    )
+
+
+def get_daily_advisory_batch(
+    irr_model: Any,
+    fert_model: Any,
+    rows: Sequence[Dict[str, Any]],
+    lang: str = "en",
+) -> List[Dict[str, Any]]:
+    trans = get_bundle(lang)
+    if not rows:
+        return []
+
+    irr_pred, fert_pred, irr_prob, fert_prob = _infer(irr_model, fert_model, rows)
+    with span("advisory.render"):
+        return [
+            {
+                "irrigation_required": irr_pred[i],
+                "fertilizer_required": fert_pred[i],
+                "irrigation_confidence": irr_prob[i],
+                "fertilizer_confidence": fert_prob[i],
+                "recommendation_text": _render_recommendation(
+                    trans, row["soil_moisture"], row["temperature"], row["humidity"],
+                    row["crop_stage"], irr_pred[i], fert_pred[i],
+                ),
+            }
+            for i, row in enumerate(rows)
+        ]
+
+
+def infer_advisories(irr_model: Any, fert_model: Any, rows: Sequence[Dict[str, Any]]) -> List[tuple]:
+    # (irrigation_required, fertilizer_required, irrigation_confidence,
+    # fertilizer_confidence) per row, without the text.
+    if not rows:
+        return []
+    return list(zip(*_infer(irr_model, fert_model, rows)))
+
+
+def render_advisory_json(
+    rows: Sequence[Dict[str, Any]],
+    predictions: Sequence[Sequence[Any]],
+    lang: str = "en",
+) -> List[str]:
+    # Encodes infer_advisories' output as JSON objects. The text is rendered
+    # from `rows`, which need not be the readings the predictions were made on
+    # (see advisory_cache.py).
+    trans = get_bundle(lang)
+    parts, tails = trans.irrigation_parts_json, trans.advisory_tails_json
+    out = []
+    with span("advisory.render"):
+        for row, (irr, fert, irr_prob, fert_prob) in zip(rows, predictions):
+            soil_moisture, temperature = row["soil_moisture"], row["temperature"]
+            prefix, suffix = parts[_irrigation_key(irr, soil_moisture)]
+            tail = tails[trans.advisory_tail_key(
+                row["crop_stage"], fert, temperature > 38, row["humidity"] > 85 and temperature > 28
+            )]
+            out.append(
+                ('{"irrigation_required":true,' if irr else '{"irrigation_required":false,')
+                + ('"fertilizer_required":true,"irrigation_confidence":' if fert
+                   else '"fertilizer_required":false,"irrigation_confidence":')
+                + json_number(irr_prob) + ',"fertilizer_confidence":' + json_number(fert_prob)
+                + ',"recommendation_text":"' + prefix + format(soil_moisture) + suffix + tail + '"}'
+            )
+    return out
+
+
+def get_daily_advisory_json(
+    irr_model: Any,
+    fert_model: Any,
+    rows: Sequence[Dict[str, Any]],
+    lang: str = "en",
+) -> List[str]:
+    # Same results as get_daily_advisory_batch, each already encoded as a JSON
+    # object (byte-for-byte what json.dumps(ensure_ascii=False, compact) gives),
+    # built from the catalog's pre-escaped fragments.
+    return render_advisory_json(rows, infer_advisories(irr_model, fert_model, rows), lang)
 
 
 def get_daily_advisory(
-    irr_model: RandomForestClassifier,
-    fert_model: RandomForestClassifier,
+    irr_model: Any,
+    fert_model: Any,
     soil_moisture: float,
     temperature: float,
     humidity: float,
@@ -79,67 +197,12 @@ def get_daily_advisory(
     days_since_last_irrigation: int,
     lang: str = "en",
 ) -> Dict[str, Any]:
-    lang = lang if lang in ["en", "hi"] else "en"
-    trans = ADVISORY_MESSAGES.get(lang, ADVISORY_MESSAGES["en"])
-
-    # Encode stage safely
-    if crop_stage in CROP_STAGES:
-        stage_enc = stage_encoder.transform([crop_stage])[0]
-    else:
-        stage_enc = 0
-
-    X = np.array([[
-        soil_moisture, temperature, humidity,
-        rainfall_last_3_days, stage_enc, days_since_last_irrigation
-    ]])
-
-    irr_pred = bool(irr_model.predict(X)[0])
-    fert_pred = bool(fert_model.predict(X)[0])
-    irr_prob = round(float(irr_model.predict_proba(X)[0][1]), 2)
-    fert_prob = round(float(fert_model.predict_proba(X)[0][1]), 2)
-
-    # Build recommendation text
-    rec_parts = []
-    if irr_pred:
-        if soil_moisture < 20:
-            rec_parts.append(trans.get("urgent_irrigation", "").format(soil_moisture=soil_moisture))
-        else:
-            rec_parts.append(trans.get("irrigation_needed", "").format(soil_moisture=soil_moisture))
-    else:
-        rec_parts.append(trans.get("irrigation_ok", "").format(soil_moisture=soil_moisture))
-
-    if fert_pred:
-        # Note: These stage-specific messages are also in the translation dict now?
-        # Actually I put them in ADVISORY_MESSAGES with keys `fert_tillering`, etc.
-        # But I need to map the crop_stage string to these keys.
-        
-        stage_key_map = {
-            "Tillering": "fert_tillering",
-            "Vegetative": "fert_vegetative",
-            "Jointing": "fert_jointing",
-            "Flowering": "fert_flowering",
-        }
-        
-        key = stage_key_map.get(crop_stage, "fert_default")
-        fert_text_content = trans.get(key, trans.get("fert_default"))
-        
-        # In my translation file I had full sentences for these.
-        # Let's check: "fert_tillering": "Apply 25 kg urea/acre as top dressing."
-        # And the prefix: "fert_required_prefix": "🌱 Fertilizer required: "
-        
-        rec_parts.append(f"{trans.get('fert_required_prefix')}{fert_text_content}")
-    else:
-        rec_parts.append(trans.get("fert_not_needed"))
-
-    if temperature > 38:
-        rec_parts.append(trans.get("heat_alert"))
-    if humidity > 85 and temperature > 28:
-        rec_parts.append(trans.get("humidity_alert"))
-
-    return {
-        "irrigation_required": irr_pred,
-        "fertilizer_required": fert_pred,
-        "irrigation_confidence": irr_prob,
-        "fertilizer_confidence": fert_prob,
-        "recommendation_text": " ".join(rec_parts),
-    }
\ No newline at end of file
+    row = {
+        "soil_moisture": soil_moisture,
+        "temperature": temperature,
+        "humidity": humidity,
+        "rainfall_last_3_days": rainfall_last_3_days,
+        "crop_stage": crop_stage,
+        "days_since_last_irrigation": days_since_last_irrigation,
+    }
+    return get_daily_advisory_batch(irr_model, fert_model, [row], lang=lang)[0]
@@ -0,0 +1,105 @@
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from models.advisory_model import CROP_STAGES, FEATURE_RANGES, FEATURES, STAGE_INDEX, TRAINING_CONFIG
+
+# Training side of the advisory models: synthetic data generation and forest
+# fitting. Only the artifact build (models/model_store.py) imports this, so the
+# serving path never loads pandas or sklearn.
+
+LABELS = ["irrigation_required", "fertilizer_required"]
+FERT_ELIGIBLE_STAGES = np.array([STAGE_INDEX[s] for s in ["Tillering", "Vegetative", "Jointing"]])
+
+
+def _synthetic_chunk(rng: np.random.Generator, size: int) -> Dict[str, np.ndarray]:
+    soil_moisture = rng.uniform(*FEATURE_RANGES["soil_moisture"], size)
+    temperature = rng.uniform(*FEATURE_RANGES["temperature"], size)
+    humidity = rng.uniform(*FEATURE_RANGES["humidity"], size)
+    rainfall = rng.uniform(*FEATURE_RANGES["rainfall_last_3_days"], size)
+    stage_idx = rng.integers(0, len(CROP_STAGES), size)
+    days_since_irrigation = rng.integers(0, FEATURE_RANGES["days_since_last_irrigation"][1] + 1, size)
+
+    # Rule-based labeling
+    irrigation_required = (
+        (soil_moisture < 30)
+        | ((temperature > 35) & (soil_moisture < 45))
+        | ((days_since_irrigation > 7) & (rainfall < 5))
+    )
+    fertilizer_required = (
+        np.isin(stage_idx, FERT_ELIGIBLE_STAGES)
+        & (days_since_irrigation % 3 == 0)
+        & (rainfall < 10)
+    )
+
+    return {
+        "soil_moisture": soil_moisture,
+        "temperature": temperature,
+        "humidity": humidity,
+        "rainfall_last_3_days": rainfall,
+        "crop_stage_encoded": stage_idx,
+        "days_since_last_irrigation": days_since_irrigation,
+        "irrigation_required": irrigation_required.astype(np.int64),
+        "fertilizer_required": fertilizer_required.astype(np.int64),
+    }
+
+
+def iter_synthetic_chunks(
+    n_samples: int, seed: int = TRAINING_CONFIG["seed"], chunk_size: int = TRAINING_CONFIG["chunk_size"]
+) -> Iterator[Dict[str, np.ndarray]]:
+    # Each chunk draws from its own child of SeedSequence(seed), so the stream is
+    # reproducible for a given (seed, chunk_size) and memory stays at one chunk.
+    seed_seq = np.random.SeedSequence(seed)
+    n_chunks = -(-n_samples // chunk_size)
+    for i, child in enumerate(seed_seq.spawn(n_chunks)):
+        size = min(chunk_size, n_samples - i * chunk_size)
+        yield _synthetic_chunk(np.random.default_rng(child), size)
+
+
+def generate_synthetic_data(
+    n_samples: int = 2000, seed: int = TRAINING_CONFIG["seed"], chunk_size: int = TRAINING_CONFIG["chunk_size"]
+) -> pd.DataFrame:
+    columns = {}
+    offset = 0
+    for chunk in iter_synthetic_chunks(n_samples, seed=seed, chunk_size=chunk_size):
+        if not columns:
+            columns = {name: np.empty(n_samples, dtype=arr.dtype) for name, arr in chunk.items()}
+        size = len(chunk["soil_moisture"])
+        for name, arr in chunk.items():
+            columns[name][offset:offset + size] = arr
+        offset += size
+    return pd.DataFrame(columns, columns=FEATURES + LABELS)
+
+
+def load_field_data(path: str) -> pd.DataFrame:
+    # CSV of labelled field observations: the FEATURES columns (crop_stage may
+    # be given by name instead of crop_stage_encoded) plus both LABELS as 0/1.
+    df = pd.read_csv(path)
+    if "crop_stage_encoded" not in df.columns and "crop_stage" in df.columns:
+        df["crop_stage_encoded"] = df["crop_stage"].map(STAGE_INDEX).fillna(0).astype(np.int64)
+    missing = [c for c in FEATURES + LABELS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}.")
+    return df[FEATURES + LABELS].astype({label: np.int64 for label in LABELS})
+
+
+def train_advisory_models(
+    df: Optional[pd.DataFrame] = None,
+) -> Tuple[RandomForestClassifier, RandomForestClassifier]:
+    # Fits on `df` (FEATURES + LABELS), or on the synthetic set TRAINING_CONFIG describes.
+    config = TRAINING_CONFIG
+    if df is None:
+        df = generate_synthetic_data(config["n_samples"], seed=config["seed"], chunk_size=config["chunk_size"])
+    X = df[FEATURES].values
+
+    irr_model = RandomForestClassifier(
+        n_estimators=config["n_estimators"], random_state=config["random_state"]
+    )
+    irr_model.fit(X, df["irrigation_required"].values)
+
+    fert_model = RandomForestClassifier(
+        n_estimators=config["n_estimators"], random_state=config["random_state"]
+    )
+    fert_model.fit(X, df["fertilizer_required"].values)
+
+    return irr_model, fert_model
@@ -0,0 +1,69 @@
+import threading
+from typing import Dict, Any, List, Optional
+
+from models.advisory_model import get_daily_advisory_batch, get_daily_advisory_json, infer_advisories
+from models.model_store import load_or_train, load_version
+
+# Advisory inference as a picklable, module-level entry point for the
+# inference pool (see executors.py). Each worker loads the persisted bundle
+# once; the parent builds it at startup, so workers never train.
+#
+# Jobs name the model version they were dispatched with. A worker that does
+# not hold it yet loads it and swaps the module reference; calls already
+# running keep the bundle they started with, so a hot swap never mixes
+# versions within a request. The version before the swap stays loaded too, so
+# jobs dispatched just before it do not force a reload.
+
+KEEP_VERSIONS = 2
+
+_bundle: Optional[Dict[str, Any]] = None
+_loaded: Dict[str, Dict[str, Any]] = {}
+_swap_lock = threading.Lock()
+
+
+def init_worker() -> None:
+    # Pool initializer; idempotent so thread pools can call it per thread.
+    global _bundle
+    with _swap_lock:
+        if _bundle is None:
+            _bundle = load_or_train(allow_train=False)
+            _loaded[_bundle["version"]] = _bundle
+
+
+def use_version(version: str) -> Dict[str, Any]:
+    bundle = _loaded.get(version)
+    if bundle is not None:
+        return bundle
+    global _bundle
+    with _swap_lock:
+        if version not in _loaded:
+            _loaded[version] = _bundle = load_version(version)
+            while len(_loaded) > KEEP_VERSIONS:
+                del _loaded[next(iter(_loaded))]
+        return _loaded[version]
+
+
+def _get_bundle(version: Optional[str]) -> Dict[str, Any]:
+    if version is not None:
+        return use_version(version)
+    if _bundle is None:
+        init_worker()
+    return _bundle
+
+
+def predict_advisory(rows: List[Dict[str, Any]], lang: str = "en", version: Optional[str] = None) -> List[Dict[str, Any]]:
+    bundle = _get_bundle(version)
+    return get_daily_advisory_batch(bundle["irr_model"], bundle["fert_model"], rows, lang=lang)
+
+
+def predict_advisory_json(rows: List[Dict[str, Any]], lang: str = "en", version: Optional[str] = None) -> List[str]:
+    # As predict_advisory, with each result already encoded as a JSON object
+    # (also cheaper to send back from a worker process than dicts).
+    bundle = _get_bundle(version)
+    return get_daily_advisory_json(bundle["irr_model"], bundle["fert_model"], rows, lang=lang)
+
+
+def predict_advisory_parts(rows: List[Dict[str, Any]], version: Optional[str] = None) -> List[tuple]:
+    # Predictions only, for the advisory memo; the text is rendered by the caller.
+    bundle = _get_bundle(version)
+    return infer_advisories(bundle["irr_model"], bundle["fert_model"], rows)
@@ -0,0 +1,293 @@
+import argparse
+import hashlib
+import io
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from metrics import count_inference, span, timed
+
+# A small CPU-only leaf classifier: colour and texture histograms feeding a
+# softmax regression. Training reads a local sample set laid out as
+# <samples_dir>/<label>/*.jpg|png (labels are the DISEASE_DB keys plus "none").
+# Without one, a procedurally generated set of synthetic leaves is used so the
+# service still runs offline. The fitted model is a single .npz of weights
+# and feature scaling, loaded once per worker process.
+
+LABELS = ["rust", "yellow", "blight", "spot", "wilt", "none"]
+INPUT_SIZE = 128
+MODEL_VERSION = 1
+
+MODEL_PATH = Path(
+    os.getenv("MODEL_DIR", Path(__file__).resolve().parent.parent / "artifacts")
+) / "disease_classifier.npz"
+SAMPLES_DIR = os.getenv("DISEASE_SAMPLES_DIR")
+# Largest image (width x height, read from the header) that will be decoded.
+# A small compressed upload can still describe a huge bitmap.
+MAX_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(40_000_000)))
+
+
+class InvalidImageError(ValueError):
+    status_code = 400
+
+
+class ImageTooLarge(InvalidImageError):
+    status_code = 413
+
+
+# ─── Features ──────────────────────────────────────────────────────────────────
+
+@timed("disease.decode")
+def decode_image(source: Union[bytes, str], size: int = INPUT_SIZE) -> Image.Image:
+    # `source` is the encoded bytes or a path to them.
+    try:
+        img = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    except Image.DecompressionBombError as e:
+        # Pillow refuses headers far past its own limit before we can look.
+        raise ImageTooLarge(f"Image too large (max {MAX_PIXELS} pixels).") from e
+    except Exception as e:
+        raise InvalidImageError("Could not decode image.") from e
+    if img.width * img.height > MAX_PIXELS:
+        img.close()
+        raise ImageTooLarge(f"Image too large: {img.width}x{img.height} pixels (max {MAX_PIXELS}).")
+    try:
+        with img:
+            # For JPEGs, draft() makes the decoder downscale by 1/2..1/8 inside the
+            # DCT, so the full-resolution bitmap is never materialised.
+            img.draft("RGB", (size, size))
+            img = img.convert("RGB")
+        # Other formats decode at full size; shrink with a cheap box reduce()
+        # before the final resample so that only one large bitmap ever exists.
+        factor = min(img.width, img.height) // (size * 2)
+        if factor > 1:
+            img = img.reduce(factor)
+    except Exception as e:
+        raise InvalidImageError("Could not decode image.") from e
+    return img.resize((size, size), Image.Resampling.BILINEAR)
+
+
+def _hist(values: np.ndarray, bins: int, upper: float, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    h, _ = np.histogram(values, bins=bins, range=(0, upper), weights=weights)
+    total = h.sum()
+    return h / total if total > 0 else h.astype(np.float64)
+
+
+@timed("disease.features")
+def extract_features(img: Image.Image) -> np.ndarray:
+    hsv = np.asarray(img.convert("HSV"), dtype=np.float64)
+    hue, sat, val = hsv[..., 0].ravel(), hsv[..., 1].ravel(), hsv[..., 2].ravel()
+
+    # Hue only means something for saturated pixels, so weight it by saturation.
+    hue_hist = _hist(hue, 18, 256, weights=sat)
+    sat_hist = _hist(sat, 8, 256)
+    val_hist = _hist(val, 8, 256)
+
+    # Texture: gradient magnitude of the value channel (lesions and pustules
+    # produce sharp local contrast that healthy or uniformly yellow leaves lack).
+    v = hsv[..., 2]
+    grad = np.abs(np.diff(v, axis=0))[:, :-1] + np.abs(np.diff(v, axis=1))[:-1, :]
+    grad_hist = _hist(np.minimum(grad.ravel(), 255), 8, 256)
+
+    dark = np.mean(val < 80)
+    mean_rgb = np.asarray(img, dtype=np.float64).reshape(-1, 3).mean(axis=0) / 255.0
+    return np.concatenate([hue_hist, sat_hist, val_hist, grad_hist, [dark], mean_rgb])
+
+
+# ─── Model ─────────────────────────────────────────────────────────────────────
+
+class SoftmaxClassifier:
+    # Multinomial logistic regression on standardised features, fitted with
+    # plain full-batch gradient descent (the sample sets are small).
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, mean: np.ndarray, scale: np.ndarray, labels: List[str]):
+        self.weights = weights
+        self.bias = bias
+        self.mean = mean
+        self.scale = scale
+        self.labels = labels
+
+    @classmethod
+    def fit(
+        cls, X: np.ndarray, y: np.ndarray, labels: List[str],
+        epochs: int = 500, learning_rate: float = 0.5, l2: float = 1e-3,
+    ) -> "SoftmaxClassifier":
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = (X - mean) / scale
+        targets = np.eye(len(labels))[y]
+        model = cls(np.zeros((X.shape[1], len(labels))), np.zeros(len(labels)), mean, scale, labels)
+        for _ in range(epochs):
+            grad = (model._softmax(Z @ model.weights + model.bias) - targets) / len(Z)
+            model.weights -= learning_rate * (Z.T @ grad + l2 * model.weights)
+            model.bias -= learning_rate * grad.sum(axis=0)
+        return model
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        p = np.exp(logits)
+        return p / p.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        Z = (np.atleast_2d(X) - self.mean) / self.scale
+        return self._softmax(Z @ self.weights + self.bias)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp, weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale,
+            labels=np.array(self.labels), version=MODEL_VERSION,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SoftmaxClassifier":
+        with np.load(path) as data:
+            if int(data["version"]) != MODEL_VERSION:
+                raise ValueError(f"{path} was built for classifier version {int(data['version'])}.")
+            return cls(
+                data["weights"], data["bias"], data["mean"], data["scale"],
+                [str(label) for label in data["labels"]],
+            )
+
+
+# ─── Sample set ────────────────────────────────────────────────────────────────
+
+def _disc_mask(h: int, w: int, cy: float, cx: float, r: float) -> np.ndarray:
+    yy, xx = np.ogrid[:h, :w]
+    return (yy - cy) ** 2 + (xx - cx) ** 2 <= r ** 2
+
+
+def synthetic_leaf(label: str, rng: np.random.Generator, size: int = INPUT_SIZE) -> Image.Image:
+    # Crude but visually distinct stand-ins for each condition: a green leaf on
+    # soil, with the colour and lesion pattern characteristic of the disease.
+    h = w = size
+    img = np.empty((h, w, 3))
+    img[:] = rng.uniform([70, 50, 30], [110, 80, 50])  # soil background
+    yy, xx = np.ogrid[:h, :w]
+    ry, rx = rng.uniform(0.35, 0.48) * h, rng.uniform(0.22, 0.32) * w
+    leaf = ((yy - h / 2) / ry) ** 2 + ((xx - w / 2) / rx) ** 2 <= 1.0
+
+    green = rng.uniform([40, 120, 30], [80, 170, 60])
+    if label == "yellow":
+        green = rng.uniform([190, 180, 50], [230, 215, 90])
+    elif label == "wilt":
+        green = rng.uniform([100, 105, 50], [130, 125, 70])
+    img[leaf] = green
+
+    def spots(n, r_lo, r_hi, color, halo=None):
+        for _ in range(n):
+            cy, cx = rng.uniform(h / 2 - ry * 0.8, h / 2 + ry * 0.8), rng.uniform(w / 2 - rx * 0.8, w / 2 + rx * 0.8)
+            r = rng.uniform(r_lo, r_hi)
+            if halo is not None:
+                img[_disc_mask(h, w, cy, cx, r * 1.6) & leaf] = halo
+            img[_disc_mask(h, w, cy, cx, r) & leaf] = color
+
+    if label == "rust":
+        spots(rng.integers(40, 80), 1.0, 2.5, rng.uniform([190, 95, 20], [225, 130, 50]))
+    elif label == "yellow":
+        spots(rng.integers(6, 12), 4, 9, green * 0.6 + np.array([20, 60, 10]))
+    elif label == "blight":
+        spots(rng.integers(3, 6), 7, 13, rng.uniform([70, 45, 20], [100, 65, 35]), halo=[200, 190, 70])
+    elif label == "spot":
+        spots(rng.integers(20, 40), 1.5, 3.5, rng.uniform([35, 30, 20], [60, 45, 30]))
+    elif label == "wilt":
+        edge = leaf & ~(((yy - h / 2) / (ry * 0.8)) ** 2 + ((xx - w / 2) / (rx * 0.8)) ** 2 <= 1.0)
+        img[edge] = rng.uniform([110, 80, 40], [140, 100, 55])
+
+    img *= rng.uniform(0.8, 1.15)  # lighting
+    img += rng.normal(0, 6, img.shape)
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8))
+
+
+def load_sample_set(samples_dir: Optional[str] = SAMPLES_DIR, per_class: int = 80, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    X, y = [], []
+    if samples_dir and Path(samples_dir).is_dir():
+        for i, label in enumerate(LABELS):
+            for path in sorted((Path(samples_dir) / label).glob("*")):
+                if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp"):
+                    X.append(extract_features(decode_image(path.read_bytes())))
+                    y.append(i)
+        if not X:
+            raise ValueError(f"No labelled images found under {samples_dir}.")
+    else:
+        rng = np.random.default_rng(seed)
+        for i, label in enumerate(LABELS):
+            for _ in range(per_class):
+                # Round-trip through JPEG so training sees the same artefacts as uploads.
+                buf = io.BytesIO()
+                synthetic_leaf(label, rng).save(buf, "JPEG", quality=int(rng.integers(60, 95)))
+                X.append(extract_features(decode_image(buf.getvalue())))
+                y.append(i)
+    return np.array(X), np.array(y)
+
+
+def train_classifier(samples_dir: Optional[str] = SAMPLES_DIR) -> SoftmaxClassifier:
+    X, y = load_sample_set(samples_dir)
+    return SoftmaxClassifier.fit(X, y, LABELS)
+
+
+def model_fingerprint(path: Path = MODEL_PATH) -> str:
+    # Identifies the exact weights in use, e.g. to key cached predictions.
+    return f"v{MODEL_VERSION}-{hashlib.sha256(Path(path).read_bytes()).hexdigest()[:12]}"
+
+
+def load_or_train_classifier(path: Path = MODEL_PATH) -> SoftmaxClassifier:
+    try:
+        return SoftmaxClassifier.load(path)
+    except (FileNotFoundError, ValueError, KeyError):
+        model = train_classifier()
+        model.save(path)
+        return model
+
+
+# ─── Inference ─────────────────────────────────────────────────────────────────
+
+_model: Optional[SoftmaxClassifier] = None
+
+
+def init_worker() -> None:
+    # Pool initializer: load the classifier once per worker. Idempotent, so a
+    # model preloaded before forking (see gunicorn.conf.py) is reused as is.
+    global _model
+    if _model is None:
+        _model = load_or_train_classifier()
+
+
+def classify_image(source: Union[bytes, str]) -> Dict[str, Any]:
+    if _model is None:
+        init_worker()
+    features = extract_features(decode_image(source))
+    with span("disease.predict"):
+        proba = _model.predict_proba(features)[0]
+    count_inference("disease")
+    best = int(np.argmax(proba))
+    return {"label": _model.labels[best], "confidence": round(float(proba[best]), 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the leaf disease classifier.")
+    parser.add_argument("--samples-dir", default=SAMPLES_DIR)
+    parser.add_argument("--out", type=Path, default=MODEL_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    X, y = load_sample_set(args.samples_dir)
+    # Hold out every fifth sample to report accuracy before fitting on everything.
+    holdout = np.arange(len(y)) % 5 == 0
+    probe = SoftmaxClassifier.fit(X[~holdout], y[~holdout], LABELS)
+    accuracy = np.mean(np.argmax(probe.predict_proba(X[holdout]), axis=1) == y[holdout])
+
+    model = SoftmaxClassifier.fit(X, y, LABELS)
+    model.save(args.out)
+    print(f"✅ Wrote {args.out} ({len(y)} samples, holdout accuracy {accuracy:.1%}) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
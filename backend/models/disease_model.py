@@ -1,66 +1,48 @@
-from typing import Dict, Any
-import random
-from translations import DISEASE_DB_TRANS  # Import translations
+from typing import Dict, Any, Union
+from catalog import get_bundle
+from metrics import timed
+from models.disease_classifier import classify_image
 
 DISEASE_DB = {
     "rust": {
-        "confidence": 0.87,
         "severity": "Moderate–High",
     },
     "yellow": {
-        "confidence": 0.81,
         "severity": "Moderate",
     },
     "blight": {
-        "confidence": 0.79,
         "severity": "Moderate",
     },
     "spot": {
-        "confidence": 0.75,
         "severity": "Low–Moderate",
     },
     "wilt": {
-        "confidence": 0.82,
         "severity": "High",
     },
 }
 
-def detect_disease(filename: str, file_size: int = 0, lang: str = "en") -> Dict[str, Any]:
-    filename_lower = filename.lower()
-    lang = lang if lang in ["en", "hi"] else "en"
-    trans_db = DISEASE_DB_TRANS.get(lang, DISEASE_DB_TRANS["en"])
+@timed("disease.render")
+def render_disease_result(prediction: Dict[str, Any], lang: str = "en") -> Dict[str, Any]:
+    # Turns a language-neutral prediction ({"label", "confidence"}) into the
+    # localized response, so cached predictions can serve every language.
+    trans_db = get_bundle(lang).disease
 
-    for keyword, base_data in DISEASE_DB.items():
-        if keyword in filename_lower:
-            trans_data = trans_db.get(keyword, trans_db["none"])
-            return {
-                **base_data,
-                "disease_detected": trans_data["disease_detected"],
-                "recommendation": trans_data["recommendation"],
-                "prevention": trans_data["prevention"],
-                "analysis_method": "MVP Pattern Analysis (filename-based)"
-            }
+    disease_key = prediction["label"]
+    trans_data = trans_db.get(disease_key, trans_db["none"])
+    base_data = DISEASE_DB.get(disease_key, {"severity": "None"})
 
-    # Simulate slight randomness for demo realism
-    if file_size > 0 and file_size % 7 == 0:
-        disease_key = random.choice(list(DISEASE_DB.keys()))
-        base_data = DISEASE_DB[disease_key]
-        trans_data = trans_db.get(disease_key)
-        return {
-            **base_data,
-            "disease_detected": trans_data["disease_detected"],
-            "recommendation": trans_data["recommendation"],
-            "prevention": trans_data["prevention"],
-            "confidence": round(base_data["confidence"] - 0.15, 2),
-            "analysis_method": "MVP Pattern Analysis (image-based placeholder)",
-        }
-
-    healthy = trans_db["none"]
     return {
-        "disease_detected": healthy["disease_detected"],
-        "confidence": 0.92,
-        "severity": "None",
-        "recommendation": healthy["recommendation"],
-        "prevention": healthy["prevention"],
-        "analysis_method": "MVP Pattern Analysis (image-based placeholder)"
-    }
\ No newline at end of file
+        **base_data,
+        "disease_detected": trans_data["disease_detected"],
+        "confidence": prediction["confidence"],
+        "recommendation": trans_data["recommendation"],
+        "prevention": trans_data["prevention"],
+        "analysis_method": "Colour/texture histogram classifier",
+    }
+
+
+def detect_disease(image: Union[bytes, str], lang: str = "en") -> Dict[str, Any]:
+    # `image` is the encoded bytes or a path to the uploaded file. CPU-bound
+    # (decode + features + classifier); main.py runs classify_image in a
+    # process pool and renders the result itself.
+    return render_disease_result(classify_image(image), lang)
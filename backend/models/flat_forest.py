@@ -0,0 +1,160 @@
+import json
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# A fitted RandomForestClassifier flattened into a handful of contiguous arrays
+# so it can be evaluated without sklearn (no input validation, no joblib
+# dispatch). Every tree's nodes are concatenated into one table and leaves point
+# at themselves, so traversal is a few rounds of gather + compare over all
+# (row, tree) pairs at once.
+#
+# Results are bit-identical to RandomForestClassifier.predict_proba: inputs are
+# cast to float32 like sklearn's tree code, leaf values are normalised per tree
+# the same way, and per-tree probabilities are summed in estimator order before
+# dividing by the number of trees.
+
+ARRAY_FIELDS = ["feature", "threshold", "left", "right", "value", "roots"]
+
+
+class FlatForest:
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        classes: np.ndarray,
+        max_depth: int,
+        n_features: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba.
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=int(max_depth),
+            n_features=int(model.n_features_in_),
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected input of shape (n, {self.n_features_in_}), got {X.shape}."
+            )
+        n_rows, n_features = X.shape
+        # Work on one flat (row, tree) axis with 1-D np.take, which is much cheaper
+        # than 2-D fancy indexing, and drop pairs as soon as they reach a leaf.
+        flat_X = X.ravel()
+        leaves = np.tile(self.roots.astype(np.intp), n_rows)
+        active = np.arange(leaves.size)
+        nodes = leaves.copy()
+        row_base = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        while active.size:
+            go_left = np.take(flat_X, row_base + np.take(self.feature, nodes)) <= np.take(self.threshold, nodes)
+            next_nodes = np.where(go_left, np.take(self.left, nodes), np.take(self.right, nodes))
+            leaves[active] = next_nodes
+            moving = next_nodes != nodes
+            active, nodes, row_base = active[moving], next_nodes[moving], row_base[moving]
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaf_values = np.take(self.value, self.apply(X), axis=0)  # (n_rows, n_trees, n_classes)
+        # cumsum accumulates strictly in tree order, like sklearn's += loop;
+        # a plain sum() would use pairwise summation and drift in the last ulp.
+        proba = np.cumsum(leaf_values, axis=1)[:, -1, :]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ─── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, directory: Path, name: str) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for field in ARRAY_FIELDS:
+            np.save(directory / f"{name}.{field}.npy", getattr(self, field))
+        np.save(directory / f"{name}.classes.npy", self.classes_)
+        meta = {"max_depth": self.max_depth, "n_features": self.n_features_in_}
+        with open(directory / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: Path, name: str, mmap_mode: Optional[str] = "r") -> "FlatForest":
+        directory = Path(directory)
+        with open(directory / f"{name}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays: Dict[str, Any] = {
+            field: np.load(directory / f"{name}.{field}.npy", mmap_mode=mmap_mode)
+            for field in ARRAY_FIELDS
+        }
+        return cls(
+            **arrays,
+            classes=np.load(directory / f"{name}.classes.npy"),
+            max_depth=meta["max_depth"],
+            n_features=meta["n_features"],
+        )
+
+
+def check_equivalence(model, flat: FlatForest, X: np.ndarray) -> float:
+    # Returns the max absolute difference (0.0 when bit-identical).
+    expected = model.predict_proba(X)
+    actual = flat.predict_proba(X)
+    if expected.shape != actual.shape:
+        raise ValueError(f"Shape mismatch: sklearn {expected.shape}, flat {actual.shape}.")
+    if np.array_equal(expected, actual):
+        return 0.0
+    return float(np.max(np.abs(expected - actual)))
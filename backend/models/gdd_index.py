@@ -0,0 +1,128 @@
+import copy
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# Prefix sums over one location's daily temperature series.
+#
+# For every base temperature in use, cumulative[b][i] holds the GDD accumulated
+# over days [first, first + i), so the GDD between any two days is
+# cumulative[b][end + 1] - cumulative[b][start]: two lookups instead of a scan,
+# and a vectorized gather for a whole batch of plots. Days with a missing
+# reading contribute nothing, matching accumulate_gdd.
+#
+# Days are plain integers (days since 1970-01-01) so callers can index with
+# NumPy arrays directly.
+
+
+def _prefix(values: np.ndarray, carry: float = 0.0) -> np.ndarray:
+    return carry + np.cumsum(values, dtype=np.float64)
+
+
+class GDDIndex:
+    # Never changed once built, so readers need no lock: extended() and
+    # synced() return a new index (sharing nothing that is later written), and
+    # WeatherCache swaps it in under the cell lock. A base temperature's prefix
+    # sum added on first use replaces the dict rather than modifying it.
+    def __init__(self, first_day: int, tmax: np.ndarray, tmin: np.ndarray, base_temps: Iterable[float] = ()):
+        self.first_day = int(first_day)
+        self._avg = np.empty(0, dtype=np.float64)
+        self._tmax = np.empty(0, dtype=np.float64)
+        self._tmin = np.empty(0, dtype=np.float64)
+        self.cumulative: Dict[float, np.ndarray] = {float(b): np.zeros(1) for b in base_temps}
+        self._sums = {name: np.zeros(1) for name in ("tmax", "tmin", "count")}
+        self._append(tmax, tmin)
+
+    @property
+    def n_days(self) -> int:
+        return len(self._avg)
+
+    @property
+    def last_day(self) -> int:
+        return self.first_day + self.n_days - 1
+
+    def _append(self, tmax: np.ndarray, tmin: np.ndarray) -> None:
+        # Only for an index no reader has yet; every array is replaced, never
+        # written in place, so a shallow copy can be appended to safely.
+        tmax = np.asarray(tmax, dtype=np.float64)
+        tmin = np.asarray(tmin, dtype=np.float64)
+        avg = (tmax + tmin) / 2
+        valid = ~np.isnan(avg)
+
+        self._avg = np.concatenate([self._avg, avg])
+        self._tmax = np.concatenate([self._tmax, tmax])
+        self._tmin = np.concatenate([self._tmin, tmin])
+        for base, cum in self.cumulative.items():
+            self.cumulative[base] = np.concatenate([cum, _prefix(self._daily_gdd(avg, base), cum[-1])])
+        for name, daily in (("tmax", np.where(valid, tmax, 0.0)),
+                            ("tmin", np.where(valid, tmin, 0.0)),
+                            ("count", valid.astype(np.float64))):
+            cum = self._sums[name]
+            self._sums[name] = np.concatenate([cum, _prefix(daily, cum[-1])])
+
+    def extended(self, tmax: np.ndarray, tmin: np.ndarray) -> "GDDIndex":
+        # A new index with days appended after last_day; only the new tail is summed.
+        index = copy.copy(self)
+        index.cumulative = dict(self.cumulative)
+        index._sums = dict(self._sums)
+        index._append(tmax, tmin)
+        return index
+
+    def synced(self, first_day: int, tmax: np.ndarray, tmin: np.ndarray) -> "GDDIndex":
+        # The index for a (possibly grown) cached series: this one if nothing
+        # changed, new days at the end appended, anything else (e.g. history
+        # prepended) rebuilt.
+        if first_day == self.first_day and len(tmax) >= self.n_days:
+            if len(tmax) > self.n_days:
+                return self.extended(tmax[self.n_days:], tmin[self.n_days:])
+            return self
+        return GDDIndex(first_day, tmax, tmin, self.cumulative.keys())
+
+    @staticmethod
+    def _daily_gdd(avg: np.ndarray, base: float) -> np.ndarray:
+        return np.nan_to_num(np.maximum(avg - base, 0), nan=0.0)
+
+    def _cumulative_for(self, base_temp: float) -> np.ndarray:
+        base = float(base_temp)
+        if base not in self.cumulative:
+            # New crop base temperatures get their own prefix sum on first use.
+            cum = np.concatenate([[0.0], _prefix(self._daily_gdd(self._avg, base))])
+            self.cumulative = {**self.cumulative, base: cum}
+            return cum
+        return self.cumulative[base]
+
+    def _bounds(self, start_day, end_day):
+        # Clips [start, end] (inclusive) to the indexed range -> half-open offsets.
+        lo = np.clip(np.asarray(start_day) - self.first_day, 0, self.n_days)
+        hi = np.clip(np.asarray(end_day) - self.first_day + 1, lo, self.n_days)
+        return lo, hi
+
+    def accumulated(self, base_temp: float, start_day, end_day):
+        # Scalars in, float out; arrays in, array out (one entry per plot).
+        cum = self._cumulative_for(base_temp)
+        lo, hi = self._bounds(start_day, end_day)
+        return cum[hi] - cum[lo]
+
+    def temperatures(self, start_day: int, end_day: int):
+        # -> (tmax, tmin) for every day in [start, end]; NaN outside the index.
+        n = max(end_day - start_day + 1, 0)
+        tmax, tmin = np.full(n, np.nan), np.full(n, np.nan)
+        lo, hi = (int(b) for b in self._bounds(start_day, end_day))
+        at = self.first_day + lo - start_day
+        tmax[at:at + hi - lo] = self._tmax[lo:hi]
+        tmin[at:at + hi - lo] = self._tmin[lo:hi]
+        return tmax, tmin
+
+    def summary(self, base_temp: float, start_day: int, end_day: int) -> Optional[Dict[str, float]]:
+        lo, hi = self._bounds(start_day, end_day)
+        lo, hi = int(lo), int(hi)
+        count = self._sums["count"][hi] - self._sums["count"][lo]
+        if hi <= lo:
+            return None
+        cum = self._cumulative_for(base_temp)
+        return {
+            "accumulated_gdd": float(cum[hi] - cum[lo]),
+            "avg_tmax": float((self._sums["tmax"][hi] - self._sums["tmax"][lo]) / max(count, 1)),
+            "avg_tmin": float((self._sums["tmin"][hi] - self._sums["tmin"][lo]) / max(count, 1)),
+            "days": hi - lo,
+        }
@@ -1,6 +1,11 @@
 from datetime import date, datetime
-from typing import Dict, Any
-from translations import FERTILIZER_WINDOWS, RISK_ALERTS  # Import translations
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from json import dumps
+from catalog import get_bundle
+from json_fragments import encode_string, json_constant, json_number
+from metrics import count_inference, timed
 
 CROP_STAGES = {
     "wheat": [
@@ -51,29 +56,105 @@ IRRIGATION_SCHEDULE = {
     "Maturity": 10,
 }
 
+STAGE_BASES = ["days", "gdd"]
+
+
+class CropCalendar:
+    # One crop's CROP_STAGES compiled into dense lookup tables, so resolving the
+    # current stage (for one plan or a whole batch) is a single index:
+    #   stage_by_day[days since sowing]  and  stage_by_gdd[whole accumulated GDD]
+    # Indices past the end of a table clamp to its last entry (Maturity).
+    def __init__(self, crop_type: str, stages: list):
+        self.crop_type = crop_type
+        self.display_name = crop_type.capitalize()
+        self.base_temp = BASE_TEMPS.get(crop_type, 5)
+        self.stage_names = [s["name"] for s in stages]
+        self.irrigation_intervals = [IRRIGATION_SCHEDULE.get(name, 7) for name in self.stage_names]
+
+        # Days between two stage windows belong to the stage that started last
+        # (e.g. wheat days 8–14 are still Germination, 41–44 still Tillering);
+        # where windows share a boundary day, the earlier stage keeps it.
+        by_day = np.zeros(max(s["end"] for s in stages) + 2, dtype=np.uint8)
+        for i, s in enumerate(stages):
+            by_day[s["start"]:] = i
+        for i in reversed(range(len(stages))):
+            by_day[stages[i]["start"]:stages[i]["end"] + 1] = i
+        self.stage_by_day = by_day
+
+        # base_gdd is the accumulated GDD by which a stage is complete, so a plot
+        # with g GDD is in the first stage whose base_gdd is still above g.
+        thresholds = np.array([s["base_gdd"] for s in stages])
+        self.stage_thresholds = thresholds.astype(np.float64)
+        self.stage_by_gdd = np.minimum(
+            np.searchsorted(thresholds, np.arange(thresholds.max() + 1), side="right"),
+            len(stages) - 1,
+        ).astype(np.uint8)
+
+        # Identical in every response for this crop; shared, do not mutate.
+        self.all_stages = tuple(
+            {"name": s["name"], "start_day": s["start"], "end_day": s["end"]}
+            for s in stages
+        )
+        self.all_stages_json = dumps(list(self.all_stages), ensure_ascii=False, separators=(",", ":"))
+
+    def stage_index(self, days_since_sowing: int) -> int:
+        return int(self.stage_by_day[min(max(days_since_sowing, 0), len(self.stage_by_day) - 1)])
+
+    def stage_index_by_gdd(self, accumulated_gdd: float) -> int:
+        return int(self.stage_by_gdd[min(max(int(accumulated_gdd), 0), len(self.stage_by_gdd) - 1)])
+
+    def stage_indices(self, days_since_sowing: np.ndarray) -> np.ndarray:
+        return self.stage_by_day[np.clip(days_since_sowing, 0, len(self.stage_by_day) - 1)]
+
+    def stage_indices_by_gdd(self, accumulated_gdd: np.ndarray) -> np.ndarray:
+        gdd = np.floor(np.nan_to_num(accumulated_gdd)).astype(np.int64)
+        return self.stage_by_gdd[np.clip(gdd, 0, len(self.stage_by_gdd) - 1)]
+
+
+CALENDARS = {crop: CropCalendar(crop, stages) for crop, stages in CROP_STAGES.items()}
+
+
+def get_calendar(crop_type: str) -> CropCalendar:
+    # Unknown crops are planned as wheat, as before.
+    return CALENDARS.get(crop_type, CALENDARS["wheat"])
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
 def calculate_gdd(tmax: float, tmin: float, base_temp: float) -> float:
     avg_temp = (tmax + tmin) / 2
     return max(0, avg_temp - base_temp)
 
 
-def get_growth_plan(
+def accumulate_gdd(tmax: np.ndarray, tmin: np.ndarray, base_temp: float) -> float:
+    # Vectorized calculate_gdd summed over a daily series; days with a missing
+    # reading (NaN) contribute nothing.
+    avg_temp = (np.asarray(tmax, dtype=np.float64) + np.asarray(tmin, dtype=np.float64)) / 2
+    return float(np.nansum(np.maximum(avg_temp - base_temp, 0)))
+
+
+def _plan_fields(
     crop_type: str,
     sowing_date: str,
-    city: str,
     tmax: float,
     tmin: float,
-    accumulated_gdd: float = None,
-    lang: str = "en",
-) -> Dict[str, Any]:
+    accumulated_gdd: Optional[float],
+    lang: str,
+    stage_basis: str,
+) -> tuple:
+    # -> (calendar, crop display name, stage, days since sowing, accumulated GDD,
+    #     daily GDD, next irrigation in days, fertilizer text, risk text)
+    count_inference("growth_plan")
     crop_type = crop_type.lower()
-    stages = CROP_STAGES.get(crop_type, CROP_STAGES["wheat"])
-    base_temp = BASE_TEMPS.get(crop_type, 5)
+    calendar = get_calendar(crop_type)
+    base_temp = calendar.base_temp
 
-    lang = lang if lang in ["en", "hi"] else "en"
-    trans_fert = FERTILIZER_WINDOWS.get(lang, FERTILIZER_WINDOWS["en"])
-    trans_risk = RISK_ALERTS.get(lang, RISK_ALERTS["en"])
+    trans = get_bundle(lang)
 
-    sow_dt = datetime.strptime(sowing_date, "%Y-%m-%d").date()
+    sow_dt = parse_date(sowing_date)
     today = date.today()
     days_since_sowing = (today - sow_dt).days
 
@@ -82,24 +163,20 @@ def get_growth_plan(
     if accumulated_gdd is None:
         accumulated_gdd = max(0, daily_gdd * days_since_sowing)
 
-    # Determine current stage
-    current_stage = stages[-1]["name"]
-    for stage in stages:
-        if stage["start"] <= days_since_sowing <= stage["end"]:
-            current_stage = stage["name"]
-            break
-        elif days_since_sowing < stage["start"]:
-            current_stage = stages[0]["name"]
-            break
+    # Determine current stage, by calendar day or by thermal time
+    if stage_basis == "gdd":
+        stage_idx = calendar.stage_index_by_gdd(accumulated_gdd)
+    else:
+        stage_idx = calendar.stage_index(days_since_sowing)
+    current_stage = calendar.stage_names[stage_idx]
 
     # GDD-based acceleration/delay
-    expected_gdd_at_day = daily_gdd * days_since_sowing if days_since_sowing > 0 else 0
     avg_daily_gdd = accumulated_gdd / max(days_since_sowing, 1)
     expected_avg = 15.0  # avg expected GDD/day for reference
     gdd_ratio = avg_daily_gdd / expected_avg if expected_avg > 0 else 1.0
 
     # Irrigation
-    stage_irrigation_interval = IRRIGATION_SCHEDULE.get(current_stage, 7)
+    stage_irrigation_interval = calendar.irrigation_intervals[stage_idx]
     # Adjust for temperature
     if tmax > 35:
         stage_irrigation_interval = max(3, stage_irrigation_interval - 2)
@@ -109,32 +186,157 @@ def get_growth_plan(
     next_irrigation = stage_irrigation_interval - days_last_irrigation
 
     # Fertilizer
-    # Check if we have specific translation for the stage, otherwise fallback to default
-    fert_rec = trans_fert.get(current_stage, trans_fert.get("default", "No fertilizer required"))
+    fert_rec = trans.fert_window(current_stage)
 
     # Risk alert
-    risk_alert = None
     if tmax > 38:
-        risk_alert = trans_risk.get("heat_stress")
+        risk_alert = trans.heat_stress
     elif tmin < base_temp + 2:
-        risk_alert = trans_risk.get("temp_threshold", "").format(stage=current_stage)
+        risk_alert = trans.temp_threshold_alert(current_stage)
     elif gdd_ratio > 1.3:
-        risk_alert = trans_risk.get("warmer_season")
+        risk_alert = trans.warmer_season
     else:
-        risk_alert = trans_risk.get("normal")
+        risk_alert = trans.normal
 
+    return (
+        calendar,
+        calendar.display_name if crop_type in CALENDARS else crop_type.capitalize(),
+        current_stage,
+        max(0, days_since_sowing),
+        round(accumulated_gdd, 1),
+        round(daily_gdd, 1),
+        max(1, next_irrigation),
+        fert_rec,
+        risk_alert,
+    )
+
+
+@timed("growth.plan")
+def get_growth_plan(
+    crop_type: str,
+    sowing_date: str,
+    city: str,
+    tmax: float,
+    tmin: float,
+    accumulated_gdd: float = None,
+    lang: str = "en",
+    stage_basis: str = "days",
+) -> Dict[str, Any]:
+    calendar, display_name, stage, days, acc_gdd, daily_gdd, next_irrigation, fert_rec, risk_alert = _plan_fields(
+        crop_type, sowing_date, tmax, tmin, accumulated_gdd, lang, stage_basis
+    )
     return {
-        "crop_type": crop_type.capitalize(),
+        "crop_type": display_name,
         "city": city,
-        "current_stage": current_stage,
-        "days_since_sowing": max(0, days_since_sowing),
-        "accumulated_gdd": round(accumulated_gdd, 1),
-        "daily_gdd": round(daily_gdd, 1),
-        "next_irrigation_in_days": max(1, next_irrigation),
+        "current_stage": stage,
+        "days_since_sowing": days,
+        "accumulated_gdd": acc_gdd,
+        "daily_gdd": daily_gdd,
+        "next_irrigation_in_days": next_irrigation,
         "fertilizer_recommendation": fert_rec,
         "risk_alert": risk_alert,
-        "all_stages": [
-            {"name": s["name"], "start_day": s["start"], "end_day": s["end"]}
-            for s in stages
-        ],
-    }
\ No newline at end of file
+        "all_stages": calendar.all_stages,
+    }
+
+
+@timed("growth.plan")
+def get_growth_plan_json(
+    crop_type: str,
+    sowing_date: str,
+    city: str,
+    tmax: float,
+    tmin: float,
+    accumulated_gdd: float = None,
+    lang: str = "en",
+    stage_basis: str = "days",
+) -> str:
+    # get_growth_plan encoded as a JSON object (byte-for-byte what
+    # json.dumps(ensure_ascii=False, compact) gives). Catalog sentences, stage
+    # names and the stage table are pre-encoded constants; only the city and
+    # the numbers are encoded per request.
+    calendar, display_name, stage, days, acc_gdd, daily_gdd, next_irrigation, fert_rec, risk_alert = _plan_fields(
+        crop_type, sowing_date, tmax, tmin, accumulated_gdd, lang, stage_basis
+    )
+    return (
+        '{"crop_type":' + (json_constant(display_name) if display_name == calendar.display_name
+                           else encode_string(display_name))
+        + ',"city":' + encode_string(city)
+        + ',"current_stage":' + json_constant(stage)
+        + ',"days_since_sowing":' + repr(days)
+        + ',"accumulated_gdd":' + json_number(acc_gdd)
+        + ',"daily_gdd":' + json_number(daily_gdd)
+        + ',"next_irrigation_in_days":' + repr(next_irrigation)
+        + ',"fertilizer_recommendation":' + json_constant(fert_rec)
+        + ',"risk_alert":' + json_constant(risk_alert)
+        + ',"all_stages":' + calendar.all_stages_json + "}"
+    )
+
+
+@timed("growth.plan_batch")
+def get_growth_plan_batch(
+    plots: Sequence[Dict[str, Any]],
+    lang: str = "en",
+    today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    # Same plans as get_growth_plan for each plot (keys as its arguments), but
+    # computed per crop group with array operations. Results keep input order.
+    count_inference("growth_plan", len(plots))
+    trans = get_bundle(lang)
+    today_ord = (today or date.today()).toordinal()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(plots)
+
+    groups: Dict[str, List[int]] = {}
+    for i, plot in enumerate(plots):
+        groups.setdefault(get_calendar(plot["crop_type"].lower()).crop_type, []).append(i)
+
+    for crop, idx in groups.items():
+        calendar = CALENDARS[crop]
+        rows = [plots[i] for i in idx]
+        tmax = np.array([p["tmax"] for p in rows], dtype=np.float64)
+        tmin = np.array([p["tmin"] for p in rows], dtype=np.float64)
+        days = today_ord - np.array([parse_date(p["sowing_date"]).toordinal() for p in rows], dtype=np.int64)
+        given_gdd = np.array(
+            [np.nan if p.get("accumulated_gdd") is None else p["accumulated_gdd"] for p in rows],
+            dtype=np.float64,
+        )
+        by_gdd = np.array([p.get("stage_basis", "days") == "gdd" for p in rows])
+
+        daily_gdd = np.maximum((tmax + tmin) / 2 - calendar.base_temp, 0)
+        accumulated = np.where(np.isnan(given_gdd), np.maximum(daily_gdd * days, 0), given_gdd)
+
+        stage_idx = np.where(
+            by_gdd, calendar.stage_indices_by_gdd(accumulated), calendar.stage_indices(days)
+        )
+        gdd_ratio = accumulated / np.maximum(days, 1) / 15.0
+
+        interval = np.array(calendar.irrigation_intervals)[stage_idx]
+        interval = np.where(tmax > 35, np.maximum(3, interval - 2), np.where(tmax < 20, interval + 2, interval))
+        next_irrigation = np.maximum(interval - np.mod(days, interval), 1)
+
+        # 0 heat stress, 1 near base temperature, 2 warm season, 3 normal
+        risk = np.select(
+            [tmax > 38, tmin < calendar.base_temp + 2, gdd_ratio > 1.3], [0, 1, 2], default=3
+        )
+
+        fert_by_stage = [trans.fert_window(name) for name in calendar.stage_names]
+        risk_by_stage = [
+            [trans.heat_stress, trans.temp_threshold_alert(name), trans.warmer_season, trans.normal]
+            for name in calendar.stage_names
+        ]
+        for j, (i, s, r, d, acc, dg, nxt) in enumerate(zip(
+            idx, stage_idx.tolist(), risk.tolist(), days.tolist(),
+            accumulated.tolist(), daily_gdd.tolist(), next_irrigation.tolist(),
+        )):
+            results[i] = {
+                "crop_type": rows[j]["crop_type"].capitalize(),
+                "city": rows[j]["city"],
+                "current_stage": calendar.stage_names[s],
+                "days_since_sowing": max(0, d),
+                "accumulated_gdd": round(acc, 1),
+                "daily_gdd": round(dg, 1),
+                "next_irrigation_in_days": nxt,
+                "fertilizer_recommendation": fert_by_stage[s],
+                "risk_alert": risk_by_stage[s][r],
+                "all_stages": calendar.all_stages,
+            }
+    return results
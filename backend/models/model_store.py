@@ -0,0 +1,361 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from models.advisory_model import FEATURES, TRAINING_CONFIG
+from models.flat_forest import FlatForest, check_equivalence
+
+# Trained advisory forests are persisted as a joblib bundle plus a small JSON
+# manifest. The manifest records a fingerprint of TRAINING_CONFIG (and the
+# sklearn version, since pickled trees are not portable across releases) and
+# the sha256 of the bundle, so the app can tell a missing or stale artifact
+# from a usable one without unpickling anything.
+#
+# Serving with the default "flat" backend needs numpy only: joblib, sklearn and
+# the training code (pandas) are imported lazily, when building or unpickling
+# the sklearn bundle.
+#
+# Every build also gets its own advisory-<version>.manifest.json. The main
+# manifest is the pointer to the version being served; it is swapped with
+# os.replace and keeps a short history of earlier versions for rollback.
+# Running servers poll it (ActiveModel), so a promotion or rollback takes
+# effect without a restart.
+
+MODEL_DIR = Path(os.getenv("MODEL_DIR", Path(__file__).resolve().parent.parent / "artifacts"))
+MANIFEST_NAME = "advisory_manifest.json"
+
+# "flat" serves the exported FlatForest arrays (bit-identical, no sklearn import);
+# "sklearn" unpickles the forests; "lattice" serves the forests tabulated on a
+# grid (approximate, see models/prob_lattice.py).
+ADVISORY_BACKEND = os.getenv("ADVISORY_BACKEND", "flat")
+# Read from package metadata rather than sklearn.__version__, so the staleness
+# check does not import sklearn.
+SKLEARN_VERSION = package_version("scikit-learn")
+MODEL_NAMES = ["irr_model", "fert_model"]
+EQUIVALENCE_CORPUS_SIZE = 20_000
+# Earlier versions kept in the pointer for rollback.
+HISTORY_LIMIT = 10
+# How often a server re-reads the pointer to pick up promotions and rollbacks.
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "5"))
+# Longest wait between retries of a version that failed to load.
+LOAD_RETRY_CAP_SECONDS = 300.0
+
+
+def config_fingerprint(config: Dict[str, Any] = TRAINING_CONFIG) -> str:
+    payload = json.dumps(
+        {"config": config, "sklearn": SKLEARN_VERSION}, sort_keys=True
+    ).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def file_sha256(*paths: Path) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _flat_files(flat_dir: Path):
+    return sorted(p for p in Path(flat_dir).iterdir() if p.is_file())
+
+
+def read_manifest(model_dir: Path = MODEL_DIR) -> Optional[Dict[str, Any]]:
+    path = Path(model_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def version_manifest_path(version: str, model_dir: Path = MODEL_DIR) -> Path:
+    return Path(model_dir) / f"advisory-{version}.manifest.json"
+
+
+def write_version_manifest(manifest: Dict[str, Any], model_dir: Path = MODEL_DIR) -> None:
+    _write_json_atomic(version_manifest_path(manifest["version"], model_dir), manifest)
+
+
+def read_version_manifest(version: str, model_dir: Path = MODEL_DIR) -> Dict[str, Any]:
+    path = version_manifest_path(version, model_dir)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    # Artifacts built before per-version manifests only have the pointer.
+    current = read_manifest(model_dir)
+    if current is not None and current["version"] == version:
+        return {k: v for k, v in current.items() if k != "history"}
+    raise FileNotFoundError(f"No advisory model version {version} in {model_dir}.")
+
+
+def is_stale(manifest: Optional[Dict[str, Any]], model_dir: Path = MODEL_DIR) -> bool:
+    if manifest is None:
+        return True
+    if manifest.get("fingerprint") != config_fingerprint():
+        return True
+    if "flat_dir" not in manifest or not (Path(model_dir) / manifest["flat_dir"]).is_dir():
+        return True
+    return not (Path(model_dir) / manifest["file"]).exists()
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def export_flat(models: Dict[str, Any], flat_dir: Path) -> Dict[str, float]:
+    # Exported arrays must reproduce sklearn exactly; refuse to write them otherwise.
+    from models.advisory_training import generate_synthetic_data
+
+    corpus = generate_synthetic_data(EQUIVALENCE_CORPUS_SIZE, seed=TRAINING_CONFIG["seed"] + 1)
+    X = corpus[FEATURES].values
+    drift = {}
+    for name, model in models.items():
+        flat = FlatForest.from_sklearn(model)
+        drift[name] = check_equivalence(model, flat, X)
+        if drift[name] != 0.0:
+            raise ValueError(f"Flat export of {name} differs from sklearn by {drift[name]}.")
+        flat.save(flat_dir, name)
+    return drift
+
+
+def promote(manifest: Dict[str, Any], model_dir: Path = MODEL_DIR) -> Dict[str, Any]:
+    # Points the main manifest at `manifest`'s version, pushing the one it
+    # replaces onto the history.
+    model_dir = Path(model_dir)
+    current = read_manifest(model_dir)
+    history = []
+    if current is not None:
+        history = current.get("history", [])
+        if current["version"] != manifest["version"]:
+            if not version_manifest_path(current["version"], model_dir).exists():
+                write_version_manifest({k: v for k, v in current.items() if k != "history"}, model_dir)
+            history = (history + [current["version"]])[-HISTORY_LIMIT:]
+    pointer = {**manifest, "history": [v for v in history if v != manifest["version"]]}
+    _write_json_atomic(model_dir / MANIFEST_NAME, pointer)
+    return pointer
+
+
+def rollback(model_dir: Path = MODEL_DIR) -> Dict[str, Any]:
+    # Re-points the main manifest at the most recent earlier version.
+    model_dir = Path(model_dir)
+    current = read_manifest(model_dir)
+    if current is None or not current.get("history"):
+        raise ValueError("No earlier advisory model version to roll back to.")
+    *history, previous = current["history"]
+    pointer = {**read_version_manifest(previous, model_dir), "history": history}
+    _write_json_atomic(model_dir / MANIFEST_NAME, pointer)
+    return pointer
+
+
+def save_bundle(
+    irr_model,
+    fert_model,
+    model_dir: Path = MODEL_DIR,
+    make_current: bool = True,
+    training: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    # Writes a new versioned artifact. With make_current=False it is only a
+    # candidate until promote() is called on the returned manifest.
+    import joblib
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint = config_fingerprint()
+
+    tmp_path = model_dir / f".advisory-{fingerprint}-{os.getpid()}.joblib.tmp"
+    joblib.dump(
+        {"irr_model": irr_model, "fert_model": fert_model, "config": TRAINING_CONFIG},
+        tmp_path,
+    )
+    sha = file_sha256(tmp_path)
+    version = f"{fingerprint}-{sha[:8]}"
+    filename = f"advisory-{version}.joblib"
+    os.replace(tmp_path, model_dir / filename)
+
+    flat_dirname = f"advisory-{version}.flat"
+    export_flat({"irr_model": irr_model, "fert_model": fert_model}, model_dir / flat_dirname)
+
+    manifest = {
+        "version": version,
+        "fingerprint": fingerprint,
+        "sha256": sha,
+        "file": filename,
+        "flat_dir": flat_dirname,
+        "flat_sha256": file_sha256(*_flat_files(model_dir / flat_dirname)),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sklearn_version": SKLEARN_VERSION,
+        "config": TRAINING_CONFIG,
+        "training": training or {"data": "synthetic", "seed": TRAINING_CONFIG["seed"]},
+    }
+    write_version_manifest(manifest, model_dir)
+    return promote(manifest, model_dir) if make_current else manifest
+
+
+def load_bundle(
+    manifest: Dict[str, Any],
+    model_dir: Path = MODEL_DIR,
+    verify: bool = True,
+    backend: str = ADVISORY_BACKEND,
+) -> Dict[str, Any]:
+    if backend == "flat":
+        flat_dir = Path(model_dir) / manifest["flat_dir"]
+        if verify and file_sha256(*_flat_files(flat_dir)) != manifest["flat_sha256"]:
+            raise ValueError(f"Flat model arrays in {flat_dir} do not match their manifest hash.")
+        bundle = {name: FlatForest.load(flat_dir, name) for name in MODEL_NAMES}
+    elif backend == "sklearn":
+        path = Path(model_dir) / manifest["file"]
+        if verify and file_sha256(path) != manifest["sha256"]:
+            raise ValueError(f"Model artifact {path} does not match its manifest hash.")
+        import joblib
+
+        # mmap_mode maps the tree node arrays straight from the page cache instead of
+        # copying them onto the heap, so repeated cold starts stay cheap.
+        bundle = joblib.load(path, mmap_mode="r")
+    elif backend == "lattice":
+        from models.prob_lattice import load_lattice
+
+        bundle = load_lattice(manifest, model_dir, verify=verify)
+    else:
+        raise ValueError(f"Unknown ADVISORY_BACKEND {backend!r}; use 'sklearn', 'flat' or 'lattice'.")
+    bundle["version"] = manifest["version"]
+    bundle["backend"] = backend
+    return bundle
+
+
+def load_version(version: str, model_dir: Path = MODEL_DIR, backend: str = ADVISORY_BACKEND) -> Dict[str, Any]:
+    return load_bundle(read_version_manifest(version, model_dir), model_dir, backend=backend)
+
+
+def train_and_save(model_dir: Path = MODEL_DIR) -> Dict[str, Any]:
+    from models.advisory_training import train_advisory_models
+
+    irr_model, fert_model = train_advisory_models()
+    return save_bundle(irr_model, fert_model, model_dir)
+
+
+def ensure_artifact(
+    model_dir: Path = MODEL_DIR, allow_train: bool = True, backend: str = ADVISORY_BACKEND
+) -> Dict[str, Any]:
+    # Returns the manifest of an up-to-date artifact, training one if needed,
+    # without loading the models into this process.
+    manifest = read_manifest(model_dir)
+    if is_stale(manifest, model_dir):
+        if not allow_train:
+            raise FileNotFoundError(
+                f"No up-to-date advisory model artifact in {model_dir}. "
+                "Run `python -m models.model_store` to build one."
+            )
+        print("🌱 Advisory model artifact missing or stale, training on synthetic data...")
+        manifest = train_and_save(model_dir)
+    if backend == "lattice":
+        from models.prob_lattice import ensure_lattice
+
+        ensure_lattice(manifest, model_dir)
+    return manifest
+
+
+def load_or_train(
+    model_dir: Path = MODEL_DIR, allow_train: bool = True, backend: str = ADVISORY_BACKEND
+) -> Dict[str, Any]:
+    manifest = ensure_artifact(model_dir, allow_train, backend)
+    return load_bundle(manifest, model_dir, backend=backend)
+
+
+class ActiveModel:
+    # The advisory version this server answers with. refresh() re-reads the
+    # pointer (servers call it off the event loop every `poll_seconds`); a new
+    # version is loaded through `activate` (which must raise if it cannot be
+    # served) before it replaces the old one, so a broken promotion leaves the
+    # running version in place. A failed load is retried with backoff, since
+    # it may be transient (a half-written artifact, an I/O error), and at once
+    # if the pointer changes again. Request paths only read `version`.
+    def __init__(self, activate, model_dir: Path = MODEL_DIR, poll_seconds: float = MODEL_POLL_SECONDS):
+        self.activate = activate
+        self.model_dir = Path(model_dir)
+        self.poll_seconds = poll_seconds
+        self.version: Optional[str] = None
+        self.history: list = []
+        self.swaps = 0
+        self.load_failures = 0
+        self._stamp: Optional[tuple] = None
+        self._failed_stamp: Optional[tuple] = None
+        self._failed_streak = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Optional[str]:
+        with self._lock:
+            try:
+                st = (self.model_dir / MANIFEST_NAME).stat()
+            except FileNotFoundError:
+                return self.version
+            # The pointer is replaced atomically, so a new inode marks a new
+            # write even within one mtime tick.
+            stamp = (st.st_ino, st.st_mtime_ns)
+            if stamp == self._stamp:
+                return self.version
+            if stamp == self._failed_stamp and time.monotonic() < self._retry_at:
+                return self.version
+            manifest = read_manifest(self.model_dir)
+            if manifest["version"] != self.version:
+                try:
+                    self.activate(manifest["version"])
+                except Exception as e:
+                    self.load_failures += 1
+                    self._failed_streak = self._failed_streak + 1 if stamp == self._failed_stamp else 1
+                    self._failed_stamp = stamp
+                    self._retry_at = time.monotonic() + min(
+                        self.poll_seconds * 2 ** self._failed_streak, LOAD_RETRY_CAP_SECONDS
+                    )
+                    print(f"⚠️ Advisory model {manifest['version']} could not be loaded, keeping {self.version}: {e}")
+                    return self.version
+                if self.version is not None:
+                    print(f"🔄 Advisory model {self.version} -> {manifest['version']}")
+                    self.swaps += 1
+                self.version = manifest["version"]
+            self._stamp = stamp
+            self._failed_stamp = None
+            self._failed_streak = 0
+            self.history = manifest.get("history", [])
+            return self.version
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "history": self.history,
+            "swaps": self.swaps,
+            "load_failures": self.load_failures,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and persist the advisory models.")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    parser.add_argument(
+        "--force", action="store_true", help="Retrain even if the current artifact is up to date."
+    )
+    args = parser.parse_args()
+
+    manifest = read_manifest(args.model_dir)
+    if not args.force and not is_stale(manifest, args.model_dir):
+        print(f"✅ Artifact {manifest['version']} is up to date, nothing to do.")
+        return
+
+    start = time.perf_counter()
+    manifest = train_and_save(args.model_dir)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Wrote {manifest['file']} ({manifest['sha256'][:12]}) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence
+
+from models.advisory_model import get_daily_advisory_json
+from models.growth_model import BASE_TEMPS, get_growth_plan_batch, parse_date
+from models.model_store import MODEL_DIR, load_or_train
+from plot_store import PLOT_DB, PlotStore
+from weather_store import historical_gdd_many
+
+# Nightly scoring of every registered plot (see plot_store.py). Plots are read
+# in chunks, in grid-cell order, and each chunk goes through the batch paths
+# once per language: get_growth_plan_batch for stage and irrigation window,
+# then get_daily_advisory_json on the resulting stages. Plots with no readings
+# yet are skipped. The routes use the same helpers for their live fallback,
+# so a precomputed result and a live one are identical.
+#
+# Run it from cron shortly after midnight, or let the server start it
+# (PRECOMPUTE_AT in main.py); either way it runs at most once per day per
+# database unless --force is given. A run that fails gives its day back, and
+# one that was killed mid-way is retried once its claim goes stale
+# (PRECOMPUTE_CLAIM_TTL_SECONDS).
+#
+#   cd backend && python -m models.precompute [--db plots.sqlite3] [--date 2026-06-01] [--force]
+
+CHUNK_SIZE = 5000
+
+
+def observed_gdd(plots: Sequence[Dict[str, Any]], today: date) -> List[Optional[float]]:
+    # Accumulated GDD from the weather history of each plot's grid cell (one
+    # lookup per cell), or None (estimate from tmax/tmin) without a location
+    # or weather.
+    gdd, _ = historical_gdd_many(
+        [(p["lat"], p["lon"], parse_date(p["sowing_date"]), BASE_TEMPS[p["crop_type"]]) for p in plots], today
+    )
+    return gdd
+
+
+def plan_plots(
+    plots: Sequence[Dict[str, Any]], lang: str, today: date, gdd: Optional[Sequence[Optional[float]]] = None
+) -> List[Dict[str, Any]]:
+    if gdd is None:
+        gdd = observed_gdd(plots, today)
+    return get_growth_plan_batch(
+        [
+            {
+                "crop_type": p["crop_type"],
+                "sowing_date": p["sowing_date"],
+                "city": p["city"],
+                "tmax": p["tmax"],
+                "tmin": p["tmin"],
+                "accumulated_gdd": observed,
+                "stage_basis": p["stage_basis"],
+            }
+            for p, observed in zip(plots, gdd)
+        ],
+        lang=lang,
+        today=today,
+    )
+
+
+def advisory_row(plot: Dict[str, Any], crop_stage: str, today: date) -> Dict[str, Any]:
+    return {
+        "soil_moisture": plot["soil_moisture"],
+        "temperature": plot["temperature"],
+        "humidity": plot["humidity"],
+        "rainfall_last_3_days": plot["rainfall_last_3_days"],
+        "crop_stage": crop_stage,
+        "days_since_last_irrigation": max(0, (today - date.fromisoformat(plot["last_irrigated_on"])).days),
+    }
+
+
+def encode_plan(plan: Dict[str, Any]) -> str:
+    return json.dumps(plan, ensure_ascii=False, separators=(",", ":"))
+
+
+def score(plots: Sequence[Dict[str, Any]], today: date, bundle: Dict[str, Any]) -> List[tuple]:
+    # -> rows for PlotStore.save_results
+    ready = [plot for plot in plots if plot["readings_on"] is not None]
+    gdd = dict(zip((plot["plot_id"] for plot in ready), observed_gdd(ready, today)))
+    by_lang: Dict[str, List[Dict[str, Any]]] = {}
+    for plot in ready:
+        by_lang.setdefault(plot["lang"], []).append(plot)
+
+    rows = []
+    for lang, group in by_lang.items():
+        plans = plan_plots(group, lang, today, [gdd[p["plot_id"]] for p in group])
+        advisories = get_daily_advisory_json(
+            bundle["irr_model"], bundle["fert_model"],
+            [advisory_row(p, plan["current_stage"], today) for p, plan in zip(group, plans)],
+            lang=lang,
+        )
+        rows += [
+            (
+                p["plot_id"], today.isoformat(), p["revision"], lang, bundle["version"],
+                encode_plan(plan), advisory, plan["current_stage"],
+                (today + timedelta(days=plan["next_irrigation_in_days"])).isoformat(),
+            )
+            for p, plan, advisory in zip(group, plans, advisories)
+        ]
+    return rows
+
+
+def run_nightly(
+    store: Optional[PlotStore] = None,
+    today: Optional[date] = None,
+    force: bool = False,
+    model_dir: Path = MODEL_DIR,
+) -> Dict[str, Any]:
+    store = store or PlotStore()
+    today = today or date.today()
+    if not store.claim_run(today) and not force:
+        return {"status": "skipped", "run_date": today.isoformat(), "reason": "Already ran for this date."}
+
+    started = time.perf_counter()
+    plots = scored = 0
+    try:
+        bundle = load_or_train(model_dir, allow_train=False)
+        for chunk in store.iter_plots(CHUNK_SIZE):
+            rows = score(chunk, today, bundle)
+            store.save_results(rows)
+            plots += len(chunk)
+            scored += len(rows)
+    except BaseException:
+        store.release_run(today)
+        raise
+    seconds = time.perf_counter() - started
+    report = {
+        "status": "done",
+        "run_date": today.isoformat(),
+        "model_version": bundle["version"],
+        "plots": plots,
+        "scored": scored,
+        "skipped_no_readings": plots - scored,
+        "seconds": round(seconds, 2),
+        "plots_per_second": round(plots / seconds) if seconds > 0 else None,
+    }
+    store.finish_run(today, report)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute growth plans and advisories for every registered plot.")
+    parser.add_argument("--db", type=Path, default=PLOT_DB)
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    parser.add_argument("--date", type=date.fromisoformat, help="Score as of this day (default: today).")
+    parser.add_argument("--force", action="store_true", help="Run even if this date was already done.")
+    args = parser.parse_args()
+
+    report = run_nightly(PlotStore(args.db), args.date, args.force, args.model_dir)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
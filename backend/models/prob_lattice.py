@@ -0,0 +1,305 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from models.advisory_model import FEATURE_RANGES, FEATURES
+from models.flat_forest import FlatForest
+
+# The advisory forests tabulated offline on a grid over their (bounded) input
+# space, for ADVISORY_BACKEND=lattice.
+#
+# Every feature is bounded by the synthetic training data (FEATURE_RANGES), and
+# no split threshold lies outside those bounds, so clipping an input to them
+# does not change the forest's output. The table holds each class probability
+# but the first (which is 1 - the rest) as uint8, probability * 255, and is
+# memory-mapped at load, so workers share one copy from the page cache.
+#
+# Building does not evaluate the forest per grid point: each tree's leaves are
+# axis-aligned boxes, so every leaf adds its value to the block of grid points
+# it covers. At grid points the table is then the forest's exact output, up to
+# the uint8 rounding (at most 1/510).
+#
+# Queries either read the nearest grid point or interpolate multilinearly over
+# the continuous features (stage and days are integers and are always looked
+# up). Between grid points the result is an approximation; the build measures
+# how far it strays from the real forest on random inputs and stores that
+# report next to the table.
+#
+#   cd backend && python -m models.prob_lattice [--steps "soil_moisture=1"] [--force]
+
+# Grid spacing per feature; override with e.g. LATTICE_STEPS="soil_moisture=1,temperature=1".
+DEFAULT_STEPS = {
+    "soil_moisture": 2.0,
+    "temperature": 2.5,
+    "humidity": 6.5,
+    "rainfall_last_3_days": 2.0,
+    "crop_stage_encoded": 1.0,
+    "days_since_last_irrigation": 1.0,
+}
+INTEGER_FEATURES = {"crop_stage_encoded", "days_since_last_irrigation"}
+LATTICE_STEPS = os.getenv("LATTICE_STEPS")
+# "linear" (multilinear interpolation) or "nearest" (grid lookup).
+LATTICE_MODE = os.getenv("LATTICE_MODE", "linear")
+LATTICE_MODES = ["linear", "nearest"]
+REPORT_CORPUS_SIZE = 50_000
+META_NAME = "lattice.json"
+
+
+def parse_steps(spec: Optional[str]) -> Dict[str, float]:
+    steps = dict(DEFAULT_STEPS)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        field, _, value = item.partition("=")
+        field = field.strip()
+        if field not in DEFAULT_STEPS:
+            raise ValueError(f"Unknown lattice field '{field}'. Known: {list(DEFAULT_STEPS)}")
+        step = float(value)
+        if step <= 0 or (field in INTEGER_FEATURES and step != int(step)):
+            raise ValueError(f"Step for '{field}' must be positive (and whole for integer features), got {value!r}.")
+        steps[field] = step
+    return steps
+
+
+def grid_axes(steps: Dict[str, float]) -> List[Dict[str, Any]]:
+    # One uniform axis per feature, in FEATURES order, from the lower bound to
+    # the first grid point at or past the upper bound.
+    axes = []
+    for name in FEATURES:
+        lo, hi = FEATURE_RANGES[name]
+        step = steps[name]
+        axes.append({
+            "feature": name,
+            "start": float(lo),
+            "step": step,
+            "size": int(np.ceil((hi - lo) / step - 1e-9)) + 1,
+            "linear": name not in INTEGER_FEATURES,
+        })
+    return axes
+
+
+class ProbabilityLattice:
+    # Same predict_proba / classes_ surface as FlatForest, so the advisory
+    # code cannot tell them apart.
+    def __init__(self, table: np.ndarray, axes: List[Dict[str, Any]], classes: np.ndarray, mode: str = LATTICE_MODE):
+        if mode not in LATTICE_MODES:
+            raise ValueError(f"Unknown LATTICE_MODE {mode!r}; use one of {LATTICE_MODES}.")
+        self.table = table
+        self.axes = axes
+        self.classes_ = classes
+        self.mode = mode
+        self.n_features_in_ = len(axes)
+        self._rows = table.reshape(-1, table.shape[-1])
+        shape = np.array([a["size"] for a in axes])
+        self._strides = np.append(np.cumprod(shape[::-1])[-2::-1], 1).astype(np.intp)
+        self._start = np.array([a["start"] for a in axes])
+        self._step = np.array([a["step"] for a in axes])
+        self._hi = np.array([FEATURE_RANGES[a["feature"]][1] for a in axes], dtype=np.float64)
+        self._last = shape - 1
+        self._linear = np.array([a["linear"] and a["size"] > 1 for a in axes]) if mode == "linear" else np.zeros(len(axes), bool)
+        # Offset and per-axis bit of every corner of an interpolation cell.
+        linear_axes = np.flatnonzero(self._linear)
+        bits = (np.arange(2 ** len(linear_axes))[:, None] >> np.arange(len(linear_axes))) & 1
+        self._corner_bits = bits.astype(bool)
+        self._corner_offsets = bits @ self._strides[linear_axes]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n, {self.n_features_in_}), got {X.shape}.")
+        t = (np.clip(X, self._start, self._hi) - self._start) / self._step
+        index = np.where(self._linear, np.floor(t), np.rint(t))
+        index = np.minimum(index, np.where(self._linear, self._last - 1, self._last)).astype(np.intp)
+        base = index @ self._strides
+        if self._corner_offsets.size == 1:
+            rest = self._rows[base].astype(np.float64)
+        else:
+            frac = (t - index)[:, self._linear]  # (n, linear axes)
+            weights = np.prod(np.where(self._corner_bits[None], frac[:, None, :], 1 - frac[:, None, :]), axis=2)
+            corners = self._rows[base[:, None] + self._corner_offsets[None, :]]  # (n, corners, n_out)
+            rest = np.einsum("nc,nco->no", weights, corners)
+        rest /= 255
+        return np.column_stack([1 - rest.sum(axis=1), rest])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# ─── Build ─────────────────────────────────────────────────────────────────────
+
+def tabulate(forest: FlatForest, axes: List[Dict[str, Any]]) -> np.ndarray:
+    # -> (*grid, n_classes - 1) mean leaf values over the trees, exact at every
+    #    grid point. A grid value goes left where float32(value) <= threshold,
+    #    as in FlatForest.apply.
+    values = [
+        (a["start"] + a["step"] * np.arange(a["size"])).astype(np.float32) for a in axes
+    ]
+    acc = np.zeros([a["size"] for a in axes] + [forest.value.shape[1] - 1], dtype=np.float32)
+    for root in forest.roots:
+        stack = [(int(root), [0] * len(axes), [a["size"] for a in axes])]
+        while stack:
+            node, lo, hi = stack.pop()
+            left, right = int(forest.left[node]), int(forest.right[node])
+            if left == node:
+                acc[tuple(slice(a, b) for a, b in zip(lo, hi))] += forest.value[node, 1:]
+                continue
+            f = int(forest.feature[node])
+            split = min(max(int(np.searchsorted(values[f], forest.threshold[node], side="right")), lo[f]), hi[f])
+            if split > lo[f]:
+                stack.append((left, lo, hi[:f] + [split] + hi[f + 1:]))
+            if split < hi[f]:
+                stack.append((right, lo[:f] + [split] + lo[f + 1:], hi))
+    return np.rint(acc / forest.n_trees * 255).astype(np.uint8)
+
+
+def random_inputs(n: int, seed: int = 0) -> np.ndarray:
+    # Uniform over the feature bounds, off the grid almost surely.
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in FEATURES:
+        lo, hi = FEATURE_RANGES[name]
+        columns.append(rng.integers(lo, hi + 1, n) if name in INTEGER_FEATURES else rng.uniform(lo, hi, n))
+    return np.column_stack(columns).astype(np.float64)
+
+
+def disagreement(lattice: ProbabilityLattice, forest: FlatForest, X: np.ndarray) -> Dict[str, Any]:
+    expected, actual = forest.predict_proba(X), lattice.predict_proba(X)
+    diff = np.abs(expected - actual).max(axis=1)
+    labels = np.argmax(expected, axis=1) != np.argmax(actual, axis=1)
+    # Responses carry confidences rounded to two decimals.
+    rounded = np.round(expected[:, -1], 2) != np.round(actual[:, -1], 2)
+    return {
+        "max_abs_diff": round(float(diff.max()), 4),
+        "mean_abs_diff": round(float(diff.mean()), 5),
+        "label_disagreement": round(float(labels.mean()), 5),
+        "confidence_mismatch": round(float(rounded.mean()), 5),
+    }
+
+
+def steps_key(steps: Dict[str, float]) -> str:
+    return hashlib.sha256(json.dumps(steps, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+
+
+def lattice_dir(manifest: Dict[str, Any], model_dir: Path, steps: Dict[str, float]) -> Path:
+    return Path(model_dir) / f"advisory-{manifest['version']}.lattice-{steps_key(steps)}"
+
+
+def build_lattice(manifest: Dict[str, Any], model_dir: Path, steps: Dict[str, float]) -> Dict[str, Any]:
+    # Tabulates both forests of `manifest`'s version and writes the tables and
+    # the disagreement report; -> the written meta.
+    from models.model_store import MODEL_NAMES
+
+    started = time.perf_counter()
+    flat_dir = Path(model_dir) / manifest["flat_dir"]
+    axes = grid_axes(steps)
+    out = lattice_dir(manifest, model_dir, steps)
+    tmp = out.with_name(f".{out.name}-{os.getpid()}.tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+
+    corpus = random_inputs(REPORT_CORPUS_SIZE)
+    nodes = np.column_stack([
+        a["start"] + a["step"] * np.random.default_rng(1).integers(0, a["size"], REPORT_CORPUS_SIZE) for a in axes
+    ])
+    models: Dict[str, Any] = {}
+    for name in MODEL_NAMES:
+        forest = FlatForest.load(flat_dir, name)
+        table = tabulate(forest, axes)
+        np.save(tmp / f"{name}.npy", table)
+        report = {
+            mode: disagreement(ProbabilityLattice(table, axes, forest.classes_, mode), forest, corpus)
+            for mode in LATTICE_MODES
+        }
+        report["grid_points"] = disagreement(ProbabilityLattice(table, axes, forest.classes_, "nearest"), forest, nodes)
+        models[name] = {"classes": forest.classes_.tolist(), "report": report}
+
+    meta = {
+        "version": manifest["version"],
+        "flat_sha256": manifest["flat_sha256"],
+        "steps": steps,
+        "axes": axes,
+        "cells": int(np.prod([a["size"] for a in axes])),
+        "models": models,
+        "report_corpus": REPORT_CORPUS_SIZE,
+        "build_seconds": round(time.perf_counter() - started, 2),
+    }
+    with open(tmp / META_NAME, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    try:
+        os.replace(tmp, out)
+    except OSError:
+        # Another process finished the same build first.
+        shutil.rmtree(tmp, ignore_errors=True)
+    return meta
+
+
+def ensure_lattice(manifest: Dict[str, Any], model_dir: Path, steps: Optional[Dict[str, float]] = None) -> Path:
+    steps = steps or parse_steps(LATTICE_STEPS)
+    out = lattice_dir(manifest, model_dir, steps)
+    if not (out / META_NAME).exists():
+        print(f"🌱 Tabulating advisory model {manifest['version']} into a probability lattice...")
+        meta = build_lattice(manifest, model_dir, steps)
+        print(f"✅ Lattice of {meta['cells']:,} cells built in {meta['build_seconds']}s")
+    return out
+
+
+def load_lattice(
+    manifest: Dict[str, Any], model_dir: Path, verify: bool = True, mode: str = LATTICE_MODE
+) -> Dict[str, ProbabilityLattice]:
+    # Never builds: serving a version whose table is missing fails (so a hot
+    # swap keeps the running version) instead of stalling on a build. The
+    # table is built at startup (ensure_artifact) and by retraining, before a
+    # candidate is promoted.
+    from models.model_store import MODEL_NAMES
+
+    directory = lattice_dir(manifest, model_dir, parse_steps(LATTICE_STEPS))
+    if not (directory / META_NAME).exists():
+        raise FileNotFoundError(
+            f"No probability lattice for advisory model {manifest['version']} in {model_dir}. "
+            f"Run `python -m models.prob_lattice --version {manifest['version']}` to build one."
+        )
+    with open(directory / META_NAME, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if verify and meta["flat_sha256"] != manifest["flat_sha256"]:
+        raise ValueError(f"Lattice in {directory} was not built from advisory model {manifest['version']}.")
+    return {
+        name: ProbabilityLattice(
+            np.load(directory / f"{name}.npy", mmap_mode="r"),
+            meta["axes"],
+            np.asarray(meta["models"][name]["classes"]),
+            mode,
+        )
+        for name in MODEL_NAMES
+    }
+
+
+def main() -> None:
+    from models.model_store import MODEL_DIR, ensure_artifact, read_version_manifest
+
+    parser = argparse.ArgumentParser(description="Tabulate the advisory forests into a probability lattice.")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    parser.add_argument("--version", help="Model version (default: the one being served).")
+    parser.add_argument("--steps", default=LATTICE_STEPS, help='Grid spacing, e.g. "soil_moisture=1,temperature=1".')
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the lattice exists.")
+    args = parser.parse_args()
+
+    manifest = (
+        read_version_manifest(args.version, args.model_dir) if args.version
+        else ensure_artifact(args.model_dir, allow_train=False, backend="flat")
+    )
+    steps = parse_steps(args.steps)
+    out = lattice_dir(manifest, args.model_dir, steps)
+    if args.force and out.exists():
+        shutil.rmtree(out)
+    ensure_lattice(manifest, args.model_dir, steps)
+    with open(out / META_NAME, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    print(json.dumps({k: meta[k] for k in ("version", "cells", "build_seconds", "models")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
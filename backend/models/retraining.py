@@ -0,0 +1,241 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from models.advisory_model import CROP_STAGES, FEATURES, TRAINING_CONFIG, get_daily_advisory_batch, predict_with_confidence
+from models.model_store import (
+    ADVISORY_BACKEND,
+    MODEL_DIR,
+    MODEL_NAMES,
+    file_sha256,
+    load_bundle,
+    promote,
+    read_manifest,
+    rollback,
+    save_bundle,
+    write_version_manifest,
+)
+
+# Offline retraining: fit a candidate on fresh synthetic draws or labelled
+# field data, write it as a new versioned artifact, validate it against a
+# holdout the candidate never saw (accuracy per model, compared with the
+# serving version on the same rows, and single-request latency), and only
+# then promote it. Servers pick up the promotion by polling the manifest
+# (model_store.ActiveModel); rejected candidates stay on disk for inspection.
+#
+# Training imports (pandas, sklearn) stay inside the functions: the server
+# imports this module only for RetrainJob, which runs everything else in a
+# spawned process.
+
+MIN_ACCURACY = float(os.getenv("RETRAIN_MIN_ACCURACY", "0.85"))
+MAX_ACCURACY_DROP = float(os.getenv("RETRAIN_MAX_ACCURACY_DROP", "0.02"))
+MAX_P99_MS = float(os.getenv("RETRAIN_MAX_P99_MS", "25"))
+RETRAIN_DATA = os.getenv("RETRAIN_DATA")
+
+HOLDOUT_SIZE = 5000
+HOLDOUT_FRACTION = 0.2
+LATENCY_ROWS = 200
+REPORT_NAME = "advisory_retrain_report.json"
+
+
+class RetrainBusy(RuntimeError):
+    pass
+
+
+# ─── Pipeline ──────────────────────────────────────────────────────────────────
+
+def build_datasets(data_path: Optional[str], seed: int) -> Tuple[Any, Any, Dict[str, Any]]:
+    # -> (train, holdout, training info recorded in the manifest)
+    from models.advisory_training import generate_synthetic_data, load_field_data
+
+    if data_path:
+        df = load_field_data(data_path)
+        order = np.random.default_rng(seed).permutation(len(df))
+        n_holdout = max(1, int(len(df) * HOLDOUT_FRACTION))
+        holdout, train = df.iloc[order[:n_holdout]], df.iloc[order[n_holdout:]]
+        info = {"data": str(data_path), "data_sha256": file_sha256(Path(data_path)), "seed": seed}
+    else:
+        train = generate_synthetic_data(TRAINING_CONFIG["n_samples"], seed=seed)
+        holdout = generate_synthetic_data(HOLDOUT_SIZE, seed=seed + 1)
+        info = {"data": "synthetic", "seed": seed}
+    return train, holdout, {**info, "rows": len(train)}
+
+
+def evaluate(bundle: Dict[str, Any], holdout) -> Dict[str, float]:
+    from models.advisory_training import LABELS
+
+    X = holdout[FEATURES].values
+    report = {}
+    for name, label in zip(MODEL_NAMES, LABELS):
+        pred, _ = predict_with_confidence(bundle[name], X)
+        report[f"{name}_accuracy"] = round(float(np.mean(pred == holdout[label].values.astype(bool))), 4)
+
+    # Single-row requests, the way /daily-advisory calls the models.
+    rows = [
+        {**{name: float(r[name]) for name in FEATURES if name != "crop_stage_encoded"},
+         "crop_stage": CROP_STAGES[int(r["crop_stage_encoded"])]}
+        for r in holdout.head(LATENCY_ROWS).to_dict("records")
+    ]
+    times = []
+    for row in rows:
+        start = time.perf_counter()
+        get_daily_advisory_batch(bundle["irr_model"], bundle["fert_model"], [row])
+        times.append(time.perf_counter() - start)
+    times.sort()
+    report["p50_ms"] = round(times[len(times) // 2] * 1000, 3)
+    report["p99_ms"] = round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 3)
+    return report
+
+
+def check_gates(candidate: Dict[str, float], current: Optional[Dict[str, float]]) -> List[str]:
+    failures = []
+    for name in MODEL_NAMES:
+        acc = candidate[f"{name}_accuracy"]
+        if acc < MIN_ACCURACY:
+            failures.append(f"{name} holdout accuracy {acc:.4f} is below {MIN_ACCURACY}.")
+        if current is not None and acc < current[f"{name}_accuracy"] - MAX_ACCURACY_DROP:
+            failures.append(
+                f"{name} holdout accuracy {acc:.4f} drops more than {MAX_ACCURACY_DROP} "
+                f"below the serving model's {current[f'{name}_accuracy']:.4f}."
+            )
+    if candidate["p99_ms"] > MAX_P99_MS:
+        failures.append(f"p99 latency {candidate['p99_ms']} ms exceeds {MAX_P99_MS} ms.")
+    return failures
+
+
+def retrain(
+    model_dir: Path = MODEL_DIR,
+    data_path: Optional[str] = None,
+    seed: Optional[int] = None,
+    promote_if_valid: bool = True,
+) -> Dict[str, Any]:
+    from models.advisory_training import train_advisory_models
+
+    started = time.perf_counter()
+    seed = int(time.time()) if seed is None else seed
+    train, holdout, training = build_datasets(data_path, seed)
+    irr_model, fert_model = train_advisory_models(train)
+    candidate = save_bundle(irr_model, fert_model, model_dir, make_current=False, training=training)
+    if ADVISORY_BACKEND == "lattice":
+        # Servers never build a lattice on a hot swap; it must exist before
+        # the pointer can move to this version.
+        from models.prob_lattice import ensure_lattice
+
+        ensure_lattice(candidate, model_dir)
+
+    current = read_manifest(model_dir)
+    current_eval = None
+    if current is not None:
+        try:
+            current_eval = evaluate(load_bundle(current, model_dir), holdout)
+        except (FileNotFoundError, KeyError, ValueError) as e:
+            print(f"⚠️ Serving model {current['version']} could not be evaluated: {e}")
+    candidate_eval = evaluate(load_bundle(candidate, model_dir), holdout)
+    failures = check_gates(candidate_eval, current_eval)
+
+    candidate["validation"] = {
+        "holdout_rows": len(holdout),
+        "candidate": candidate_eval,
+        "serving_version": current["version"] if current is not None else None,
+        "serving": current_eval,
+        "failures": failures,
+    }
+    write_version_manifest(candidate, model_dir)
+    if failures:
+        status = "rejected"
+    elif promote_if_valid:
+        promote(candidate, model_dir)
+        status = "promoted"
+    else:
+        status = "validated"
+    return {
+        "status": status,
+        "version": candidate["version"],
+        "training": training,
+        "validation": candidate["validation"],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def run_job(model_dir: str, data_path: Optional[str], seed: Optional[int], report_path: str) -> None:
+    # Entry point of the background process: always leaves a report behind.
+    try:
+        report = retrain(Path(model_dir), data_path, seed)
+    except Exception as e:
+        report = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+    report["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    tmp = Path(report_path).with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, report_path)
+
+
+# ─── Background job ────────────────────────────────────────────────────────────
+
+class RetrainJob:
+    # At most one retraining process at a time. Spawned, so sklearn, pandas
+    # and the training CPU time stay out of the serving process.
+    def __init__(self, model_dir: Path = MODEL_DIR):
+        self.model_dir = Path(model_dir)
+        self.report_path = self.model_dir / REPORT_NAME
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self, data_path: Optional[str] = RETRAIN_DATA, seed: Optional[int] = None) -> None:
+        if self.running:
+            raise RetrainBusy("A retraining job is already running.")
+        self.process = multiprocessing.get_context("spawn").Process(
+            target=run_job,
+            args=(str(self.model_dir), data_path, seed, str(self.report_path)),
+            name="advisory-retrain",
+            daemon=True,
+        )
+        self.process.start()
+        self.started_at = time.time()
+
+    def wait(self) -> None:
+        if self.process is not None:
+            self.process.join()
+
+    def status(self) -> Dict[str, Any]:
+        report = None
+        if self.report_path.exists():
+            with open(self.report_path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        return {
+            "running": self.running,
+            "pid": self.process.pid if self.process is not None else None,
+            "started_at": self.started_at,
+            "exitcode": self.process.exitcode if self.process is not None else None,
+            "last_report": report,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Retrain, validate and promote the advisory models.")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    parser.add_argument("--data", default=RETRAIN_DATA, help="CSV of labelled field data (default: synthetic).")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--no-promote", action="store_true", help="Validate the candidate but keep serving the current one.")
+    parser.add_argument("--rollback", action="store_true", help="Re-point the manifest at the previous version and exit.")
+    args = parser.parse_args()
+
+    if args.rollback:
+        print(f"✅ Serving {rollback(args.model_dir)['version']}")
+        return
+    report = retrain(args.model_dir, args.data, args.seed, promote_if_valid=not args.no_promote)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from metrics import count_inference, timed
+from models.growth_model import get_calendar, parse_date
+from weather_store import ARCHIVE_LAG_DAYS, EPOCH, cell_key, get_weather_cache, grid_cell
+
+# Season simulation: projected dates for every crop stage, as distributions.
+#
+# Thermal time is rolled forward day by day for many plots under many
+# temperature scenarios at once. Daily mean temperatures form one
+# (scenarios, series, days) array on a shared timeline, one series per weather
+# cell; a cumulative sum per distinct (series, base temperature) gives
+# accumulated GDD, and one searchsorted over all curves finds, for every plot,
+# the first day after sowing each stage threshold (CROP_STAGES base_gdd) is
+# reached.
+# Quantiles across scenarios then give the stage-date distribution.
+#
+# project_seasons() builds the scenarios from each plot's weather grid cell:
+# observed days come from the archive (identical in every scenario, so past
+# stages get their actual dates), later days from climatology, either every
+# past year as an ensemble member ("analog") or day-wise percentiles of those
+# years ("percentiles"). Forecast days, where known, replace the start of each
+# scenario (with_forecast).
+
+CLIMATE_YEARS = 10
+HORIZON_DAYS = 240
+# Days of forecast fed into each scenario (Open-Meteo serves up to 16).
+FORECAST_DAYS = int(os.getenv("SEASON_FORECAST_DAYS", "16"))
+# Sowing dates further back than this are not a season in progress; each day
+# further back also widens the history every projection pulls.
+MAX_SEASON_DAYS = 366
+QUANTILES = (0.1, 0.5, 0.9)
+SCENARIO_MODES = ["analog", "percentiles"]
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+DAYS_PER_YEAR = 365.2425
+
+
+# ─── Engine ────────────────────────────────────────────────────────────────────
+
+def simulate_stage_days(
+    tmean: np.ndarray,
+    series_of_plot: np.ndarray,
+    base_temps: np.ndarray,
+    thresholds: np.ndarray,
+    sowing_offsets: np.ndarray,
+) -> np.ndarray:
+    # tmean: (scenarios, series, days) daily mean temperatures; NaN days add no
+    #   GDD. Plots pick their series with series_of_plot (plots,).
+    # base_temps, sowing_offsets: (plots,); GDD accumulates from the sowing day.
+    # thresholds: (plots, stages), positive and non-decreasing; pad with inf.
+    # -> (scenarios, plots, stages): first timeline day on which the plot's
+    #    accumulated GDD reaches each threshold, or n_days if it never does.
+    n_scenarios, n_days = tmean.shape[0], tmean.shape[-1]
+    n_plots, n_stages = thresholds.shape
+
+    # Plots sharing a series and a base temperature share one GDD curve, so
+    # the day-by-day work scales with distinct curves, not plots.
+    pairs, curve_of_plot = np.unique(
+        np.column_stack([series_of_plot, base_temps]), axis=0, return_inverse=True
+    )
+    curve_of_plot = curve_of_plot.ravel()
+    gdd = np.fmax(tmean[:, pairs[:, 0].astype(np.intp), :] - pairs[:, 1, None].astype(np.float32), np.float32(0))
+    cum = np.cumsum(gdd, axis=2, dtype=np.float64)
+    n_curves = cum.shape[1]
+
+    scenario = np.arange(n_scenarios)[:, None]
+    before = np.where(sowing_offsets > 0, cum[scenario, curve_of_plot, np.maximum(sowing_offsets - 1, 0)], 0.0)
+    targets = thresholds[None] + before[..., None]
+
+    # Curves are shifted apart so they form one sorted sequence: a single
+    # searchsorted then answers every (scenario, plot, stage) at once.
+    finite = thresholds[np.isfinite(thresholds)]
+    stride = float(cum[..., -1].max()) + (float(finite.max()) if finite.size else 0.0) + 1.0
+    cum += (np.arange(n_scenarios * n_curves, dtype=np.float64) * stride).reshape(n_scenarios, n_curves, 1)
+    row = scenario * n_curves + curve_of_plot
+    found = np.searchsorted(cum.ravel(), targets + (row * stride)[..., None])
+    return np.minimum(found - (row * n_days)[..., None], n_days)
+
+
+def stage_day_quantiles(stage_days: np.ndarray, n_days: int, quantiles: Sequence[float] = QUANTILES) -> tuple:
+    # -> ((quantiles, plots, stages) timeline days, NaN where that quantile
+    #     falls beyond the horizon; (plots, stages) share of scenarios reaching
+    #     the stage within it)
+    days = np.where(stage_days < n_days, stage_days, np.inf)
+    q = np.quantile(days, quantiles, axis=0, method="inverted_cdf")
+    return np.where(np.isfinite(q), q, np.nan), (stage_days < n_days).mean(axis=0)
+
+
+# ─── Scenarios ─────────────────────────────────────────────────────────────────
+
+def analog_years(history: np.ndarray, history_first_day: int, first_day: int, n_days: int, years: int) -> np.ndarray:
+    # -> (years, n_days): the same calendar days in each of the past `years`
+    #    years of a daily series; NaN where the history does not reach.
+    out = np.full((years, n_days), np.nan, dtype=np.float32)
+    for y in range(1, years + 1):
+        lo = first_day - round(y * DAYS_PER_YEAR) - history_first_day
+        src_lo, src_hi = max(lo, 0), min(lo + n_days, len(history))
+        if src_hi > src_lo:
+            out[y - 1, src_lo - lo:src_hi - lo] = history[src_lo:src_hi]
+    return out
+
+
+def climatology_scenarios(analogs: np.ndarray, mode: str, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> np.ndarray:
+    # Days no year has data for fall back to the series mean.
+    filled = np.where(np.isnan(analogs), np.nanmean(analogs, axis=0), analogs)
+    filled = np.where(np.isnan(filled), np.nanmean(analogs), filled)
+    if mode == "percentiles":
+        return np.percentile(filled, percentiles, axis=0).astype(np.float32)
+    return filled
+
+
+def with_forecast(scenarios: np.ndarray, forecast: np.ndarray, first_offset: int) -> np.ndarray:
+    # Replaces scenario days from `first_offset` on with a (days,) forecast,
+    # or a (members, days) ensemble matching the scenario count; NaN forecast
+    # days keep the climatology.
+    out = scenarios.copy()
+    end = min(first_offset + forecast.shape[-1], out.shape[-1])
+    part = np.broadcast_to(forecast[..., :end - first_offset], out[..., first_offset:end].shape)
+    out[..., first_offset:end] = np.where(np.isnan(part), out[..., first_offset:end], part)
+    return out
+
+
+def forecast_mean(tmax: np.ndarray, tmin: np.ndarray) -> np.ndarray:
+    # Daily tmax/tmin forecast -> the daily means project_seasons takes.
+    return ((np.asarray(tmax, dtype=np.float32) + np.asarray(tmin, dtype=np.float32)) / 2).astype(np.float32)
+
+
+# ─── Plots ─────────────────────────────────────────────────────────────────────
+
+@timed("season.project")
+def project_seasons(
+    plots: Sequence[Dict[str, Any]],
+    today: Optional[date] = None,
+    mode: str = "analog",
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    horizon_days: int = HORIZON_DAYS,
+    years: int = CLIMATE_YEARS,
+    forecasts: Optional[Dict[str, np.ndarray]] = None,
+) -> List[Dict[str, Any]]:
+    # plots: dicts with crop_type, sowing_date, lat, lon. forecasts: optional
+    # daily mean forecasts from today on, keyed by weather_store.cell_key.
+    # -> per plot, each stage's completion date quantiles and the share of
+    #    scenarios completing it within the horizon (last stage: maturity).
+    count_inference("season_sim", len(plots))
+    today = today or date.today()
+    today_day = (today - EPOCH).days
+    calendars = [get_calendar(p["crop_type"].lower()) for p in plots]
+    sowing = np.array([(parse_date(p["sowing_date"]) - EPOCH).days for p in plots])
+    first_day = int(min(sowing.min(), today_day))
+    n_days = max(int(sowing.max()), today_day) + horizon_days - first_day
+    observed_end = today_day - ARCHIVE_LAG_DAYS + 1
+
+    cells: Dict[str, int] = {}
+    cell_of_plot = []
+    locations = []
+    for p in plots:
+        cell = grid_cell(p["lat"], p["lon"])
+        key = cell_key(cell)
+        if key not in cells:
+            cells[key] = len(cells)
+            locations.append((key, cell))
+        cell_of_plot.append(cells[key])
+
+    weather = get_weather_cache()
+    history_first_day = first_day - round(years * DAYS_PER_YEAR) - 1
+    per_cell = []
+    for key, (lat, lon) in locations:
+        # The cell's in-memory index, so repeat projections skip the disk.
+        tmax, tmin = weather.get_index(
+            lat, lon, EPOCH + timedelta(days=history_first_day), EPOCH + timedelta(days=observed_end - 1)
+        ).temperatures(history_first_day, observed_end - 1)
+        history = ((tmax + tmin) / 2).astype(np.float32)
+        scenarios = climatology_scenarios(
+            analog_years(history, history_first_day, first_day, n_days, years), mode, percentiles
+        )
+        if forecasts and key in forecasts:
+            scenarios = with_forecast(scenarios, forecasts[key], today_day - first_day)
+        observed = np.full(n_days, np.nan, dtype=np.float32)
+        lo = first_day - history_first_day
+        seen = history[lo:lo + max(0, min(observed_end - first_day, n_days))]
+        observed[:len(seen)] = seen
+        per_cell.append(np.where(np.isnan(observed), scenarios, observed))
+    tmean = np.stack(per_cell, axis=1)
+
+    n_stages = max(len(c.stage_names) for c in calendars)
+    thresholds = np.full((len(plots), n_stages), np.inf)
+    for i, c in enumerate(calendars):
+        thresholds[i, :len(c.stage_thresholds)] = c.stage_thresholds
+    stage_days = simulate_stage_days(
+        tmean, np.array(cell_of_plot), np.array([c.base_temp for c in calendars], dtype=np.float64),
+        thresholds, sowing - first_day,
+    )
+    q, reached = stage_day_quantiles(stage_days, n_days)
+
+    # Timeline day -> ISO date, built once; the last slot (None) is "beyond
+    # the horizon".
+    dates = [(EPOCH + timedelta(days=first_day + d)).isoformat() for d in range(n_days)] + [None]
+    q = np.where(np.isnan(q), n_days, q).astype(np.intp).tolist()
+    reached = np.round(reached, 3).tolist()
+    labels = [f"p{round(x * 100)}" for x in QUANTILES]
+    results = []
+    for i, (p, c) in enumerate(zip(plots, calendars)):
+        stages = [
+            {
+                "name": name,
+                "base_gdd": float(c.stage_thresholds[k]),
+                **{label: dates[q[j][i][k]] for j, label in enumerate(labels)},
+                "probability": reached[i][k],
+            }
+            for k, name in enumerate(c.stage_names)
+        ]
+        results.append({
+            "crop_type": c.display_name,
+            "sowing_date": p["sowing_date"],
+            "scenarios": len(tmean),
+            "stages": stages,
+            "maturity": stages[-1],
+        })
+    return results
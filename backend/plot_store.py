@@ -0,0 +1,236 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Sequence
+
+from weather_store import cell_key, grid_cell
+
+# Registered plots and their precomputed results, in one embedded SQLite file.
+#
+# A plot keeps what /growth-plan and /daily-advisory otherwise receive on every
+# call: crop, sowing date, location (plus its weather grid cell), language and
+# the latest readings. The nightly job (models/precompute.py) scores every plot
+# in bulk and stores each result as a ready-to-send JSON object, so a morning
+# read is one primary-key lookup. A stored result is only served if it was
+# computed for today and for the plot's current revision (every write bumps
+# it); callers also check the model version. Anything else is computed live.
+#
+# WAL journaling lets the job write while web workers read. Connections are
+# opened per thread, on first use, so forked workers never share one.
+
+PLOT_DB = Path(os.getenv("PLOT_DB", Path(__file__).resolve().parent / "artifacts" / "plots.sqlite3"))
+# A claim that never finished (the job was killed) may be taken over once it is
+# this old; a run that fails cleanly releases its claim straight away.
+RUN_CLAIM_TTL_SECONDS = float(os.getenv("PRECOMPUTE_CLAIM_TTL_SECONDS", "10800"))
+
+PLOT_FIELDS = ("crop_type", "sowing_date", "city", "lat", "lon", "stage_basis", "lang")
+READING_FIELDS = ("soil_moisture", "temperature", "humidity", "rainfall_last_3_days", "tmax", "tmin")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plots (
+    plot_id TEXT PRIMARY KEY,
+    crop_type TEXT NOT NULL,
+    sowing_date TEXT NOT NULL,
+    city TEXT NOT NULL,
+    lat REAL,
+    lon REAL,
+    cell TEXT,
+    stage_basis TEXT NOT NULL DEFAULT 'days',
+    lang TEXT NOT NULL DEFAULT 'en',
+    soil_moisture REAL,
+    temperature REAL,
+    humidity REAL,
+    rainfall_last_3_days REAL,
+    tmax REAL,
+    tmin REAL,
+    last_irrigated_on TEXT,
+    readings_on TEXT,
+    revision INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plots_by_cell ON plots (cell);
+
+CREATE TABLE IF NOT EXISTS precomputed (
+    plot_id TEXT PRIMARY KEY REFERENCES plots (plot_id) ON DELETE CASCADE,
+    run_date TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    lang TEXT NOT NULL,
+    model_version TEXT,
+    growth_plan TEXT NOT NULL,
+    advisory TEXT NOT NULL,
+    current_stage TEXT NOT NULL,
+    next_irrigation_on TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS precomputed_by_irrigation ON precomputed (next_irrigation_on);
+
+CREATE TABLE IF NOT EXISTS precompute_runs (
+    run_date TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    report TEXT
+);
+"""
+
+
+class PlotStore:
+    def __init__(self, path: Path = PLOT_DB):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ─── Plots ────────────────────────────────────────────────────────────────
+
+    def upsert_plot(self, plot_id: str, plot: Dict[str, Any]) -> Dict[str, Any]:
+        # Registers a plot or replaces its details; readings are kept.
+        values = {field: plot.get(field) for field in PLOT_FIELDS}
+        has_location = values["lat"] is not None and values["lon"] is not None
+        values["cell"] = cell_key(grid_cell(values["lat"], values["lon"])) if has_location else None
+        columns = list(values)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT INTO plots (plot_id, {', '.join(columns)}, updated_at) "
+                f"VALUES (?, {', '.join('?' for _ in columns)}, ?) "
+                f"ON CONFLICT (plot_id) DO UPDATE SET "
+                f"{', '.join(f'{c} = excluded.{c}' for c in columns)}, "
+                f"updated_at = excluded.updated_at, revision = revision + 1",
+                (plot_id, *values.values(), time.time()),
+            )
+        return self.get_plot(plot_id)
+
+    def record_readings(
+        self, plot_id: str, readings: Dict[str, Any], days_since_last_irrigation: int, on: Optional[date] = None
+    ) -> Optional[Dict[str, Any]]:
+        # Irrigation is stored as a date, so the count stays right on later days.
+        on = on or date.today()
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE plots SET {', '.join(f'{f} = ?' for f in READING_FIELDS)}, "
+                f"last_irrigated_on = ?, readings_on = ?, updated_at = ?, revision = revision + 1 "
+                f"WHERE plot_id = ?",
+                (
+                    *(readings[f] for f in READING_FIELDS),
+                    (on - timedelta(days=days_since_last_irrigation)).isoformat(),
+                    on.isoformat(),
+                    time.time(),
+                    plot_id,
+                ),
+            )
+        return self.get_plot(plot_id) if cursor.rowcount else None
+
+    def get_plot(self, plot_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM plots WHERE plot_id = ?", (plot_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def delete_plot(self, plot_id: str) -> bool:
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM plots WHERE plot_id = ?", (plot_id,)).rowcount > 0
+
+    def iter_plots(self, chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        # In grid-cell order, so plots sharing weather history come together.
+        cursor = self._conn().execute("SELECT * FROM plots ORDER BY cell, plot_id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield [dict(row) for row in rows]
+
+    # ─── Precomputed results ──────────────────────────────────────────────────
+
+    def save_results(self, rows: Sequence[tuple]) -> None:
+        # rows: (plot_id, run_date, revision, lang, model_version, growth_plan,
+        #        advisory, current_stage, next_irrigation_on)
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO precomputed VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def lookup(self, plot_id: str) -> Optional[Dict[str, Any]]:
+        # The plot plus its stored result (None-valued result columns if the
+        # job has not scored it), in one indexed read.
+        row = self._conn().execute(
+            "SELECT p.*, r.run_date, r.revision AS result_revision, r.lang AS result_lang, r.model_version, "
+            "r.growth_plan, r.advisory, r.current_stage "
+            "FROM plots p LEFT JOIN precomputed r USING (plot_id) WHERE p.plot_id = ?",
+            (plot_id,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def record_lookup(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # ─── Runs ─────────────────────────────────────────────────────────────────
+
+    def claim_run(self, run_date: date, ttl_seconds: float = RUN_CLAIM_TTL_SECONDS) -> bool:
+        # One job per day across every process sharing the file. An unfinished
+        # claim older than `ttl_seconds` is stale and can be claimed again.
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO precompute_runs (run_date, started_at) VALUES (?, ?) "
+                "ON CONFLICT (run_date) DO UPDATE SET started_at = excluded.started_at "
+                "WHERE finished_at IS NULL AND started_at < ?",
+                (run_date.isoformat(), now, now - ttl_seconds),
+            )
+        return cursor.rowcount > 0
+
+    def release_run(self, run_date: date) -> None:
+        # Drops an unfinished claim so a later run that day can retry.
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM precompute_runs WHERE run_date = ? AND finished_at IS NULL", (run_date.isoformat(),)
+            )
+
+    def finish_run(self, run_date: date, report: Dict[str, Any]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO precompute_runs (run_date, started_at, finished_at, report) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (run_date) DO UPDATE SET finished_at = excluded.finished_at, report = excluded.report",
+                (run_date.isoformat(), time.time(), time.time(), json.dumps(report)),
+            )
+
+    def last_run(self) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM precompute_runs ORDER BY run_date DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "report": json.loads(row["report"]) if row["report"] else None}
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "plots": conn.execute("SELECT COUNT(*) FROM plots").fetchone()[0],
+            "precomputed": conn.execute("SELECT COUNT(*) FROM precomputed").fetchone()[0],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "last_run": self.last_run(),
+        }
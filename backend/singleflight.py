@@ -0,0 +1,118 @@
+import asyncio
+import os
+from typing import Dict, Any, Awaitable, Callable, Hashable, Optional
+
+# Request coalescing ("single flight") for the event loop.
+#
+# The first caller for a key starts the computation; callers arriving with the
+# same key while it is in flight await that same result instead of starting
+# their own. The computation runs as its own task, so a caller that
+# disconnects or is cancelled does not take it down for the others.
+#
+# Each flight has a deadline (the group's timeout or a per-key one). Past it,
+# every waiter gets FlightTimeout and the key is released, so the next caller
+# starts afresh; the late result, if any, is dropped. An exception raised by
+# the computation is re-raised in every waiter. Only concurrent callers share:
+# nothing is kept once a flight lands (see cache.py for that).
+#
+# Set COALESCE_REQUESTS=0 to run every call on its own.
+
+ENABLED = os.getenv("COALESCE_REQUESTS", "1") == "1"
+DEFAULT_TIMEOUT = float(os.getenv("COALESCE_TIMEOUT_SECONDS", "30"))
+
+
+class FlightTimeout(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, name: str, timeout: Optional[float] = DEFAULT_TIMEOUT, enabled: bool = ENABLED):
+        self.name = name
+        self.timeout = timeout
+        self.enabled = enabled
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.peak_waiters = 0
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def run(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None
+    ) -> Any:
+        # Runs on the event loop only, so the bookkeeping needs no lock.
+        self.calls += 1
+        if not self.enabled:
+            self.executions += 1
+            return await fn()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._start(key, fn, self.timeout if timeout is None else timeout)
+        else:
+            self.coalesced += 1
+        waiters = self._waiters[key] = self._waiters.get(key, 0) + 1
+        self.peak_waiters = max(self.peak_waiters, waiters)
+        try:
+            return await asyncio.shield(flight)
+        finally:
+            if self._flights.get(key) is flight:
+                self._waiters[key] -= 1
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        flight = loop.create_future()
+        self._flights[key] = flight
+        self._waiters[key] = 0
+        self.executions += 1
+        task = asyncio.ensure_future(fn())
+        expiry = loop.call_later(timeout, self._expire, key, flight) if timeout is not None else None
+
+        def land(done: asyncio.Task) -> None:
+            if expiry is not None:
+                expiry.cancel()
+            self._release(key, flight)
+            if flight.done():
+                # Timed out already; swallow the late outcome.
+                if not done.cancelled():
+                    done.exception()
+                return
+            if done.cancelled():
+                flight.cancel()
+            elif done.exception() is not None:
+                self.errors += 1
+                flight.set_exception(done.exception())
+            else:
+                flight.set_result(done.result())
+
+        task.add_done_callback(land)
+        # Mark the outcome as retrieved even if every waiter has gone.
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return flight
+
+    def _expire(self, key: Hashable, flight: asyncio.Future) -> None:
+        if not flight.done():
+            self.timeouts += 1
+            self._release(key, flight)
+            flight.set_exception(FlightTimeout(f"{self.name}: no result within the time limit."))
+
+    def _release(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+            del self._waiters[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "timeout_seconds": self.timeout,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalescing_rate": self.coalesced / self.calls if self.calls else 0.0,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "peak_waiters": self.peak_waiters,
+        }
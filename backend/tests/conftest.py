@@ -0,0 +1,60 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Before any module reads them at import: offline weather, thread pools instead
+# of worker processes, and throwaway state.
+_STATE = Path(tempfile.mkdtemp(prefix="krishi-tests-"))
+for _name, _value in {
+    "WEATHER_SOURCE": "fake",
+    "WEATHER_CACHE_DIR": str(_STATE / "weather"),
+    "PLOT_DB": str(_STATE / "plots.sqlite3"),
+    "ADVISORY_EXECUTOR": "thread",
+    "DISEASE_EXECUTOR": "thread",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from models.advisory_model import FEATURES
+from models.advisory_training import generate_synthetic_data
+from models.flat_forest import FlatForest
+
+
+@pytest.fixture(scope="session")
+def forests():
+    # Small forests on the synthetic training set: -> {label: (sklearn, flat)}.
+    df = generate_synthetic_data(2000, seed=7)
+    X = df[FEATURES].values
+    models = {}
+    for label in ("irrigation_required", "fertilizer_required"):
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, df[label].values)
+        models[label] = (model, FlatForest.from_sklearn(model))
+    return models
+
+
+@pytest.fixture(scope="session")
+def training_inputs():
+    return generate_synthetic_data(2000, seed=7)[FEATURES].values.astype(np.float64)
+
+
+@pytest.fixture
+def fake_weather(tmp_path, monkeypatch):
+    # The process-wide WeatherCache, backed by FakeWeatherSource in a temp dir.
+    import weather_store
+
+    cache = weather_store.WeatherCache(weather_store.FakeWeatherSource(), root=tmp_path / "weather")
+    monkeypatch.setattr(weather_store, "_cache", cache)
+    return cache
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
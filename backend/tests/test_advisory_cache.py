@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from advisory_cache import DEFAULT_QUANTA, AdvisoryMemo, parse_quanta
+from cache import LRUCache
+from catalog import get_bundle
+from models.advisory_model import get_daily_advisory_batch, infer_advisories, render_advisory_json
+
+
+def reading(**overrides):
+    return {
+        "soil_moisture": 23.4,
+        "temperature": 38.04,
+        "humidity": 85.3,
+        "rainfall_last_3_days": 1.26,
+        "crop_stage": "Flowering",
+        "days_since_last_irrigation": 4,
+        **overrides,
+    }
+
+
+def make_memo(**quanta):
+    return AdvisoryMemo(LRUCache(max_bytes=1 << 20), {**DEFAULT_QUANTA, **quanta})
+
+
+def test_parse_quanta():
+    assert parse_quanta(None) == DEFAULT_QUANTA
+    assert parse_quanta("soil_moisture=2, temperature=0.5")["temperature"] == 0.5
+    with pytest.raises(ValueError, match="Unknown"):
+        parse_quanta("wind=1")
+    with pytest.raises(ValueError, match="positive"):
+        parse_quanta("humidity=0")
+
+
+def test_snap_rounds_to_the_grid_and_keeps_ints():
+    steps, snapped = make_memo(soil_moisture=2).snap(reading(days_since_last_irrigation=4))
+    assert steps == [12, 380, 85, 13, 4]
+    assert snapped["soil_moisture"] == 24.0
+    assert snapped["temperature"] == 38.0
+    assert snapped["rainfall_last_3_days"] == 1.3
+    assert snapped["days_since_last_irrigation"] == 4 and isinstance(snapped["days_since_last_irrigation"], int)
+
+
+def test_nearby_readings_share_an_entry_across_languages():
+    memo = make_memo()
+    calls = []
+
+    def compute(rows):
+        calls.append(rows)
+        return [[True, False, 0.9, 0.1] for _ in rows]
+
+    memo.lookup([reading(), reading(soil_moisture=23.2)], "v1", compute)
+    memo.lookup([reading(temperature=38.0)], "v1", compute)
+    assert len(calls) == 1 and len(calls[0]) == 1
+    assert calls[0][0]["soil_moisture"] == 23.0
+    memo.lookup([reading(crop_stage="Vegetative")], "v1", compute)
+    assert len(calls) == 2
+    memo.lookup([reading()], "v2", compute)
+    assert len(calls) == 3 and memo.model_version == "v2" and len(memo.cache) == 1
+
+
+def test_memo_text_uses_the_readings_as_sent(forests):
+    (_, irr), (_, fert) = forests["irrigation_required"], forests["fertilizer_required"]
+    memo = make_memo(soil_moisture=5.0)
+    rows = [reading(), reading(soil_moisture=24.0, temperature=37.96, humidity=84.9)]
+
+    predictions = memo.lookup(rows, "v1", lambda snapped: infer_advisories(irr, fert, snapped))
+    assert len(memo.cache) == 1  # both snap to the same grid point
+    for lang in ("en", "hi"):
+        advisories = [json.loads(a) for a in render_advisory_json(rows, predictions, lang)]
+        live = get_daily_advisory_batch(irr, fert, rows, lang)
+        for advisory, expected, row in zip(advisories, live, rows):
+            assert advisory["recommendation_text"] == expected["recommendation_text"]
+            assert format(row["soil_moisture"]) in advisory["recommendation_text"]
+    first, second = (json.loads(a)["recommendation_text"] for a in render_advisory_json(rows, predictions))
+    assert get_bundle("en").heat_alert in first
+    assert get_bundle("en").heat_alert not in second
+
+
+def test_route_renders_memo_hits_from_the_request(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "advisory_memo", make_memo(soil_moisture=5.0, temperature=1.0))
+    hot = client.post("/daily-advisory", json=reading()).json()
+    mild = client.post("/daily-advisory", json=reading(soil_moisture=24.0, temperature=37.6)).json()
+    assert main.advisory_memo.cache.stats()["hits"] == 1
+    assert "23.4" in hot["recommendation_text"] and "24.0" in mild["recommendation_text"]
+    assert get_bundle("en").heat_alert in hot["recommendation_text"]
+    assert get_bundle("en").heat_alert not in mild["recommendation_text"]
+
+    monkeypatch.setattr(main, "advisory_memo", None)
+    assert client.post("/daily-advisory", json=reading()).json()["recommendation_text"] == hot["recommendation_text"]
@@ -0,0 +1,41 @@
+import numpy as np
+
+from models.advisory_model import CROP_STAGES, FEATURES, STAGE_INDEX, encode_features
+from models.advisory_training import FERT_ELIGIBLE_STAGES, generate_synthetic_data
+
+STAGE_COLUMN = FEATURES.index("crop_stage_encoded")
+
+
+def row(stage):
+    return {
+        "soil_moisture": 40.0,
+        "temperature": 28.0,
+        "humidity": 60.0,
+        "rainfall_last_3_days": 2.0,
+        "crop_stage": stage,
+        "days_since_last_irrigation": 3,
+    }
+
+
+def test_stages_encode_to_their_crop_stages_position():
+    # Not alphabetical: the old LabelEncoder sent "Vegetative" to 7.
+    X = encode_features([row(stage) for stage in CROP_STAGES])
+    assert X[:, STAGE_COLUMN].tolist() == list(range(len(CROP_STAGES)))
+    assert encode_features([row("Vegetative")])[0, STAGE_COLUMN] == 1
+
+
+def test_unknown_stage_encodes_to_zero():
+    assert encode_features([row("Harvested")])[0, STAGE_COLUMN] == 0
+
+
+def test_inference_and_training_share_the_stage_codes():
+    # The training rule marks Tillering, Vegetative and Jointing as fertilizer
+    # stages by code; those codes must be the ones inference sends.
+    assert sorted(FERT_ELIGIBLE_STAGES.tolist()) == sorted(
+        STAGE_INDEX[s] for s in ("Tillering", "Vegetative", "Jointing")
+    )
+    df = generate_synthetic_data(500, seed=1)
+    codes = df["crop_stage_encoded"].values
+    assert codes.min() >= 0 and codes.max() == len(CROP_STAGES) - 1
+    eligible = np.isin(codes, FERT_ELIGIBLE_STAGES)
+    assert not df["fertilizer_required"].values[~eligible].any()
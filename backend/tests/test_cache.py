@@ -0,0 +1,103 @@
+import json
+import os
+import time
+
+from cache import DiskCache, LRUCache, TieredCache
+
+
+def entry(i):
+    return {"label": f"entry-{i:03d}", "pad": "x" * 80}
+
+
+def entry_bytes(i):
+    return len(json.dumps(entry(i)))
+
+
+def age(cache, key, seconds_ago):
+    stamp = time.time() - seconds_ago
+    os.utime(cache._path(key), (stamp, stamp))
+
+
+# ─── LRUCache ──────────────────────────────────────────────────────────────────
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    cache = LRUCache(max_bytes=3 * (len("k0") + entry_bytes(0)))
+    for i in range(3):
+        cache.put(f"k{i}", entry(i))
+    assert cache.get("k0") == entry(0)  # now most recent
+    cache.put("k3", entry(3))
+    assert cache.get("k1") is None
+    assert [cache.get(k) is not None for k in ("k0", "k2", "k3")] == [True, True, True]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_lru_skips_values_bigger_than_the_cap():
+    cache = LRUCache(max_bytes=50)
+    cache.put("small", 1)
+    cache.put("big", entry(0))
+    assert cache.get("big") is None and cache.get("small") == 1
+
+
+def test_lru_entries_expire():
+    cache = LRUCache(max_bytes=1 << 20, ttl_seconds=0.05)
+    cache.put("k", entry(0))
+    assert cache.get("k") == entry(0)
+    time.sleep(0.08)
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+    # A rewrite restarts the clock.
+    cache.put("k", entry(1))
+    assert cache.get("k") == entry(1)
+
+
+# ─── DiskCache / TieredCache ───────────────────────────────────────────────────
+
+def test_disk_cache_trims_oldest_files_to_the_low_water_mark(tmp_path):
+    size = entry_bytes(0)
+    cache = DiskCache(tmp_path, max_bytes=10 * size, trim_to=0.5)
+    for i in range(10):
+        cache.put(f"k{i:02d}", entry(i))
+        age(cache, f"k{i:02d}", 100 - i)
+    assert cache.evictions == 0
+    assert cache.get("k00") == entry(0)  # a hit refreshes its mtime
+
+    cache.put("k10", entry(10))
+    assert cache.evictions == 6
+    assert cache.stats()["bytes"] <= 0.5 * cache.max_bytes
+    survivors = sorted(p.stem for p in tmp_path.glob("*/*.json"))
+    assert survivors == ["k00", "k07", "k08", "k09", "k10"]
+
+
+def test_disk_cache_measures_what_other_processes_wrote(tmp_path):
+    size = entry_bytes(0)
+    first = DiskCache(tmp_path, max_bytes=5 * size)
+    for i in range(5):
+        first.put(f"k{i}", entry(i))
+        age(first, f"k{i}", 100 - i)
+    # A fresh instance (another worker, or after a restart) starts by
+    # measuring the directory, so the shared cap holds.
+    second = DiskCache(tmp_path, max_bytes=5 * size)
+    second.put("k5", entry(5))
+    assert second.evictions > 0
+    assert second.get("k0") is None and second.get("k5") == entry(5)
+
+
+def test_disk_cache_ignores_corrupt_files(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1 << 20)
+    cache.put("k", entry(0))
+    cache._path("k").write_text("{not json")
+    assert cache.get("k") is None
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    disk = DiskCache(tmp_path, max_bytes=1 << 20)
+    tiered = TieredCache(LRUCache(max_bytes=1 << 20), disk)
+    tiered.put("k", entry(0))
+    restarted = TieredCache(LRUCache(max_bytes=1 << 20), DiskCache(tmp_path, max_bytes=1 << 20))
+    assert restarted.memory.get("k") is None
+    assert restarted.get("k") == entry(0)
+    assert restarted.memory.get("k") == entry(0)
+    assert restarted.get("k") == entry(0)
+    assert restarted.disk.hits == 1
@@ -0,0 +1,77 @@
+import copy
+
+import pytest
+
+import catalog
+from catalog import CatalogError, compile_catalog, get_bundle, validate_catalog
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    # Private copies of the translation tables, wired into the catalog so a
+    # test can break them and recompile.
+    sources = {name: copy.deepcopy(source) for name, source in catalog.SOURCES.items()}
+    monkeypatch.setattr(catalog, "SOURCES", sources)
+    monkeypatch.setattr(catalog, "ADVISORY_MESSAGES", sources["advisory"])
+    monkeypatch.setattr(catalog, "FERTILIZER_WINDOWS", sources["fertilizer_windows"])
+    monkeypatch.setattr(catalog, "RISK_ALERTS", sources["risk_alerts"])
+    monkeypatch.setattr(catalog, "DISEASE_DB_TRANS", sources["disease"])
+    return sources
+
+
+def compile_error():
+    with pytest.raises(CatalogError) as info:
+        compile_catalog()
+    return str(info.value)
+
+
+def test_shipped_catalog_is_complete():
+    assert validate_catalog() == []
+    assert set(catalog.SUPPORTED_LANGS) == {"en", "hi"}
+
+
+def test_unknown_language_falls_back_to_english():
+    assert get_bundle("xx") is get_bundle("en")
+    assert get_bundle("hi").lang == "hi"
+
+
+def test_copied_tables_compile(tables):
+    assert set(compile_catalog()) == {"en", "hi"}
+
+
+def test_missing_key_fails(tables):
+    del tables["advisory"]["hi"]["heat_alert"]
+    assert "advisory.hi.heat_alert: missing" in compile_error()
+
+
+def test_missing_nested_key_fails(tables):
+    del tables["disease"]["hi"]["rust"][next(iter(tables["disease"]["hi"]["rust"]))]
+    assert "disease.hi.rust." in compile_error()
+
+
+def test_language_missing_from_one_table_fails(tables):
+    del tables["risk_alerts"]["hi"]
+    assert "risk_alerts: language 'hi' is missing entirely" in compile_error()
+
+
+def test_language_without_advisory_messages_fails(tables):
+    # e.g. a typo'd code: the table would never be served.
+    tables["fertilizer_windows"]["hn"] = tables["fertilizer_windows"]["hi"]
+    assert "fertilizer_windows: language 'hn' has no advisory messages" in compile_error()
+
+
+def test_placeholder_mismatch_fails(tables):
+    tables["risk_alerts"]["hi"]["temp_threshold"] = "{stgae}"
+    assert "risk_alerts.hi.temp_threshold: placeholders ['stgae'] != ['stage']" in compile_error()
+
+
+def test_irrigation_sentence_needs_one_plain_placeholder(tables):
+    for lang in ("en", "hi"):
+        tables["advisory"][lang]["irrigation_ok"] = "Moisture {soil_moisture:.0f}%."
+    assert "Expected exactly one plain {soil_moisture}" in compile_error()
+
+
+def test_every_problem_is_reported_at_once(tables):
+    del tables["advisory"]["hi"]["heat_alert"]
+    del tables["advisory"]["hi"]["humidity_alert"]
+    assert len(validate_catalog()) == 2
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from models.flat_forest import FlatForest, check_equivalence
+from models.prob_lattice import random_inputs
+
+
+@pytest.mark.parametrize("label", ["irrigation_required", "fertilizer_required"])
+def test_predict_proba_is_bit_identical_to_sklearn(forests, training_inputs, label):
+    model, flat = forests[label]
+    for X in (training_inputs, random_inputs(5000, seed=3)):
+        assert np.array_equal(flat.predict_proba(X), model.predict_proba(X))
+        assert np.array_equal(flat.predict(X), model.predict(X))
+
+
+def test_out_of_range_inputs_match_sklearn(forests):
+    # Values past the training bounds (and exactly on float32 boundaries)
+    # still take the same branches.
+    model, flat = forests["irrigation_required"]
+    X = random_inputs(2000, seed=4) * np.random.default_rng(5).uniform(-1, 3, (2000, 1))
+    X[:10] = np.float32(X[:10])
+    assert check_equivalence(model, flat, X) == 0.0
+
+
+def test_saved_forest_loads_identically(forests, training_inputs, tmp_path):
+    model, flat = forests["fertilizer_required"]
+    flat.save(tmp_path, "fert")
+    loaded = FlatForest.load(tmp_path, "fert")
+    assert loaded.n_trees == flat.n_trees
+    assert np.array_equal(loaded.classes_, model.classes_)
+    assert np.array_equal(loaded.predict_proba(training_inputs), model.predict_proba(training_inputs))
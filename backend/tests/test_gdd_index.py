@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from models.gdd_index import GDDIndex
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tmax = rng.uniform(25, 40, n)
+    tmin = tmax - rng.uniform(5, 15, n)
+    tmax[rng.random(n) < 0.05] = np.nan
+    return tmax, tmin
+
+
+def brute_gdd(tmax, tmin, base, lo, hi):
+    avg = (tmax[lo:hi + 1] + tmin[lo:hi + 1]) / 2
+    return float(np.nansum(np.maximum(avg - base, 0)))
+
+
+def test_accumulated_matches_a_scan():
+    tmax, tmin = series(400)
+    index = GDDIndex(1000, tmax, tmin, base_temps=[10.0])
+    starts = np.array([1000, 1050, 1399, 900])
+    expected = [brute_gdd(tmax, tmin, 8.0, max(s - 1000, 0), 399) for s in starts]
+    assert np.allclose(index.accumulated(8.0, starts, 1399), expected)
+
+
+def test_extended_and_synced_leave_the_original_untouched():
+    tmax, tmin = series(300)
+    index = GDDIndex(0, tmax[:200], tmin[:200], base_temps=[10.0])
+    before = index.accumulated(10.0, 0, 299)
+
+    grown = index.synced(0, tmax, tmin)
+    assert grown is not index
+    assert index.n_days == 200 and index.accumulated(10.0, 0, 299) == before
+    fresh = GDDIndex(0, tmax, tmin, base_temps=[10.0])
+    assert grown.accumulated(10.0, 0, 299) == pytest.approx(fresh.accumulated(10.0, 0, 299))
+    assert grown.summary(12.0, 10, 250) == pytest.approx(fresh.summary(12.0, 10, 250))
+
+    assert grown.synced(0, tmax, tmin) is grown
+    rebuilt = grown.synced(-10, np.concatenate([tmax[:10], tmax]), np.concatenate([tmin[:10], tmin]))
+    assert rebuilt.first_day == -10 and grown.first_day == 0
+
+
+def test_readers_never_see_a_partly_updated_index():
+    # One writer grows and rebuilds the index the way WeatherCache.get_index
+    # does (swapping the reference); readers query whatever is current.
+    tmax, tmin = series(3000, seed=1)
+    current = {"index": GDDIndex(0, tmax[:100], tmin[:100], base_temps=[10.0])}
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        n = 100
+        try:
+            while n < len(tmax) and not stop.is_set():
+                n += 7
+                index = current["index"]
+                if n % 5 == 0:
+                    current["index"] = GDDIndex(0, tmax[:n], tmin[:n], index.cumulative.keys())
+                else:
+                    current["index"] = index.synced(0, tmax[:n], tmin[:n])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            stop.set()
+
+    def reader(base):
+        try:
+            while not stop.is_set():
+                index = current["index"]
+                last = index.last_day
+                summary = index.summary(base, 0, last)
+                assert summary is not None and summary["days"] == last + 1
+                value = index.accumulated(base, np.arange(0, last + 1, 13), last)
+                assert value[0] == summary["accumulated_gdd"]
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=reader, args=(base,)) for base in (10.0, 10.0, 8.0, 12.5)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors[0]
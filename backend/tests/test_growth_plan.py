@@ -0,0 +1,68 @@
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import main
+from models.growth_model import BASE_TEMPS, CROP_STAGES, get_growth_plan, get_growth_plan_batch, parse_date
+from weather_store import historical_gdd
+
+
+def random_plots(n, seed=0):
+    rng = np.random.default_rng(seed)
+    crops = list(CROP_STAGES)
+    today = date.today()
+    plots = []
+    for i in range(n):
+        tmin = round(float(rng.uniform(-5, 30)), 1)
+        crop = crops[int(rng.integers(len(crops)))]
+        plots.append({
+            "crop_type": crop.upper() if i % 7 == 0 else crop,
+            "sowing_date": (today - timedelta(days=int(rng.integers(-5, 400)))).isoformat(),
+            "city": f"plot-{i}",
+            "tmax": round(tmin + float(rng.uniform(0.5, 18)), 1),
+            "tmin": tmin,
+            "accumulated_gdd": None if i % 2 else round(float(rng.uniform(0, 3000)), 1),
+            "stage_basis": "gdd" if i % 3 == 0 else "days",
+        })
+    return plots
+
+
+@pytest.mark.parametrize("lang", ["en", "hi"])
+def test_batch_matches_per_plot_plans(lang):
+    plots = random_plots(3000, seed=len(lang))
+    batch = get_growth_plan_batch(plots, lang=lang, today=date.today())
+    assert batch == [get_growth_plan(**plot, lang=lang) for plot in plots]
+
+
+def test_batch_route_streams_the_per_plot_plans(client, fake_weather):
+    plots = random_plots(1200, seed=5)
+    for i, plot in enumerate(plots[:40]):
+        plot.update(accumulated_gdd=None, lat=20 + i % 4, lon=75.0)
+    res = client.post("/growth-plan/batch", json={"plots": plots})
+    assert res.status_code == 200
+    lines = res.text.splitlines()
+    assert len(lines) == len(plots)
+    assert all(line.startswith('{"index":') for line in lines)
+    for i, line in enumerate(lines):
+        plan = json.loads(line)
+        assert plan.pop("index") == i
+        fields = {k: v for k, v in plots[i].items() if k not in ("lat", "lon")}
+        if i < 40:
+            fields["accumulated_gdd"] = historical_gdd(
+                plots[i]["lat"], plots[i]["lon"], parse_date(plots[i]["sowing_date"]),
+                BASE_TEMPS[plots[i]["crop_type"].lower()],
+            )["accumulated_gdd"]
+        assert plan == json.loads(json.dumps(get_growth_plan(**fields)))
+
+
+def test_batch_route_is_admitted_by_the_light_pool(client, monkeypatch):
+    from executors import PoolSaturated
+
+    async def saturated(fn, *args):
+        raise PoolSaturated("light")
+
+    monkeypatch.setattr(main.light_pool, "run", saturated)
+    res = client.post("/growth-plan/batch", json={"plots": random_plots(3)})
+    assert res.status_code == 503
@@ -0,0 +1,71 @@
+import itertools
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from catalog import SUPPORTED_LANGS
+from json_fragments import encode_string, json_number
+from models.advisory_model import CROP_STAGES, get_daily_advisory_batch, get_daily_advisory_json
+from models.growth_model import CROP_STAGES as CROPS, get_growth_plan, get_growth_plan_json
+
+LANGS = SUPPORTED_LANGS + ["xx"]  # unknown languages fall back to English
+
+
+def dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def readings():
+    # Both sides of every threshold the text depends on, ints and floats,
+    # and values past the training bounds.
+    for soil, temp, humid in itertools.product(
+        [0, 10, 29.99, 30, 30.0, 45, 80.5, 100],
+        [-3.5, 15, 28, 28.1, 38, 38.01, 52],
+        [30, 85, 85.5, 100],
+    ):
+        yield {
+            "soil_moisture": soil,
+            "temperature": temp,
+            "humidity": humid,
+            "rainfall_last_3_days": 0 if soil < 40 else 12.5,
+            "days_since_last_irrigation": int(soil) % 15,
+        }
+
+
+@pytest.mark.parametrize("lang", LANGS)
+@pytest.mark.parametrize("stage", CROP_STAGES + ["Unknown stage"])
+def test_advisory_json_matches_json_dumps(forests, lang, stage):
+    (_, irr), (_, fert) = forests["irrigation_required"], forests["fertilizer_required"]
+    rows = [{**row, "crop_stage": stage} for row in readings()]
+    encoded = get_daily_advisory_json(irr, fert, rows, lang=lang)
+    expected = get_daily_advisory_batch(irr, fert, rows, lang=lang)
+    assert encoded == [dumps(advisory) for advisory in expected]
+
+
+@pytest.mark.parametrize("lang", LANGS)
+@pytest.mark.parametrize("crop", list(CROPS) + ["WHEAT"])
+@pytest.mark.parametrize("stage_basis", ["days", "gdd"])
+def test_growth_plan_json_matches_json_dumps(lang, crop, stage_basis):
+    today = date.today()
+    for days, (tmax, tmin), gdd, city in itertools.product(
+        [0, 1, 45, 119, 400],
+        [(30, 18), (45.5, 29.25), (8, -4)],
+        [None, 0, 612.35, 1e5],
+        ["Pune", 'Quote "city" \\ path', "पुणे", "tab\tnewline\n\x01"],
+    ):
+        args = dict(
+            crop_type=crop, sowing_date=(today - timedelta(days=days)).isoformat(), city=city,
+            tmax=tmax, tmin=tmin, accumulated_gdd=gdd, lang=lang, stage_basis=stage_basis,
+        )
+        assert get_growth_plan_json(**args) == dumps(get_growth_plan(**args))
+
+
+@pytest.mark.parametrize("value", [0, 0.0, -0.0, 1, 0.1, 0.35, 2.675, 1e16, 1e-7, 123456.789, -5])
+def test_json_number_matches_json_dumps(value):
+    assert json_number(value) == json.dumps(value)
+
+
+@pytest.mark.parametrize("text", ["", "plain", 'a"b', "back\\slash", " ", "\x00\x1f", "हिन्दी", "😀"])
+def test_encode_string_matches_json_dumps(text):
+    assert encode_string(text) == json.dumps(text, ensure_ascii=False)
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from models.model_store import MANIFEST_NAME, ActiveModel, load_version, promote, rollback, save_bundle
+
+
+@pytest.fixture
+def versions(forests, tmp_path):
+    # Two candidate versions in a fresh model dir, neither promoted yet.
+    (irr, _), (fert, _) = forests["irrigation_required"], forests["fertilizer_required"]
+    first = save_bundle(irr, fert, tmp_path, make_current=False)
+    second = save_bundle(fert, irr, tmp_path, make_current=False)
+    assert first["version"] != second["version"]
+    return tmp_path, first, second
+
+
+def flat_loader(model_dir, fail=()):
+    loaded = []
+
+    def activate(version):
+        if version in fail:
+            fail.remove(version)
+            raise OSError("artifact not readable yet")
+        loaded.append(load_version(version, model_dir, backend="flat")["version"])
+
+    activate.loaded = loaded
+    return activate
+
+
+def test_promote_swap_and_rollback(versions):
+    model_dir, first, second = versions
+    activate = flat_loader(model_dir)
+    active = ActiveModel(activate, model_dir, poll_seconds=0)
+    assert active.refresh() is None
+
+    promote(first, model_dir)
+    assert active.refresh() == first["version"]
+    assert active.swaps == 0
+
+    promote(second, model_dir)
+    assert active.refresh() == second["version"]
+    assert active.swaps == 1
+    assert active.history == [first["version"]]
+
+    assert rollback(model_dir)["version"] == first["version"]
+    assert active.refresh() == first["version"]
+    assert active.swaps == 2
+    assert active.history == []
+    assert activate.loaded == [first["version"], second["version"], first["version"]]
+
+    with pytest.raises(ValueError):
+        rollback(model_dir)
+
+
+def test_unchanged_pointer_is_not_reloaded(versions):
+    model_dir, first, _ = versions
+    activate = flat_loader(model_dir)
+    active = ActiveModel(activate, model_dir, poll_seconds=0)
+    promote(first, model_dir)
+    for _ in range(3):
+        active.refresh()
+    assert activate.loaded == [first["version"]]
+
+
+def test_failed_load_keeps_the_running_version_and_is_retried(versions):
+    model_dir, first, second = versions
+    activate = flat_loader(model_dir, fail=[second["version"]])
+    active = ActiveModel(activate, model_dir, poll_seconds=0)
+    promote(first, model_dir)
+    active.refresh()
+
+    promote(second, model_dir)
+    assert active.refresh() == first["version"]
+    assert active.load_failures == 1
+    # Same pointer, no change on disk: tried again once the backoff passes.
+    assert active.refresh() == second["version"]
+    assert active.swaps == 1
+
+
+def test_failed_load_waits_out_the_backoff(versions):
+    model_dir, first, _ = versions
+    activate = flat_loader(model_dir, fail=[first["version"]])
+    active = ActiveModel(activate, model_dir, poll_seconds=60)
+    promote(first, model_dir)
+    assert active.refresh() is None
+    assert active.refresh() is None
+    assert active.load_failures == 1
+    active._retry_at = 0.0
+    assert active.refresh() == first["version"]
+
+
+def test_startup_failure_recovers_when_the_pointer_changes(versions):
+    model_dir, first, second = versions
+    activate = flat_loader(model_dir, fail=[first["version"]])
+    active = ActiveModel(activate, model_dir, poll_seconds=60)
+    promote(first, model_dir)
+    assert active.refresh() is None
+    promote(second, model_dir)
+    assert active.refresh() == second["version"]
+
+
+def test_corrupt_artifact_is_never_switched_to(versions):
+    model_dir, first, second = versions
+    active = ActiveModel(flat_loader(model_dir), model_dir, poll_seconds=0)
+    promote(first, model_dir)
+    active.refresh()
+    next(iter((model_dir / second["flat_dir"]).glob("*.npy"))).write_bytes(b"garbage")
+    promote(second, model_dir)
+    assert active.refresh() == first["version"]
+    assert json.loads((model_dir / MANIFEST_NAME).read_text())["version"] == second["version"]
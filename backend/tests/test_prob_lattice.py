@@ -0,0 +1,44 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from models.prob_lattice import LATTICE_MODES, ProbabilityLattice, grid_axes, parse_steps, tabulate
+
+# Coarse enough to tabulate in well under a second, fine enough that many
+# splits fall between grid points.
+STEPS = "soil_moisture=5,temperature=5,humidity=13,rainfall_last_3_days=5,days_since_last_irrigation=2"
+# uint8 storage: probability * 255, rounded.
+TOLERANCE = 1 / 510 + 1e-9
+
+
+def grid_points(axes):
+    values = [a["start"] + a["step"] * np.arange(a["size"]) for a in axes]
+    return np.array(list(itertools.product(*values)), dtype=np.float64)
+
+
+@pytest.mark.parametrize("label", ["irrigation_required", "fertilizer_required"])
+@pytest.mark.parametrize("mode", LATTICE_MODES)
+def test_lattice_is_exact_at_grid_points(forests, label, mode):
+    _, flat = forests[label]
+    axes = grid_axes(parse_steps(STEPS))
+    lattice = ProbabilityLattice(tabulate(flat, axes), axes, flat.classes_, mode)
+    X = grid_points(axes)
+    assert np.abs(lattice.predict_proba(X) - flat.predict_proba(X)).max() <= TOLERANCE
+
+
+def test_inputs_are_clipped_to_the_training_bounds(forests):
+    _, flat = forests["irrigation_required"]
+    axes = grid_axes(parse_steps(STEPS))
+    lattice = ProbabilityLattice(tabulate(flat, axes), axes, flat.classes_, "nearest")
+    X = grid_points(axes)[:50]
+    far = X.copy()
+    far[:, 0] = np.where(X[:, 0] == axes[0]["start"], -1e6, X[:, 0])
+    assert np.array_equal(lattice.predict_proba(far), lattice.predict_proba(X))
+
+
+def test_bad_steps_are_rejected():
+    with pytest.raises(ValueError):
+        parse_steps("leaf_colour=1")
+    with pytest.raises(ValueError):
+        parse_steps("days_since_last_irrigation=1.5")
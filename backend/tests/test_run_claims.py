@@ -0,0 +1,79 @@
+import threading
+from datetime import date
+
+import pytest
+
+from models.model_store import save_bundle
+from models.precompute import run_nightly
+from plot_store import PlotStore
+
+DAY = date(2026, 3, 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PlotStore(tmp_path / "plots.sqlite3")
+
+
+def test_a_day_is_claimed_once(store):
+    assert store.claim_run(DAY)
+    assert not store.claim_run(DAY)
+    assert store.claim_run(date(2026, 3, 2))
+
+
+def test_concurrent_claims_have_one_winner(store):
+    # Separate stores, so separate connections, on one file: like two workers.
+    stores = [PlotStore(store.path) for _ in range(8)]
+    stores[0].claim_run(date(2026, 1, 1))  # create the schema up front
+    barrier = threading.Barrier(len(stores))
+    won = []
+
+    def claim(s):
+        barrier.wait()
+        if s.claim_run(DAY):
+            won.append(s)
+
+    threads = [threading.Thread(target=claim, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(won) == 1
+
+
+def test_expired_claim_can_be_retaken(store):
+    assert store.claim_run(DAY)
+    assert not store.claim_run(DAY, ttl_seconds=3600)
+    assert store.claim_run(DAY, ttl_seconds=0)
+    # Retaking refreshes the claim, so it is not stale again straight away.
+    assert not store.claim_run(DAY, ttl_seconds=3600)
+
+
+def test_finished_run_is_never_retaken(store):
+    assert store.claim_run(DAY)
+    store.finish_run(DAY, {"status": "done"})
+    assert not store.claim_run(DAY, ttl_seconds=0)
+    store.release_run(DAY)
+    assert not store.claim_run(DAY, ttl_seconds=0)
+    assert store.last_run()["report"] == {"status": "done"}
+
+
+def test_release_frees_the_day(store):
+    assert store.claim_run(DAY)
+    store.release_run(DAY)
+    assert store.claim_run(DAY)
+
+
+def test_failed_run_releases_its_claim(store, tmp_path):
+    # No model artifact in the directory, and training is not allowed.
+    with pytest.raises(Exception):
+        run_nightly(store, DAY, model_dir=tmp_path / "empty")
+    assert store.claim_run(DAY)
+
+
+def test_run_is_skipped_once_done(store, forests, tmp_path):
+    (irr, _), (fert, _) = forests["irrigation_required"], forests["fertilizer_required"]
+    save_bundle(irr, fert, tmp_path)
+    assert run_nightly(store, DAY, model_dir=tmp_path)["status"] == "done"
+    assert run_nightly(store, DAY, model_dir=tmp_path)["status"] == "skipped"
+    assert run_nightly(store, DAY, model_dir=tmp_path, force=True)["status"] == "done"
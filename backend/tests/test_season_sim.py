@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from models.season_sim import FORECAST_DAYS, project_seasons
+from weather_store import cell_key, grid_cell
+
+TODAY = date(2026, 3, 1)
+PLOTS = [
+    {"crop_type": "wheat", "sowing_date": (TODAY - timedelta(days=40)).isoformat(), "lat": 22.0, "lon": 77.0},
+    {"crop_type": "rice", "sowing_date": (TODAY - timedelta(days=5)).isoformat(), "lat": 22.0, "lon": 77.0},
+]
+
+
+def p50_days(results):
+    return [
+        [None if stage["p50"] is None else date.fromisoformat(stage["p50"]).toordinal() for stage in r["stages"]]
+        for r in results
+    ]
+
+
+def test_a_warm_forecast_brings_p50_dates_forward(fake_weather):
+    key = cell_key(grid_cell(22.0, 77.0))
+    base = project_seasons(PLOTS, today=TODAY)
+    warm = project_seasons(PLOTS, today=TODAY, forecasts={key: np.full(FORECAST_DAYS, 40.0, np.float32)})
+    cold = project_seasons(PLOTS, today=TODAY, forecasts={key: np.full(FORECAST_DAYS, 5.0, np.float32)})
+
+    moved = 0
+    for b, w, c in zip(p50_days(base), p50_days(warm), p50_days(cold)):
+        for day_b, day_w, day_c in zip(b, w, c):
+            if day_b is None:
+                continue
+            assert day_w <= day_b <= day_c
+            moved += day_w < day_b
+    assert moved > 0
+
+
+def test_forecast_for_another_cell_changes_nothing(fake_weather):
+    other = cell_key(grid_cell(10.0, 70.0))
+    base = project_seasons(PLOTS, today=TODAY)
+    assert project_seasons(PLOTS, today=TODAY, forecasts={other: np.full(FORECAST_DAYS, 40.0, np.float32)}) == base
+
+
+def test_nan_forecast_days_keep_climatology(fake_weather):
+    key = cell_key(grid_cell(22.0, 77.0))
+    base = project_seasons(PLOTS, today=TODAY)
+    assert project_seasons(PLOTS, today=TODAY, forecasts={key: np.full(FORECAST_DAYS, np.nan, np.float32)}) == base
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from singleflight import FlightTimeout, SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flights = SingleFlight("test", timeout=5)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flights.run("k", compute) for _ in range(5)))
+        return results, calls, flights.stats()
+
+    results, calls, stats = run(scenario())
+    assert results == [1] * 5
+    assert calls == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_error_reaches_every_waiter_and_releases_the_key():
+    async def scenario():
+        flights = SingleFlight("test", timeout=5)
+        calls = 0
+
+        async def fail():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError(f"boom {calls}")
+
+        outcomes = await asyncio.gather(*(flights.run("k", fail) for _ in range(3)), return_exceptions=True)
+        # Failures are not remembered: the next caller runs again.
+        with pytest.raises(ValueError, match="boom 2"):
+            await flights.run("k", fail)
+        return outcomes, flights.stats()
+
+    outcomes, stats = run(scenario())
+    assert all(isinstance(e, ValueError) and str(e) == "boom 1" for e in outcomes)
+    assert stats["executions"] == 2
+    assert stats["errors"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_timeout_reaches_every_waiter_and_drops_the_late_result():
+    async def scenario():
+        flights = SingleFlight("test", timeout=0.05)
+        finished = asyncio.Event()
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            finished.set()
+            return "late"
+
+        async def fast():
+            return "fresh"
+
+        outcomes = await asyncio.gather(*(flights.run("k", slow) for _ in range(3)), return_exceptions=True)
+        # The key is free again before the slow call lands.
+        fresh = await flights.run("k", fast)
+        await finished.wait()
+        await asyncio.sleep(0)
+        return outcomes, fresh, flights.stats()
+
+    outcomes, fresh, stats = run(scenario())
+    assert all(isinstance(e, FlightTimeout) for e in outcomes)
+    assert fresh == "fresh"
+    assert stats["timeouts"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_per_key_timeout_overrides_the_group_default():
+    async def scenario():
+        flights = SingleFlight("test", timeout=None)
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        with pytest.raises(FlightTimeout):
+            await flights.run("k", slow, timeout=0.01)
+
+    run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_flight():
+    async def scenario():
+        flights = SingleFlight("test", timeout=5)
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 42
+
+        first = asyncio.ensure_future(flights.run("k", compute))
+        second = asyncio.ensure_future(flights.run("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, flights.stats()
+
+    result, stats = run(scenario())
+    assert result == 42
+    assert stats["executions"] == 1
@@ -0,0 +1,87 @@
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from models import disease_classifier
+from models.disease_classifier import ImageTooLarge, InvalidImageError, decode_image
+from uploads import FORM_OVERHEAD_BYTES, MAX_UPLOAD_BYTES, sniff_image_format
+
+
+def png_bytes(width=64, height=48):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (40, 140, 60)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def png_header_only(width, height):
+    # A valid PNG signature and IHDR that describe a huge bitmap, with no pixel
+    # data behind them: a few dozen bytes on the wire.
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IEND", b"")
+
+
+def upload(client, data, filename="leaf.png", content_type="image/png"):
+    return client.post("/detect-disease", files={"image": (filename, data, content_type)})
+
+
+def test_sniff_ignores_the_claimed_type():
+    assert sniff_image_format(png_bytes()[:12]) == "png"
+    assert sniff_image_format(b"\xff\xd8\xff\xe0" + b"\x00" * 8) == "jpeg"
+    assert sniff_image_format(b"RIFF\x00\x00\x00\x00WEBP") == "webp"
+    assert sniff_image_format(b"GIF89a\x00\x00\x00\x00\x00\x00") is None
+    assert sniff_image_format(b"") is None
+
+
+def test_valid_image_is_classified(client):
+    res = upload(client, png_bytes())
+    assert res.status_code == 200
+    assert "confidence" in res.json()
+
+
+def test_oversized_body_is_rejected(client):
+    res = upload(client, b"\x89PNG\r\n\x1a\n" + b"\x00" * (MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES))
+    assert res.status_code == 413
+
+
+def test_file_over_the_cap_is_rejected_while_streaming(client):
+    # Within the framing allowance, so only the per-part byte count catches it.
+    res = upload(client, b"\x89PNG\r\n\x1a\n" + b"\x00" * (MAX_UPLOAD_BYTES + 1))
+    assert res.status_code == 413
+
+
+@pytest.mark.parametrize("data", [b"%PDF-1.7\n" + b"\x00" * 64, b"<html></html>", b"GIF8", b""])
+def test_non_image_payload_is_rejected_despite_its_content_type(client, data):
+    res = upload(client, data)
+    assert res.status_code == 415
+
+
+def test_missing_field_and_wrong_encoding(client):
+    assert client.post("/detect-disease", files={"photo": ("leaf.png", png_bytes(), "image/png")}).status_code == 400
+    assert client.post("/detect-disease", content=png_bytes(), headers={"content-type": "image/png"}).status_code == 400
+
+
+def test_decompression_bomb_header_is_rejected(client):
+    res = upload(client, png_header_only(8000, 8000))
+    assert res.status_code == 413
+    assert "too large" in res.json()["detail"]
+
+
+def test_decode_checks_pixels_before_decoding(monkeypatch):
+    monkeypatch.setattr(disease_classifier, "MAX_PIXELS", 64 * 48)
+    assert decode_image(png_bytes(64, 48)).size == (disease_classifier.INPUT_SIZE,) * 2
+    with pytest.raises(ImageTooLarge):
+        decode_image(png_bytes(65, 48))
+    # Header-only: never gets far enough to need the missing pixel data.
+    with pytest.raises(ImageTooLarge):
+        decode_image(png_header_only(100_000, 100_000))
+
+
+def test_truncated_image_is_a_bad_request():
+    with pytest.raises(InvalidImageError) as info:
+        decode_image(png_bytes()[:40])
+    assert info.value.status_code == 400
@@ -0,0 +1,186 @@
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+import pytest
+
+import weather_client
+import weather_standin
+from weather_client import CircuitBreaker, WeatherClient, backoff_delay
+from weather_store import FakeWeatherSource, WeatherSourceError, grid_cell
+
+START = date(2026, 3, 1)
+END = START + timedelta(days=6)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Draws:
+    # Stands in for the stand-in's `random`: fails exactly the listed calls.
+    def __init__(self, failures):
+        self.failures = list(failures)
+
+    def random(self):
+        return 0.0 if self.failures and self.failures.pop(0) else 1.0
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    monkeypatch.setattr(weather_standin, "counts", {"forecast": 0, "archive": 0, "failed": 0})
+    monkeypatch.setattr(weather_standin, "STANDIN_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(weather_standin, "random", Draws([]))
+    delays = []
+    monkeypatch.setattr(weather_client, "backoff_delay", lambda attempt: delays.append(attempt) or 0)
+    monkeypatch.setattr(weather_standin, "delays", delays, raising=False)
+    return weather_standin
+
+
+def make_client(retries=2, failures=3, reset_seconds=30):
+    client = WeatherClient(
+        forecast_url="http://standin/v1/forecast",
+        archive_url="http://standin/v1/archive",
+        retries=retries,
+        grid=0.25,
+        transport=httpx.ASGITransport(app=weather_standin.app),
+    )
+    client.breakers = {kind: CircuitBreaker(failures, reset_seconds) for kind in client.urls}
+    return client
+
+
+# ─── Breaker ───────────────────────────────────────────────────────────────────
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failures=2, reset_seconds=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.rejected == 1
+
+    breaker.opened_at -= 30
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.consecutive == 0
+    assert breaker.opens == 1
+
+
+def test_failed_probe_reopens_at_once():
+    breaker = CircuitBreaker(failures=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker.opened_at -= 30
+    assert breaker.allow() and breaker.state == "half-open"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.opens == 2
+
+
+def test_open_breaker_fails_fast_without_calling_upstream(standin):
+    standin.random = Draws([True] * 9)
+
+    async def scenario():
+        client = make_client(retries=2, failures=3)
+        try:
+            for _ in range(3):
+                with pytest.raises(WeatherSourceError, match="failed after 3 attempts"):
+                    await client.daily("forecast", 22, 77, START, END)
+            assert client.breakers["forecast"].state == "open"
+            with pytest.raises(WeatherSourceError, match="circuit open"):
+                await client.daily("forecast", 22, 77, START, END)
+            assert standin.counts["forecast"] == 9
+            # The archive breaker is separate.
+            await client.daily("archive", 22, 77, START, END)
+            assert client.breakers["archive"].state == "closed"
+
+            # After the reset window one probe goes through and closes it.
+            client.breakers["forecast"].opened_at -= 30
+            tmax, _ = await client.daily("forecast", 22, 77, START, END)
+            assert len(tmax) == 7
+            assert client.breakers["forecast"].state == "closed"
+            assert standin.counts["forecast"] == 10
+        finally:
+            await client.aclose()
+
+    run(scenario())
+
+
+# ─── Retries ───────────────────────────────────────────────────────────────────
+
+def test_backoff_is_full_jitter_under_a_cap():
+    for attempt in range(8):
+        ceiling = min(weather_client.WEATHER_BACKOFF_CAP_SECONDS, weather_client.WEATHER_BACKOFF_SECONDS * 2 ** attempt)
+        delays = [backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert len(set(delays)) > 1
+    assert max(backoff_delay(30) for _ in range(200)) <= weather_client.WEATHER_BACKOFF_CAP_SECONDS
+
+
+def test_transient_failures_are_retried(standin):
+    standin.random = Draws([True, True, False])
+
+    async def scenario():
+        client = make_client(retries=2)
+        try:
+            tmax, tmin = await client.daily("archive", 22, 77, START, END)
+        finally:
+            await client.aclose()
+        return client, tmax, tmin
+
+    client, tmax, tmin = run(scenario())
+    expected = FakeWeatherSource(seed=0).fetch_daily(*grid_cell(22, 77), START, END)
+    np.testing.assert_allclose(tmax, np.round(expected[0], 1), atol=1e-4)
+    np.testing.assert_allclose(tmin, np.round(expected[1], 1), atol=1e-4)
+    assert standin.counts == {"forecast": 0, "archive": 3, "failed": 2}
+    assert client.retried["archive"] == 2
+    assert standin.delays == [0, 1]
+    assert client.breakers["archive"].consecutive == 0
+
+
+def test_rejected_request_is_not_retried(standin):
+    async def scenario():
+        client = make_client(retries=2)
+        try:
+            with pytest.raises(WeatherSourceError, match="HTTP 400"):
+                await client.daily("forecast", 22, 77, END, START)
+        finally:
+            await client.aclose()
+        return client
+
+    client = run(scenario())
+    assert standin.counts["forecast"] == 1
+    assert standin.delays == []
+    assert client.breakers["forecast"].state == "closed"
+
+
+# ─── Coalescing ────────────────────────────────────────────────────────────────
+
+def test_concurrent_pulls_share_one_call_per_kind_cell_and_range(standin, monkeypatch):
+    monkeypatch.setattr(standin, "STANDIN_LATENCY_MS", 30)
+
+    async def scenario():
+        client = make_client()
+        try:
+            calls = [
+                # Four points snapping to one 0.25° cell, same range: one pull.
+                *(client.daily("archive", lat, lon, START, END) for lat, lon in [(21.9, 77.1), (22.1, 76.9), (22.05, 77.05), (22.0, 77.0)]),
+                # A different range, kind or cell: each its own pull.
+                client.daily("archive", 22.0, 77.0, START, END + timedelta(days=1)),
+                client.daily("forecast", 22.0, 77.0, START, END),
+                client.daily("archive", 22.3, 77.0, START, END),
+            ]
+            results = await asyncio.gather(*calls)
+        finally:
+            await client.aclose()
+        return client, results
+
+    client, results = run(scenario())
+    assert standin.counts["archive"] == 3
+    assert standin.counts["forecast"] == 1
+    for other in results[1:4]:
+        np.testing.assert_array_equal(other[0], results[0][0])
+    assert len(results[4][0]) == 8
+    assert client.stats()["coalescing"]["coalesced"] == 3
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import tempfile
+from typing import Dict, Any, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+# Streaming ingest for image uploads.
+#
+# Instead of letting the form parser buffer the upload and then reading it all
+# into memory, the multipart body is parsed chunk by chunk as it arrives. The
+# image part is written straight to a temp file on disk, its real format is
+# sniffed from the first bytes (the client's Content-Type is not trusted), and
+# the request is aborted as soon as it crosses MAX_UPLOAD_BYTES. Only the path
+# is handed to the inference worker, which decodes it at reduced scale. A
+# sha256 of the image bytes is computed on the way through for result caching.
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+# Multipart framing (boundaries, part headers, small form fields) on top of the file.
+FORM_OVERHEAD_BYTES = 64 * 1024
+SNIFF_BYTES = 12
+
+
+class UploadError(Exception):
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UnsupportedImageType(UploadError):
+    status_code = 415
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+class _ImagePartWriter:
+    # python-multipart callbacks for one named file field; everything else in the
+    # form is ignored. Callbacks only record state and queue bytes; the actual
+    # disk writes happen in stream_image_upload so they can be awaited.
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.format: Optional[str] = None
+        self.size = 0
+        self.head = b""
+        self.digest = hashlib.sha256()
+        self.pending: list = []
+        self.error: Optional[UploadError] = None
+        self._in_target = False
+        self._found = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._in_target = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name == self.field and b"filename" in options and not self._found:
+            self._in_target = True
+            self._found = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_target or self.error is not None:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.error = UploadTooLarge(f"Image exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit.")
+            return
+        if self.format is None:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.format = sniff_image_format(self.head)
+                if self.format is None:
+                    self.error = UnsupportedImageType("Unsupported image format. Upload JPEG, PNG or WebP.")
+                    return
+        self.digest.update(chunk)
+        self.pending.append(chunk)
+
+    def on_part_end(self) -> None:
+        if self._in_target and self.format is None and self.error is None:
+            # Fewer than SNIFF_BYTES in the whole file.
+            self.format = sniff_image_format(self.head)
+            if self.format is None:
+                self.error = UnsupportedImageType("Unsupported image format. Upload JPEG, PNG or WebP.")
+        self._in_target = False
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+async def stream_image_upload(
+    request: Request, field: str = "image", max_bytes: int = MAX_UPLOAD_BYTES
+) -> Dict[str, Any]:
+    # Returns {"path", "format", "size", "filename", "sha256"}. The caller owns the temp
+    # file and must remove it (see discard_upload).
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + FORM_OVERHEAD_BYTES:
+        # Reject before reading a single byte of the body.
+        raise UploadTooLarge(f"Image exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError("Expected a multipart/form-data upload.")
+
+    writer = _ImagePartWriter(field, max_bytes)
+    parser = MultipartParser(params[b"boundary"], writer.callbacks())
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".img", dir=UPLOAD_SPOOL_DIR, delete=False)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + FORM_OVERHEAD_BYTES:
+                raise UploadTooLarge(f"Image exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+            parser.write(chunk)
+            if writer.error is not None:
+                raise writer.error
+            if writer.pending:
+                data = b"".join(writer.pending)
+                writer.pending.clear()
+                await run_in_threadpool(spool.write, data)
+        parser.finalize()
+        if writer.error is not None:
+            raise writer.error
+        if writer.filename is None:
+            raise UploadError(f"Missing '{field}' file field.")
+        spool.close()
+    except BaseException:
+        spool.close()
+        os.unlink(spool.name)
+        raise
+
+    return {
+        "path": spool.name,
+        "format": writer.format,
+        "size": writer.size,
+        "filename": writer.filename,
+        "sha256": writer.digest.hexdigest(),
+    }
+
+
+def discard_upload(upload: Dict[str, Any]) -> None:
+    try:
+        os.unlink(upload["path"])
+    except FileNotFoundError:
+        pass
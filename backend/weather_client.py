@@ -0,0 +1,231 @@
+import asyncio
+import os
+import random
+import time
+from datetime import date
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from cache import LRUCache
+from metrics import span
+from singleflight import SingleFlight
+from weather_store import (
+    WEATHER_ARCHIVE_URL,
+    WEATHER_GRID_DEG,
+    WeatherSource,
+    WeatherSourceError,
+    cell_key,
+    grid_cell,
+    open_meteo_query,
+    parse_daily,
+)
+
+# Outbound weather calls from the server, on the event loop.
+#
+# One httpx.AsyncClient (a shared keep-alive connection pool) serves every
+# upstream call. Calls are keyed by grid cell and date range, so concurrent
+# requests for the same cell share one pull (singleflight.py), and today's
+# forecast per cell is kept for FORECAST_TTL_SECONDS. Failed calls (transport
+# errors, 429, 5xx) are retried with exponential backoff and full jitter; each
+# upstream has a circuit breaker that fails fast for BREAKER_RESET_SECONDS after
+# BREAKER_FAILURES consecutive failures, then lets one probe through.
+#
+# Archive pulls still go through WeatherCache (disk series, GDD index), which
+# runs on light-pool threads: PooledArchiveSource hands them to this client on
+# the loop. Set WEATHER_FORECAST_URL / WEATHER_ARCHIVE_URL to a running
+# weather_standin.py to work offline.
+
+WEATHER_FORECAST_URL = os.getenv("WEATHER_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", "20"))
+WEATHER_TIMEOUT_SECONDS = float(os.getenv("WEATHER_TIMEOUT_SECONDS", "10"))
+WEATHER_RETRIES = int(os.getenv("WEATHER_RETRIES", "3"))
+WEATHER_BACKOFF_SECONDS = float(os.getenv("WEATHER_BACKOFF_SECONDS", "0.25"))
+WEATHER_BACKOFF_CAP_SECONDS = 4.0
+BREAKER_FAILURES = int(os.getenv("WEATHER_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("WEATHER_BREAKER_RESET_SECONDS", "30"))
+FORECAST_TTL_SECONDS = float(os.getenv("WEATHER_FORECAST_TTL_SECONDS", "1800"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    # closed -> open after `failures` consecutive failures; open -> half-open
+    # once `reset_seconds` have passed, letting a single probe through; the
+    # probe's outcome closes or re-opens it.
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half-open"
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive = 0
+
+    def record_failure(self) -> None:
+        self.consecutive += 1
+        if self.state == "half-open" or self.consecutive >= self.failures:
+            if self.state != "open":
+                self.opens += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.consecutive, "opens": self.opens, "rejected": self.rejected}
+
+
+def backoff_delay(attempt: int, base: float = WEATHER_BACKOFF_SECONDS, cap: float = WEATHER_BACKOFF_CAP_SECONDS) -> float:
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)].
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class WeatherClient:
+    def __init__(
+        self,
+        forecast_url: str = WEATHER_FORECAST_URL,
+        archive_url: str = WEATHER_ARCHIVE_URL,
+        max_connections: int = WEATHER_MAX_CONNECTIONS,
+        timeout: float = WEATHER_TIMEOUT_SECONDS,
+        retries: int = WEATHER_RETRIES,
+        grid: float = WEATHER_GRID_DEG,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.urls = {"forecast": forecast_url, "archive": archive_url}
+        self.retries = retries
+        self.grid = grid
+        self.http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self.breakers = {kind: CircuitBreaker() for kind in self.urls}
+        self.flights = SingleFlight("weather", timeout=None, enabled=True)
+        self.forecasts = LRUCache(max_bytes=1 << 20, ttl_seconds=FORECAST_TTL_SECONDS)
+        self.requests = {kind: 0 for kind in self.urls}
+        self.retried = {kind: 0 for kind in self.urls}
+        self.failures = {kind: 0 for kind in self.urls}
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def _get_json(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        breaker = self.breakers[kind]
+        if not breaker.allow():
+            raise WeatherSourceError(f"Weather {kind} service unavailable (circuit open); try again shortly.")
+        error: Optional[str] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried[kind] += 1
+                await asyncio.sleep(backoff_delay(attempt - 1))
+            self.requests[kind] += 1
+            try:
+                res = await self.http.get(self.urls[kind], params=params)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            if res.status_code in RETRY_STATUSES:
+                error = f"HTTP {res.status_code}"
+                continue
+            if res.status_code >= 400:
+                # The request itself is wrong; retrying will not help, and the
+                # upstream is healthy.
+                breaker.record_success()
+                self.failures[kind] += 1
+                raise WeatherSourceError(f"Weather {kind} request rejected: HTTP {res.status_code}")
+            try:
+                data = res.json()
+            except ValueError:
+                # A 200 that is not JSON (an HTML error page from a proxy, a
+                # truncated body) is an upstream failure like a 5xx.
+                error = f"HTTP {res.status_code} with a non-JSON body"
+                continue
+            breaker.record_success()
+            return data
+        breaker.record_failure()
+        self.failures[kind] += 1
+        raise WeatherSourceError(f"Weather {kind} fetch failed after {self.retries + 1} attempts: {error}")
+
+    async def daily(self, kind: str, lat: float, lon: float, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+        # tmax, tmin for every day in [start, end] at the cell's centre; NaN
+        # where unknown.
+        cell = grid_cell(lat, lon, self.grid)
+
+        async def fetch() -> Tuple[np.ndarray, np.ndarray]:
+            with span(f"weather.{kind}"):
+                data = await self._get_json(kind, open_meteo_query(cell[0], cell[1], start, end))
+            return parse_daily(data, start, end)
+
+        return await self.flights.run((kind, cell, start, end), fetch)
+
+    async def forecast_day(self, lat: float, lon: float, day: date) -> Tuple[float, float]:
+        # Forecast tmax, tmin for one day.
+        key = f"{cell_key(grid_cell(lat, lon, self.grid))}|{day.isoformat()}"
+        cached = self.forecasts.get(key)
+        if cached is not None:
+            return cached[0], cached[1]
+        tmax, tmin = await self.daily("forecast", lat, lon, day, day)
+        if np.isnan(tmax[0]) or np.isnan(tmin[0]):
+            raise WeatherSourceError("No forecast available for this location.")
+        value = [round(float(tmax[0]), 1), round(float(tmin[0]), 1)]
+        self.forecasts.put(key, value)
+        return value[0], value[1]
+
+    async def forecast_range(self, lat: float, lon: float, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+        # Forecast tmax, tmin for every day in [start, end]; NaN where unknown.
+        key = f"{cell_key(grid_cell(lat, lon, self.grid))}|{start.isoformat()}|{end.isoformat()}"
+        cached = self.forecasts.get(key)
+        if cached is not None:
+            return np.array(cached[0], dtype=np.float32), np.array(cached[1], dtype=np.float32)
+        tmax, tmin = await self.daily("forecast", lat, lon, start, end)
+        self.forecasts.put(key, [tmax.tolist(), tmin.tolist()])
+        return tmax, tmin
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            kind: {
+                "url": url,
+                "requests": self.requests[kind],
+                "retries": self.retried[kind],
+                "failures": self.failures[kind],
+                "breaker": self.breakers[kind].stats(),
+            }
+            for kind, url in self.urls.items()
+        }
+        stats["coalescing"] = self.flights.stats()
+        stats["forecast_cache"] = self.forecasts.stats()
+        return stats
+
+
+class PooledArchiveSource(WeatherSource):
+    # WeatherCache source that runs archive pulls on `client` (on `loop`) and
+    # blocks the calling light-pool thread until they land. With an inline
+    # light pool the caller *is* the loop thread, so it uses `fallback`.
+    name = "open-meteo-pooled"
+
+    def __init__(self, client: WeatherClient, loop: asyncio.AbstractEventLoop, fallback: WeatherSource):
+        self.client = client
+        self.loop = loop
+        self.fallback = fallback
+
+    def fetch_daily(self, lat, lon, start, end):
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop or self.loop.is_closed():
+            return self.fallback.fetch_daily(lat, lon, start, end)
+        return asyncio.run_coroutine_threadsafe(self.client.daily("archive", lat, lon, start, end), self.loop).result()
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import os
+import random
+from datetime import date
+
+from fastapi import FastAPI, HTTPException
+
+from weather_store import FakeWeatherSource
+
+# Local stand-in for the Open-Meteo forecast and archive APIs, for offline
+# development, tests and load benchmarks. Serves FakeWeatherSource's
+# deterministic temperatures in Open-Meteo's "daily" format, with optional
+# added latency and injected failures (503) to exercise retries and the
+# circuit breaker in weather_client.py.
+#
+#   cd backend && python -m weather_standin [--port 8090] [--latency-ms 50] [--failure-rate 0.1]
+#   WEATHER_SOURCE=open-meteo \
+#   WEATHER_FORECAST_URL=http://127.0.0.1:8090/v1/forecast \
+#   WEATHER_ARCHIVE_URL=http://127.0.0.1:8090/v1/archive uvicorn main:app
+
+STANDIN_LATENCY_MS = float(os.getenv("STANDIN_LATENCY_MS", "0"))
+STANDIN_FAILURE_RATE = float(os.getenv("STANDIN_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Weather stand-in")
+source = FakeWeatherSource(seed=int(os.getenv("STANDIN_SEED", "0")))
+counts = {"forecast": 0, "archive": 0, "failed": 0}
+
+
+async def daily(kind: str, latitude: float, longitude: float, start_date: str, end_date: str):
+    counts[kind] += 1
+    if STANDIN_LATENCY_MS:
+        await asyncio.sleep(STANDIN_LATENCY_MS / 1000)
+    if random.random() < STANDIN_FAILURE_RATE:
+        counts["failed"] += 1
+        raise HTTPException(status_code=503, detail="Injected failure.")
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date is before start_date.")
+    tmax, tmin = source.fetch_daily(latitude, longitude, start, end)
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "daily": {
+            "time": [date.fromordinal(start.toordinal() + i).isoformat() for i in range(len(tmax))],
+            "temperature_2m_max": [round(float(v), 1) for v in tmax],
+            "temperature_2m_min": [round(float(v), 1) for v in tmin],
+        },
+    }
+
+
+@app.get("/v1/forecast")
+async def forecast(latitude: float, longitude: float, start_date: str, end_date: str):
+    return await daily("forecast", latitude, longitude, start_date, end_date)
+
+
+@app.get("/v1/archive")
+async def archive(latitude: float, longitude: float, start_date: str, end_date: str):
+    return await daily("archive", latitude, longitude, start_date, end_date)
+
+
+@app.get("/stats")
+def stats():
+    return counts
+
+
+def main() -> None:
+    import uvicorn
+
+    global STANDIN_LATENCY_MS, STANDIN_FAILURE_RATE
+    parser = argparse.ArgumentParser(description="Serve fake Open-Meteo forecast and archive data locally.")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=STANDIN_LATENCY_MS)
+    parser.add_argument("--failure-rate", type=float, default=STANDIN_FAILURE_RATE)
+    args = parser.parse_args()
+    STANDIN_LATENCY_MS, STANDIN_FAILURE_RATE = args.latency_ms, args.failure_rate
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+import csv
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import timed
+from models.gdd_index import GDDIndex
+from models.growth_model import BASE_TEMPS
+
+# Daily tmax/tmin history, owned by the backend instead of every browser.
+#
+# Locations are snapped to a lat/lon grid cell and each cell's series is kept
+# on disk as one .npz (a start day plus contiguous float32 tmax/tmin columns).
+# Requests only fetch the days the cache does not have yet, and a per-cell lock
+# makes concurrent requests for the same cell share a single upstream pull.
+# Each cell also keeps an in-memory GDDIndex (prefix sums per base temperature)
+# that is extended as new days land, so GDD over any date range is O(1).
+
+WEATHER_CACHE_DIR = Path(
+    os.getenv("WEATHER_CACHE_DIR", Path(__file__).resolve().parent / "weather_cache")
+)
+WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", "0.1"))
+# Point at weather_standin.py for offline runs.
+WEATHER_ARCHIVE_URL = os.getenv("WEATHER_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+# The Open-Meteo archive trails real time by a couple of days.
+ARCHIVE_LAG_DAYS = int(os.getenv("WEATHER_ARCHIVE_LAG_DAYS", "2"))
+# After a pull comes back short (trailing days not published yet), requests for
+# those days are served from what the cache has for this long before asking
+# the upstream again.
+WEATHER_PENDING_TTL_SECONDS = float(os.getenv("WEATHER_PENDING_TTL_SECONDS", "900"))
+
+EPOCH = date(1970, 1, 1)
+
+
+class WeatherSourceError(Exception):
+    pass
+
+
+def grid_cell(lat: float, lon: float, grid: float = WEATHER_GRID_DEG) -> Tuple[float, float]:
+    return round(round(lat / grid) * grid, 4), round(round(lon / grid) * grid, 4)
+
+
+def cell_key(cell: Tuple[float, float]) -> str:
+    return f"{cell[0]:+.4f}_{cell[1]:+.4f}"
+
+
+def open_meteo_query(lat: float, lon: float, start: date, end: date) -> Dict[str, Any]:
+    # Same parameters for the archive and forecast APIs.
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "daily": "temperature_2m_max,temperature_2m_min",
+        "timezone": "auto",
+    }
+
+
+def parse_daily(data: Dict[str, Any], start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+    # Open-Meteo "daily" block -> tmax, tmin for every day in [start, end].
+    daily = data.get("daily") or {}
+    days = (end - start).days + 1
+    tmax = np.full(days, np.nan, dtype=np.float32)
+    tmin = np.full(days, np.nan, dtype=np.float32)
+    for day_str, hi, lo in zip(
+        daily.get("time", []), daily.get("temperature_2m_max", []), daily.get("temperature_2m_min", [])
+    ):
+        i = (date.fromisoformat(day_str) - start).days
+        if 0 <= i < days:
+            tmax[i] = np.nan if hi is None else hi
+            tmin[i] = np.nan if lo is None else lo
+    return tmax, tmin
+
+
+# ─── Sources ───────────────────────────────────────────────────────────────────
+
+class WeatherSource:
+    name = "base"
+
+    def fetch_daily(
+        self, lat: float, lon: float, start: date, end: date
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns tmax, tmin for every day in [start, end]; NaN where unknown.
+        raise NotImplementedError
+
+
+class OpenMeteoArchiveSource(WeatherSource):
+    name = "open-meteo"
+
+    def __init__(self, base_url: str = WEATHER_ARCHIVE_URL, timeout: float = 15.0):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def fetch_daily(self, lat, lon, start, end):
+        query = urllib.parse.urlencode(open_meteo_query(lat, lon, start, end))
+        try:
+            with urllib.request.urlopen(f"{self.base_url}?{query}", timeout=self.timeout) as res:
+                data = json.load(res)
+        except Exception as e:
+            raise WeatherSourceError(f"Historical weather fetch failed: {e}") from e
+        return parse_daily(data, start, end)
+
+
+class FileWeatherSource(WeatherSource):
+    # A single CSV series (date,tmax,tmin) served for every location. Handy for
+    # offline development and reproducible runs.
+    name = "file"
+
+    def __init__(self, path: Path):
+        self.series: Dict[date, Tuple[float, float]] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.series[date.fromisoformat(row["date"])] = (float(row["tmax"]), float(row["tmin"]))
+
+    def fetch_daily(self, lat, lon, start, end):
+        days = (end - start).days + 1
+        tmax = np.full(days, np.nan, dtype=np.float32)
+        tmin = np.full(days, np.nan, dtype=np.float32)
+        for i in range(days):
+            values = self.series.get(start + timedelta(days=i))
+            if values is not None:
+                tmax[i], tmin[i] = values
+        return tmax, tmin
+
+
+class FakeWeatherSource(WeatherSource):
+    # Deterministic seasonal temperatures (warmer towards the equator) with a
+    # little per-cell noise. Counts calls so callers can check cache behaviour.
+    name = "fake"
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.calls = 0
+
+    def fetch_daily(self, lat, lon, start, end):
+        self.calls += 1
+        day_numbers = np.arange((start - EPOCH).days, (end - EPOCH).days + 1)
+        season = np.sin(2 * np.pi * (day_numbers - 105) / 365.25)
+        mean = 32 - 0.4 * abs(lat) + 8 * season
+        rng = np.random.default_rng([self.seed, int(round(lat * 100)) % 2**16, int(round(lon * 100)) % 2**16])
+        noise = rng.normal(0, 1.5, (2, len(day_numbers)))
+        tmax = (mean + 6 + noise[0]).astype(np.float32)
+        tmin = (mean - 6 + noise[1]).astype(np.float32)
+        return tmax, tmin
+
+
+def build_weather_source(spec: str) -> WeatherSource:
+    if spec == "open-meteo":
+        return OpenMeteoArchiveSource()
+    if spec == "fake":
+        return FakeWeatherSource()
+    if spec.startswith("file:"):
+        return FileWeatherSource(Path(spec[len("file:"):]))
+    raise ValueError(f"Unknown WEATHER_SOURCE {spec!r}; use 'open-meteo', 'fake' or 'file:<path>'.")
+
+
+# ─── Cache ─────────────────────────────────────────────────────────────────────
+
+class WeatherCache:
+    def __init__(self, source: WeatherSource, root: Path = WEATHER_CACHE_DIR, grid: float = WEATHER_GRID_DEG):
+        self.source = source
+        self.root = Path(root)
+        self.grid = grid
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._indexes: Dict[str, GDDIndex] = {}
+        # key -> (last day asked for, monotonic time) of the latest short pull.
+        self._pending: Dict[str, Tuple[int, float]] = {}
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npz"
+
+    def _read(self, key: str) -> Tuple[Optional[int], np.ndarray, np.ndarray]:
+        path = self._path(key)
+        if not path.exists():
+            return None, np.empty(0, np.float32), np.empty(0, np.float32)
+        with np.load(path) as data:
+            return int(data["start"]), data["tmax"], data["tmin"]
+
+    def _write(self, key: str, start: int, tmax: np.ndarray, tmin: np.ndarray) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Per-process temp name: the cell lock only covers this process, and
+        # gunicorn workers share the directory.
+        tmp = self.root / f".{key}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, start=np.int64(start), tmax=tmax.astype(np.float32), tmin=tmin.astype(np.float32))
+        os.replace(tmp, self._path(key))
+
+    @timed("weather.fetch")
+    def _fetch(self, cell, first: int, last: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.source.fetch_daily(
+            cell[0], cell[1], EPOCH + timedelta(days=first), EPOCH + timedelta(days=last)
+        )
+
+    def _recently_short(self, key: str, want_last: int) -> bool:
+        # True if a pull through `want_last` came back short within the TTL.
+        pending = self._pending.get(key)
+        return (
+            pending is not None
+            and pending[0] >= want_last
+            and time.monotonic() - pending[1] < WEATHER_PENDING_TTL_SECONDS
+        )
+
+    def _ensure(self, cell, key: str, want_first: int, want_last: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        # Caller holds the cell lock. Returns the full cached series for the cell,
+        # extended (and persisted) to cover [want_first, want_last] where possible.
+        first, tmax, tmin = self._read(key)
+        if first is None:
+            first, last = want_first, want_first - 1
+        else:
+            last = first + len(tmax) - 1
+
+        changed = False
+        if want_first < first:
+            head_max, head_min = self._fetch(cell, want_first, first - 1)
+            tmax, tmin = np.concatenate([head_max, tmax]), np.concatenate([head_min, tmin])
+            first, changed = want_first, True
+        if want_last > last and not self._recently_short(key, want_last):
+            tail_max, tail_min = self._fetch(cell, last + 1, want_last)
+            # Days the archive has not published yet come back empty; leave them
+            # out so a later request fetches them instead of caching the gap,
+            # and remember the short pull so that is not every request.
+            known = np.flatnonzero(~(np.isnan(tail_max) | np.isnan(tail_min)))
+            keep = known[-1] + 1 if known.size else 0
+            if keep < len(tail_max):
+                self._pending[key] = (want_last, time.monotonic())
+            else:
+                self._pending.pop(key, None)
+            if keep:
+                tmax = np.concatenate([tmax, tail_max[:keep]])
+                tmin = np.concatenate([tmin, tail_min[:keep]])
+                changed = True
+        if changed:
+            self._write(key, first, tmax, tmin)
+        return first, tmax, tmin
+
+    def get_series(self, lat: float, lon: float, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+        cell = grid_cell(lat, lon, self.grid)
+        key = cell_key(cell)
+        want_first, want_last = (start - EPOCH).days, (end - EPOCH).days
+        if want_last < want_first:
+            return np.empty(0, np.float32), np.empty(0, np.float32)
+
+        with self._lock_for(key):
+            first, tmax, tmin = self._ensure(cell, key, want_first, want_last)
+
+        lo = want_first - first
+        hi = min(want_last - first + 1, len(tmax))
+        return tmax[lo:hi], tmin[lo:hi]
+
+    def get_index(self, lat: float, lon: float, start: date, end: date) -> GDDIndex:
+        cell = grid_cell(lat, lon, self.grid)
+        key = cell_key(cell)
+        want_first, want_last = (start - EPOCH).days, (end - EPOCH).days
+
+        with self._lock_for(key):
+            index = self._indexes.get(key)
+            if index is not None and index.first_day <= want_first and (
+                index.last_day >= want_last or self._recently_short(key, want_last)
+            ):
+                return index
+            first, tmax, tmin = self._ensure(cell, key, want_first, max(want_last, want_first))
+            # Readers may still hold the old index: build the new one aside and
+            # swap it in, never change it in place.
+            if index is None:
+                index = GDDIndex(first, tmax, tmin, base_temps=set(BASE_TEMPS.values()))
+            else:
+                index = index.synced(first, tmax, tmin)
+            self._indexes[key] = index
+            return index
+
+
+_cache: Optional[WeatherCache] = None
+_cache_guard = threading.Lock()
+
+
+def get_weather_cache() -> WeatherCache:
+    global _cache
+    with _cache_guard:
+        if _cache is None:
+            _cache = WeatherCache(build_weather_source(os.getenv("WEATHER_SOURCE", "open-meteo")))
+        return _cache
+
+
+def historical_gdd(
+    lat: float, lon: float, sowing_date: date, base_temp: float, today: Optional[date] = None
+) -> Dict[str, Any]:
+    end = (today or date.today()) - timedelta(days=ARCHIVE_LAG_DAYS)
+    if sowing_date >= end:
+        return {"accumulated_gdd": 0.0, "avg_tmax": 0.0, "avg_tmin": 0.0, "days": 0}
+
+    index = get_weather_cache().get_index(lat, lon, sowing_date, end)
+    summary = index.summary(base_temp, (sowing_date - EPOCH).days, (end - EPOCH).days)
+    if summary is None:
+        raise WeatherSourceError("No historical weather available for this location.")
+    return {
+        "accumulated_gdd": round(summary["accumulated_gdd"], 1),
+        "avg_tmax": round(summary["avg_tmax"], 1),
+        "avg_tmin": round(summary["avg_tmin"], 1),
+        "days": summary["days"],
+    }
+
+
+def historical_gdd_many(
+    plots: Sequence[Tuple[Optional[float], Optional[float], date, float]], today: Optional[date] = None
+) -> Tuple[List[Optional[float]], List[str]]:
+    # Accumulated GDD for many (lat, lon, sowing_date, base_temp) plots at once,
+    # matching historical_gdd per plot: one get_index per grid cell and one
+    # vectorized lookup per (cell, base temperature). -> (GDD or None per plot,
+    # one error per cell whose history is unavailable). Plots without a
+    # location get None.
+    end = (today or date.today()) - timedelta(days=ARCHIVE_LAG_DAYS)
+    end_day = (end - EPOCH).days
+    cache = get_weather_cache()
+    results: List[Optional[float]] = [None] * len(plots)
+    groups: Dict[Any, Dict[float, List[int]]] = {}
+    for i, (lat, lon, sowing_date, base_temp) in enumerate(plots):
+        if lat is None or lon is None:
+            continue
+        if sowing_date >= end:
+            results[i] = 0.0
+            continue
+        groups.setdefault(grid_cell(lat, lon, cache.grid), {}).setdefault(float(base_temp), []).append(i)
+
+    errors = []
+    for cell, by_base in groups.items():
+        members = [i for rows in by_base.values() for i in rows]
+        first = min(plots[i][2] for i in members)
+        try:
+            index = cache.get_index(cell[0], cell[1], first, end)
+        except WeatherSourceError as e:
+            errors.append(str(e))
+            continue
+        for base, rows in by_base.items():
+            start_days = np.array([(plots[i][2] - EPOCH).days for i in rows])
+            gdd = index.accumulated(base, start_days, end_day)
+            covered = np.minimum(end_day, index.last_day) >= np.maximum(start_days, index.first_day)
+            for i, value, ok in zip(rows, gdd, covered):
+                results[i] = round(float(value), 1) if ok else None
+        if not all(results[i] is not None for i in members):
+            errors.append("No historical weather available for this location.")
+    return results, errors
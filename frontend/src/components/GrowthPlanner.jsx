@@ -36,46 +36,24 @@ import { cn as clsx } from "@/lib/utils";
 // ── API helpers ───────────────────────────────────────────────────
 const API = import.meta.env.VITE_API_URL;
 const OPEN_METEO_BASE = "https://api.open-meteo.com/v1";
-const OPEN_METEO_ARCHIVE = "https://archive-api.open-meteo.com/v1/archive";
-const CROP_BASE_TEMPS = { wheat: 5, rice: 10, jowar: 10, maize: 10 };
 
-async function fetchHistoricalGDD(lat, lon, sowingDate, baseTemp) {
-  const end = new Date();
-  end.setDate(end.getDate() - 2);
-  const endDate = end.toISOString().split("T")[0];
-  if (sowingDate >= endDate) {
-    return { accumulated_gdd: 0, avg_tmax: 0, avg_tmin: 0, days: 0 };
-  }
-  const url =
-    `${OPEN_METEO_ARCHIVE}?latitude=${lat}&longitude=${lon}` +
-    `&start_date=${sowingDate}&end_date=${endDate}` +
-    `&daily=temperature_2m_max,temperature_2m_min&timezone=auto`;
-  const res = await fetch(url);
+// Historical temperatures are fetched and cached per grid cell by the backend,
+// so farmers in the same area share one archive pull.
+async function fetchHistoricalGDD(lat, lon, sowingDate, cropType) {
+  const params = new URLSearchParams({
+    crop_type: cropType,
+    sowing_date: sowingDate,
+    lat,
+    lon,
+  });
+  const res = await fetch(`${API}/historical-gdd?${params}`);
   if (!res.ok) {
     const body = await res.json().catch(() => ({}));
     throw new Error(
-      `Historical weather fetch failed (${res.status}): ${body.reason || body.error || "unknown error"}`
+      `Historical weather fetch failed (${res.status}): ${body.detail || "unknown error"}`
     );
   }
-  const data = await res.json();
-  const tmaxArr = data.daily.temperature_2m_max;
-  const tminArr = data.daily.temperature_2m_min;
-  let accumulated = 0;
-  for (let i = 0; i < tmaxArr.length; i++) {
-    if (tmaxArr[i] != null && tminArr[i] != null) {
-      const avg = (tmaxArr[i] + tminArr[i]) / 2;
-      accumulated += Math.max(0, avg - baseTemp);
-    }
-  }
-  const days = tmaxArr.length;
-  const avgTmax = tmaxArr.reduce((a, b) => a + (b ?? 0), 0) / days;
-  const avgTmin = tminArr.reduce((a, b) => a + (b ?? 0), 0) / days;
-  return {
-    accumulated_gdd: Math.round(accumulated * 10) / 10,
-    avg_tmax: Math.round(avgTmax * 10) / 10,
-    avg_tmin: Math.round(avgTmin * 10) / 10,
-    days,
-  };
+  return res.json();
 }
 
 async function fetchOpenMeteoCurrent(lat, lon) {
@@ -133,10 +111,9 @@ export default function GrowthPlanner({ weatherData }) {
     try {
       const lat = weatherData.lat;
       const lon = weatherData.lon;
-      const baseTemp = CROP_BASE_TEMPS[cropType] ?? 10;
 
       setFetchPhase(t('sections.growth.hints.fetch_hist'));
-      const hist = await fetchHistoricalGDD(lat, lon, sowingDate, baseTemp);
+      const hist = await fetchHistoricalGDD(lat, lon, sowingDate, cropType);
 
       setFetchPhase(t('sections.growth.hints.fetch_soil'));
       const omData = await fetchOpenMeteoCurrent(lat, lon);